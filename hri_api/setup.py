@@ -1,11 +1,38 @@
 #!/usr/bin/env python
 
 from distutils.core import setup
+from distutils.extension import Extension
+from distutils.command.build_ext import build_ext
+from distutils.errors import CCompilerError, DistutilsExecError, DistutilsPlatformError
 from catkin_pkg.python_setup import generate_distutils_setup
 
+
+class OptionalBuildExt(build_ext):
+    """ Builds the compiled extensions if it can; hri_api falls back to pure Python versions if they are missing """
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except DistutilsPlatformError as exc:
+            self.warn("Not building compiled extensions: " + str(exc))
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except (CCompilerError, DistutilsExecError, DistutilsPlatformError) as exc:
+            self.warn("Not building " + ext.name + ": " + str(exc))
+
+
 d = generate_distutils_setup(
-    packages=['hri_api', 'hri_api.actions', 'hri_api.entities', 'hri_api.math', 'hri_api.query', 'hri_api.util'],
+    packages=['hri_api', 'hri_api.actions', 'hri_api.entities', 'hri_api.math', 'hri_api.query', 'hri_api.util', 'hri_api.benchmarks'],
     package_dir={'': 'src/'},
 )
 
+try:
+    from Cython.Build import cythonize
+    d['ext_modules'] = cythonize([Extension('hri_api.math._point', ['src/hri_api/math/_point.pyx'])])
+    d['cmdclass'] = {'build_ext': OptionalBuildExt}
+except ImportError:
+    pass
+
 setup(**d)
@@ -1,2 +1,4 @@
 from .action_client import *
 from .multi_goal_action_client import *
+
+from .action_handle_registry import *
\ No newline at end of file
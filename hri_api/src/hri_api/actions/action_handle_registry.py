@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+import itertools
+import threading
+
+
+class ActionHandleRegistry(object):
+    """ The action handles a Robot is running, indexed by the goal id of each handle's goal, or by a number given out
+        when the handle is added if it has no goal id. Adding, looking up and removing a handle are O(1).
+
+        Handles need goal_id() and is_done() methods. Handles whose done callbacks never arrive, e.g. goals that were
+        superseded or never waited on, are expired by sweep(), which drops those that report is_done(). add() sweeps
+        once as many handles have been added as were live after the last sweep (and at least sweep_interval), so the
+        cost of sweeping is O(1) per add().
+    """
+
+    def __init__(self, sweep_interval=32):
+        self.handles = {}
+        self.keys = {}
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.sweep_interval = sweep_interval
+        self.adds_until_sweep = sweep_interval
+        self.peak = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __contains__(self, handle):
+        return handle in self.keys
+
+    def add(self, handle):
+        with self.lock:
+            if handle in self.keys:
+                return
+
+            key = handle.goal_id()
+
+            if key is None:
+                key = next(self.counter)
+
+            self.handles[key] = handle
+            self.keys[handle] = key
+            self.peak = max(self.peak, len(self.handles))
+            self.adds_until_sweep -= 1
+
+            if self.adds_until_sweep <= 0:
+                self.__sweep()
+
+    def get(self, goal_id):
+        """ Return the handle of the goal with goal_id, or None """
+        return self.handles.get(goal_id)
+
+    def remove(self, handle):
+        with self.lock:
+            key = self.keys.pop(handle, None)
+
+            if key is not None:
+                del self.handles[key]
+
+    def sweep(self):
+        """ Remove the handles whose goals have finished and return how many there were """
+
+        with self.lock:
+            return self.__sweep()
+
+    def __sweep(self):
+        done = [(key, handle) for key, handle in self.handles.items() if handle.is_done()]
+
+        for key, handle in done:
+            del self.handles[key]
+            del self.keys[handle]
+
+        self.expired += len(done)
+        self.adds_until_sweep = max(self.sweep_interval, len(self.handles))
+        return len(done)
+
+    def live(self):
+        """ Gauge of the number of handles currently registered """
+        return len(self.handles)
+
+    def values(self):
+        with self.lock:
+            return list(self.handles.values())
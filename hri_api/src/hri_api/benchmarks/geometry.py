@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+""" Times the distance and relation (in front, behind, left, right) checks between N points and one reference point with each geometry backend:
+
+    python        a plain Python loop over (x, y, z) tuples
+    geom_math     a loop of scalar GeomMath calls on geometry_msgs Points
+    point         a loop of Point.distance_to calls, compiled if the extension was built
+    numpy         one GeomMath array call on an N x 3 array
+    point_array   one PointArray call
+
+Results are printed, or written to --output, as JSON.
+
+Usage: python -m hri_api.benchmarks.geometry [--sizes 1 10 100] [--min-time 0.2] [--output results.json]
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import timeit
+import numpy
+from geometry_msgs.msg import Point as PointMsg
+from hri_api.math import GeomMath, Point, PointArray, POINT_COMPILED
+
+
+SIZES = [1, 10, 100, 1000, 10000, 100000, 1000000]
+OPERATIONS = ['distance', 'infront', 'behind', 'left', 'right']
+
+
+def make_backends(n, rng):
+    """ Return {backend: {operation: callable}} for n random points, built outside of the timed calls """
+
+    rows = [(rng.uniform(-5.0, 5.0), rng.uniform(-5.0, 5.0), rng.uniform(0.0, 2.0)) for i in range(n)]
+    ref = (0.5, -0.5, 1.0)
+
+    msgs = [PointMsg(*row) for row in rows]
+    ref_msg = PointMsg(*ref)
+    points = [Point(*row) for row in rows]
+    ref_point = Point(*ref)
+    array = numpy.array(rows).reshape(-1, 3)
+    ref_array = numpy.array([ref])
+    point_array = PointArray(array)
+
+    def python_distance():
+        return [math.sqrt((x - ref[0]) ** 2 + (y - ref[1]) ** 2 + (z - ref[2]) ** 2) for x, y, z in rows]
+
+    return {
+        'python': {'distance': python_distance,
+                   'infront': lambda: [x >= ref[0] for x, y, z in rows],
+                   'behind': lambda: [x < ref[0] for x, y, z in rows],
+                   'left': lambda: [y >= ref[1] for x, y, z in rows],
+                   'right': lambda: [y < ref[1] for x, y, z in rows]},
+        'geom_math': {'distance': lambda: [GeomMath.distance_between(p, ref_msg) for p in msgs],
+                      'infront': lambda: [GeomMath.is_infront_of(p, ref_msg) for p in msgs],
+                      'behind': lambda: [GeomMath.is_behind(p, ref_msg) for p in msgs],
+                      'left': lambda: [GeomMath.is_left_of(p, ref_msg) for p in msgs],
+                      'right': lambda: [GeomMath.is_right_of(p, ref_msg) for p in msgs]},
+        'point': {'distance': lambda: [p.distance_to(ref_point) for p in points],
+                  'infront': lambda: [p.x >= ref_point.x for p in points],
+                  'behind': lambda: [p.x < ref_point.x for p in points],
+                  'left': lambda: [p.y >= ref_point.y for p in points],
+                  'right': lambda: [p.y < ref_point.y for p in points]},
+        'numpy': {'distance': lambda: GeomMath.distances_between(array, ref_array),
+                  'infront': lambda: GeomMath.are_infront_of(array, ref_array),
+                  'behind': lambda: GeomMath.are_behind(array, ref_array),
+                  'left': lambda: GeomMath.are_left_of(array, ref_array),
+                  'right': lambda: GeomMath.are_right_of(array, ref_array)},
+        'point_array': {'distance': lambda: point_array.distances_to(ref_point),
+                        'infront': lambda: point_array.x >= ref_point.x,
+                        'behind': lambda: point_array.x < ref_point.x,
+                        'left': lambda: point_array.y >= ref_point.y,
+                        'right': lambda: point_array.y < ref_point.y},
+    }
+
+
+def time_call(func, min_time):
+    """ Return (best seconds per call, number of calls), calling func until min_time seconds have been spent """
+
+    timer = timeit.default_timer
+    best = float('inf')
+    calls = 0
+    spent = 0.0
+
+    while spent < min_time or calls < 3:
+        start = timer()
+        func()
+        elapsed = timer() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        calls += 1
+
+    return best, calls
+
+
+def run(sizes=SIZES, backends=None, operations=OPERATIONS, min_time=0.2, seed=0):
+    rng = random.Random(seed)
+    results = []
+
+    for n in sizes:
+        available = make_backends(n, rng)
+
+        for backend in (backends or sorted(available.keys())):
+            for operation in operations:
+                seconds, calls = time_call(available[backend][operation], min_time)
+                results.append({'backend': backend, 'operation': operation, 'size': n, 'calls': calls,
+                                'seconds_per_call': seconds, 'seconds_per_point': seconds / n})
+
+    return {'python_version': platform.python_version(),
+            'numpy_version': numpy.__version__,
+            'point_compiled': POINT_COMPILED,
+            'min_time': min_time,
+            'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hri_api geometry backends.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--backends', nargs='+', default=None)
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to spend on each measurement')
+    parser.add_argument('--output', default=None, help='file to write the JSON results to, instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.backends, args.operations, args.min_time)
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,12 @@
 from .enumerations import *
 from .abstract_entity import *
 from .entity import *
+from .world_history import *
+from .world_events import *
+from .motion_predictor import *
+from .entity_pool import *
+from .world_federation import *
+from .spatial_relations import *
 from .world import *
 from .robot import *
 from .person import *
@@ -10,15 +10,23 @@ from rospy import ServiceProxy
 import actionlib
 import abc
 import math
-from hri_api.util import InitNode
+import threading
+import time
+from hri_api.util import InitNode, SharedTransformListener, PooledServiceClient
 from hri_api.actions import MultiGoalActionClient
 
 
 class Entity(AbstractEntity):
+    id_lock = threading.Lock()
+    id_epoch = None
+    last_id = 0
+    IDS_PER_EPOCH = 1000000
 
     def __init__(self, entity_type, tf_frame_prefix, parent):
         InitNode()
-        self.tl = tf.TransformListener()
+        self.entity_id = Entity.new_id()
+        self.tl = SharedTransformListener()
+        self.world = None
         self.entity_type = entity_type
         self.tf_frame_prefix = tf_frame_prefix
         self.parent = parent
@@ -41,8 +49,38 @@ class Entity(AbstractEntity):
     def set_visible(self, visible):
         self.visible = visible
 
+    def reset(self):
+        """ Return the entity to the state it was made in, so that it can be reused """
+        self.visible = True
+
+    @staticmethod
+    def new_id():
+        # Ids are numbered within an epoch, the time in milliseconds when this process started numbering them, so an id
+        # restored from a checkpoint written by an earlier process can't be one that this process has already given
+        # out, e.g. to a Robot made before the World was restored, or to the entities of another namespaced World
+        with Entity.id_lock:
+            if Entity.id_epoch is None or Entity.last_id + 1 >= Entity.IDS_PER_EPOCH:
+                Entity.id_epoch = max(int(time.time() * 1000), (Entity.id_epoch or 0) + 1)
+                Entity.last_id = 0
+
+            Entity.last_id += 1
+            return str(Entity.id_epoch * Entity.IDS_PER_EPOCH + Entity.last_id)
+
     def get_id(self):
-        return str(id(self))
+        return self.entity_id
+
+    def set_id(self, entity_id):
+        """ Give this entity an id it had before, e.g. in a World restored from a checkpoint """
+        self.entity_id = entity_id
+
+    def get_world(self):
+        """ Return the World this entity was added to, or the default World if it hasn't been added to one """
+
+        if self.world is None:
+            from hri_api.entities import World
+            return World()
+
+        return self.world
 
     def default_tf_frame_id(self):
         raise NotImplementedError("Please implement this method")
@@ -54,6 +92,8 @@ class Entity(AbstractEntity):
             return self.parent.tf_frame_id() + '_' + self.tf_frame_prefix
 
     def translation_to(self, target):
+        """ Return the position of 'target' relative to 'self', along the axes of self's tf frame """
+
         if not isinstance(target, AbstractEntity):
             raise TypeError("translation_to() parameter target={0} is not a subclass of AbstractEntity".format(target))
 
@@ -66,54 +106,191 @@ class Entity(AbstractEntity):
 
         return point
 
+    def predicted_position(self, target, lookahead=0.0):
+        """ Return where 'target' will be relative to 'self' in lookahead seconds, extrapolated from the World's motion
+            predictor without a transform lookup. Unlike translation_to(), the position is always along the axes of
+            the World's reference frame. Entities the predictor doesn't know, e.g. the robot, are taken to be at its
+            origin. Returns None if the predictor doesn't know target.
+        """
+
+        if not isinstance(target, AbstractEntity):
+            raise TypeError("predicted_position() parameter target={0} is not a subclass of AbstractEntity".format(target))
+
+        predictor = self.get_world().predictor
+        stamp = rospy.get_time() + lookahead
+        target_position = predictor.predict(target.get_id(), stamp)
+
+        if target_position is None:
+            return None
+
+        if self.get_id() in predictor:
+            self_position = predictor.predict(self.get_id(), stamp)
+
+            if self_position is None:
+                return None
+
+            target_position = target_position - self_position
+
+        return Point(target_position[0], target_position[1], target_position[2])
+
+    def relation_table(self, other_entity):
+        """ Return the World's spatial relation table if it is fresh, otherwise None """
+
+        world = self.world
+
+        if world is None:
+            world = getattr(other_entity, 'world', None)
+
+        if world is None or world.relations is None or world.relations.age(rospy.get_time()) > world.relations_max_age:
+            return None
+
+        return world.relations
+
+    def relation_row(self, other_entity, symmetric=False):
+        """ Return (table, row) where row is other_entity's row in the World's spatial relation table, or (table, None)
+            if the relations from self to other_entity can't be read from it. They can when the table is fresh and self
+            is at the table's reference frame, or, for symmetric relations like distance, when other_entity is.
+        """
+
+        table = self.relation_table(other_entity)
+
+        if table is None:
+            return None, None
+
+        if self.has_tf_frame(table.reference_frame):
+            return table, table.index(other_entity.get_id())
+
+        if symmetric and isinstance(other_entity, Entity) and other_entity.has_tf_frame(table.reference_frame):
+            return table, table.index(self.get_id())
+
+        return table, None
+
+    def relation_key(self, table):
+        """ Return the key of this entity in relation table: its id, or the reference frame if it is at it """
+
+        if self.has_tf_frame(table.reference_frame):
+            return table.reference_frame
+        return self.get_id()
+
+    def relative_translation_to(self, other_entity):
+        """ Return the position of other_entity relative to self. It is worked out from the World's spatial relation
+            table when both are in it, e.g. where the robot is relative to a person, and looked up otherwise.
+        """
+
+        table = self.relation_table(other_entity)
+
+        if table is not None and isinstance(other_entity, Entity):
+            position = table.relative_position(self.relation_key(table), other_entity.relation_key(table))
+
+            if position is not None:
+                return Point(position[0], position[1], position[2])
+
+        return self.translation_to(other_entity)
+
+    def has_tf_frame(self, tf_frame):
+        try:
+            return self.default_tf_frame_id() == tf_frame
+        except NotImplementedError:
+            return False
+
     def is_infront_of(self, other_entity):
         if not isinstance(other_entity, AbstractEntity):
             raise TypeError("is_infront_of() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
 
+        table, i = self.relation_row(other_entity)
+
+        if i is not None:
+            return bool(table.infront[i])
+
         origin = Point()
-        other = self.translation_to(other_entity)
+        other = self.relative_translation_to(other_entity)
         return GeomMath.is_infront_of(other, origin)
 
     def is_behind(self, other_entity):
         if not isinstance(other_entity, AbstractEntity):
             raise TypeError("is_behind() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
 
+        table, i = self.relation_row(other_entity)
+
+        if i is not None:
+            return bool(table.behind[i])
+
         origin = Point()
-        other = self.translation_to(other_entity)
+        other = self.relative_translation_to(other_entity)
         return GeomMath.is_behind(other, origin)
 
     def is_left_of(self, other_entity):
         if not isinstance(other_entity, AbstractEntity):
             raise TypeError("is_behind() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
 
+        table, i = self.relation_row(other_entity)
+
+        if i is not None:
+            return bool(table.left[i])
+
         origin = Point()
-        other = self.translation_to(other_entity)
+        other = self.relative_translation_to(other_entity)
         return GeomMath.is_left_of(other, origin)
 
     def is_right_of(self, other_entity):
         if not isinstance(other_entity, AbstractEntity):
             raise TypeError("is_right_of() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
 
+        table, i = self.relation_row(other_entity)
+
+        if i is not None:
+            return bool(table.right[i])
+
         origin = Point()
-        other = self.translation_to(other_entity)
+        other = self.relative_translation_to(other_entity)
         return GeomMath.is_right_of(other, origin)
 
     def distance_to(self, other_entity):
         if not isinstance(other_entity, AbstractEntity):
             raise TypeError("distance_to() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
 
+        table, i = self.relation_row(other_entity, symmetric=True)
+
+        if i is not None:
+            return float(table.distances[i])
+
         origin = Point()
-        other = self.translation_to(other_entity)
+        other = self.relative_translation_to(other_entity)
         return GeomMath.distance_between(origin, other)
 
     def velocity(self, other_entity):
-        return 0.1
+        """ Return how fast the distance between 'self' and 'other_entity' is changing (m/s), estimated from the
+            World history. Negative values mean the entities are approaching each other. Entities that the World
+            doesn't track, e.g. the robot, are taken to be at the origin of the World's reference frame.
+        """
+
+        if not isinstance(other_entity, AbstractEntity):
+            raise TypeError("velocity() parameter other_entity={0} is not a subclass of AbstractEntity".format(other_entity))
+
+        history = self.get_world().history
+        self_id = self.get_id()
+        other_id = other_entity.get_id()
+        self_tracked = self_id in history.slot_lookup
+        other_tracked = other_id in history.slot_lookup
+
+        if self_tracked and other_tracked:
+            rate = history.relative_range_rate(self_id, other_id)
+        elif other_tracked:
+            rate = history.range_rates().get(other_id)
+        elif self_tracked:
+            rate = history.range_rates().get(self_id)
+        else:
+            rate = None
+
+        if rate is None:
+            return 0.0
+        return rate
 
     @staticmethod
     def wait_for_services(*services):
         for i, service in enumerate(services):
-            if not isinstance(service, ServiceProxy):
-                raise TypeError("wait_for_services() parameter action_servers[{0}]={1} is not a ServiceProxy".format(i, service))
+            if not isinstance(service, (ServiceProxy, PooledServiceClient)):
+                raise TypeError("wait_for_services() parameter services[{0}]={1} is not a ServiceProxy or PooledServiceClient".format(i, service))
 
             rospy.loginfo("Waiting for service: %s", service.resolved_name)
             service.wait_for_service()
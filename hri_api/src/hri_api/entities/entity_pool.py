@@ -0,0 +1,101 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import threading
+
+
+class EntityPool(object):
+    """ The live entity instance of each (class, local_id).
+
+        Trackers reuse local ids, and perception sources re-send add_entity when they aren't sure the World has an
+        entity, so the same key is often acquired many times while its entity is still in the World. acquire() hands
+        back the instance already made for the key instead of building a new entity and its body parts each time.
+
+        Released instances are never handed out again: behaviours, queries and action servers may still hold them, and
+        must not find that they have become somebody else. release() retires the instance instead, keeping its id and
+        making it invisible, and the next acquire() of its key builds a new entity.
+    """
+
+    def __init__(self):
+        self.live = {}
+        self.keys = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def acquire(self, entity_cls, local_id, entity_id=None):
+        """ Return the entity for (entity_cls, local_id), giving a newly made entity entity_id if one is given """
+
+        key = (entity_cls, local_id)
+
+        with self.lock:
+            entity = self.live.get(key)
+
+            if entity is not None and (entity_id is None or entity.get_id() == entity_id):
+                self.hits += 1
+                entity.reset()
+                return entity
+
+            if entity is not None:
+                self.retire(entity)
+
+            self.misses += 1
+            entity = entity_cls.make(local_id)
+
+            if entity_id is not None:
+                entity.set_id(entity_id)
+
+            self.live[key] = entity
+            self.keys[entity.get_id()] = key
+            return entity
+
+    def release(self, entity):
+        """ Retire an entity that has been removed from the World """
+
+        with self.lock:
+            key = self.keys.get(entity.get_id())
+
+            if key is None or self.live.get(key) is not entity:
+                return
+
+            self.retire(entity)
+
+    def retire(self, entity):
+        key = self.keys.pop(entity.get_id())
+        del self.live[key]
+        entity.set_visible(False)
+
+    def hit_rate(self):
+        """ Return the fraction of acquire() calls that reused an instance """
+
+        total = self.hits + self.misses
+
+        if total == 0:
+            return 0.0
+        return float(self.hits) / total
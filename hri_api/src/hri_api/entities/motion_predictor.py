@@ -0,0 +1,182 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import threading
+import numpy
+
+
+class MotionPredictor(object):
+    """ Constant velocity Kalman filter over the positions of many entities.
+
+        Observations arrive in batches, e.g. one World tick or one perception message, and are filtered for all
+        entities at once. Between observations predict() extrapolates from the cached state, so callers that run
+        faster than perception don't need a fresh transform lookup.
+    """
+
+    def __init__(self, process_noise=1.0, measurement_noise=0.01, max_age=1.0):
+        """
+        :param process_noise: spectral density of the acceleration noise (m^2/s^3)
+        :param measurement_noise: variance of a position observation (m^2)
+        :param max_age: seconds after the last observation at which an entity's prediction is no longer trusted
+        """
+
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_age = max_age
+        self.lock = threading.RLock()
+
+        self.index_lookup = {}
+        self.entity_ids = []
+        self.stamps = numpy.zeros(0)
+        self.positions = numpy.zeros((0, 3))
+        self.velocities = numpy.zeros((0, 3))
+        self.covariances = numpy.zeros((0, 2, 2))
+
+    def __contains__(self, entity_id):
+        return entity_id in self.index_lookup
+
+    def update(self, stamp, entity_ids, positions):
+        """ Filter a batch of observations made at stamp.
+
+        :param stamp: time of the observations in seconds
+        :param entity_ids: ids of the observed entities
+        :param positions: N x 3 observed positions, in the same order as entity_ids
+        """
+
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+
+        if len(entity_ids) != len(positions):
+            raise ValueError("update() parameter entity_ids has {0} ids but positions has {1} rows".format(len(entity_ids), len(positions)))
+
+        with self.lock:
+            known = []
+            known_positions = []
+            new_ids = []
+            new_positions = []
+
+            for entity_id, position in zip(entity_ids, positions):
+                if entity_id in self.index_lookup:
+                    known.append(self.index_lookup[entity_id])
+                    known_positions.append(position)
+                else:
+                    new_ids.append(entity_id)
+                    new_positions.append(position)
+
+            if len(known) > 0:
+                self.correct(stamp, numpy.array(known), numpy.array(known_positions))
+
+            if len(new_ids) > 0:
+                self.add(stamp, new_ids, numpy.array(new_positions))
+
+    def add(self, stamp, entity_ids, positions):
+        n = len(entity_ids)
+        first = len(self.entity_ids)
+
+        for i, entity_id in enumerate(entity_ids):
+            self.index_lookup[entity_id] = first + i
+
+        # New entities start at rest, with a velocity variance wide enough for a walking person
+        covariance = numpy.array([[self.measurement_noise, 0.0], [0.0, 1.0]])
+        self.entity_ids.extend(entity_ids)
+        self.stamps = numpy.concatenate([self.stamps, numpy.full(n, float(stamp))])
+        self.positions = numpy.concatenate([self.positions, positions])
+        self.velocities = numpy.concatenate([self.velocities, numpy.zeros((n, 3))])
+        self.covariances = numpy.concatenate([self.covariances, numpy.tile(covariance, (n, 1, 1))])
+
+    def correct(self, stamp, indices, positions):
+        dt = numpy.maximum(stamp - self.stamps[indices], 0.0)
+        q = self.process_noise
+        P = self.covariances[indices]
+
+        # Predict: x = F x, P = F P F^T + Q, with the same 2x2 covariance shared by the x, y and z axes
+        predicted = self.positions[indices] + self.velocities[indices] * dt[:, None]
+        p00 = P[:, 0, 0] + dt * (P[:, 0, 1] + P[:, 1, 0]) + dt * dt * P[:, 1, 1] + q * dt ** 3 / 3.0
+        p01 = P[:, 0, 1] + dt * P[:, 1, 1] + q * dt ** 2 / 2.0
+        p11 = P[:, 1, 1] + q * dt
+
+        # Correct with a position only observation
+        s = p00 + self.measurement_noise
+        k0 = p00 / s
+        k1 = p01 / s
+        residuals = positions - predicted
+
+        self.positions[indices] = predicted + k0[:, None] * residuals
+        self.velocities[indices] += k1[:, None] * residuals
+        self.covariances[indices, 0, 0] = (1.0 - k0) * p00
+        self.covariances[indices, 0, 1] = (1.0 - k0) * p01
+        self.covariances[indices, 1, 0] = (1.0 - k0) * p01
+        self.covariances[indices, 1, 1] = p11 - k1 * p01
+        self.stamps[indices] = stamp
+
+    def remove(self, entity_id):
+        with self.lock:
+            if entity_id not in self.index_lookup:
+                return
+
+            keep = numpy.ones(len(self.entity_ids), dtype=bool)
+            keep[self.index_lookup[entity_id]] = False
+            self.entity_ids = [e for e in self.entity_ids if e != entity_id]
+            self.index_lookup = dict((e, i) for i, e in enumerate(self.entity_ids))
+            self.stamps = self.stamps[keep]
+            self.positions = self.positions[keep]
+            self.velocities = self.velocities[keep]
+            self.covariances = self.covariances[keep]
+
+    def last_update(self, entity_id):
+        """ Return the stamp of the last observation of entity_id, or None if it hasn't been observed """
+
+        with self.lock:
+            if entity_id not in self.index_lookup:
+                return None
+            return self.stamps[self.index_lookup[entity_id]]
+
+    def predict(self, entity_id, stamp):
+        """ Return the predicted position of entity_id at stamp as a length 3 array, or None if the entity hasn't
+            been observed or its last observation is older than max_age.
+        """
+
+        with self.lock:
+            if entity_id not in self.index_lookup:
+                return None
+
+            i = self.index_lookup[entity_id]
+
+            if stamp - self.stamps[i] > self.max_age:
+                return None
+
+            return self.positions[i] + self.velocities[i] * max(stamp - self.stamps[i], 0.0)
+
+    def predict_all(self, stamp):
+        """ Return (entity_ids, positions) predicted at stamp for every entity whose state is still trusted """
+
+        with self.lock:
+            dt = stamp - self.stamps
+            fresh = dt <= self.max_age
+            positions = self.positions[fresh] + self.velocities[fresh] * numpy.maximum(dt[fresh], 0.0)[:, None]
+            return [e for e, f in zip(self.entity_ids, fresh) if f], positions
@@ -28,11 +28,14 @@
 
 from hri_api.entities import Entity
 from hri_msgs.msg import EntityMsg
+import numpy
+import tf
 
 
 #World().add_create_entity_callback(Person.create_person)
 class Person(Entity):
     ENTITY_TYPE = 'person'
+    JOINTS = ('head', 'neck', 'torso', 'left_hand', 'right_hand')
 
     def __init__(self, local_id):
         Entity.__init__(self, Person.ENTITY_TYPE, Person.ENTITY_TYPE + str(local_id), None)
@@ -56,9 +59,54 @@ class Person(Entity):
     def make(cls, local_id):
         return Person(local_id)
 
+    def reset(self):
+        Entity.reset(self)
+
+        for joint in Person.JOINTS:
+            getattr(self, joint).reset()
+
     def default_tf_frame_id(self):
         return self.head.tf_frame_id()
 
+    def skeleton_pose(self, reference):
+        """ Return a len(Person.JOINTS) x 3 array of the position of each joint relative to reference, an Entity or a
+            tf frame id. Every joint is resolved at the latest time for which all of them are known, so the pose is a
+            consistent snapshot even when some joints are published behind others. Rows of joints that tf doesn't
+            know are NaN.
+        """
+
+        if isinstance(reference, Entity):
+            reference_frame = reference.default_tf_frame_id()
+        else:
+            reference_frame = reference
+
+        pose = numpy.full((len(Person.JOINTS), 3), numpy.nan)
+        frames = []
+        stamps = []
+
+        for i, joint in enumerate(Person.JOINTS):
+            frame = getattr(self, joint).tf_frame_id()
+
+            try:
+                stamps.append(self.tl.getLatestCommonTime(reference_frame, frame))
+                frames.append((i, frame))
+            except tf.Exception:
+                pass
+
+        if len(stamps) == 0:
+            return pose
+
+        stamp = min(stamps)
+
+        for i, frame in frames:
+            try:
+                (trans, rot) = self.tl.lookupTransform(reference_frame, frame, stamp)
+                pose[i] = trans
+            except (tf.LookupException, tf.ConnectivityException, tf.ExtrapolationException):
+                pass
+
+        return pose
+
     def said_to(self, interlocutor, start_time, end_time):
         pass
 
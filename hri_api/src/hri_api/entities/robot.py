@@ -27,19 +27,20 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from hri_msgs.msg import GestureAction, GestureGoal, ExpressionAction, TargetGoal, ExpressionGoal, TargetAction
-from hri_msgs.srv import TextToSpeechSubsentenceDuration
+from hri_msgs.srv import TextToSpeechWordTimings
 import rospy
 from .entity import Entity
 from hri_api.entities import World
 import actionlib
 import threading
-from hri_api.actions import MultiGoalActionClient
+from hri_api.actions import MultiGoalActionClient, ActionHandleRegistry
 from hri_api.entities import IGesture, IExpression
 from hri_msgs.msg import TextToSpeechAction, TextToSpeechGoal
 from hri_api.util import *
 import abc
 from hri_api.query import Query
 from actionlib import ClientGoalHandle
+from actionlib.action_client import CommState
 import random
 from enum import Enum
 import re
@@ -67,11 +68,24 @@ class IActionHandle():
         :return:
         """
 
+    def goal_id(self):
+        """ The id of this handle's goal, or None if it hasn't got one """
+        return None
+
+    def is_done(self):
+        """ True once this handle's goal has finished, or been replaced by another goal """
+        return False
+
+    @staticmethod
+    def goal_handle_finished(goal_handle):
+        return goal_handle is None or goal_handle.get_comm_state() in (CommState.DONE, CommState.LOST)
+
 
 class SingleGoalActionHandle(IActionHandle):
     def __init__(self, action_client):
         IActionHandle.__init__(self)
         self.action_client = action_client
+        self.goal_handle = action_client.gh
 
     def cancel_action(self):
         self.action_client.cancel_goal()
@@ -79,6 +93,10 @@ class SingleGoalActionHandle(IActionHandle):
     def wait_for_result(self):
         self.action_client.wait_for_result()
 
+    def is_done(self):
+        # A SimpleActionClient stops tracking its previous goal when it is sent a new one
+        return self.action_client.gh is not self.goal_handle or IActionHandle.goal_handle_finished(self.goal_handle)
+
 
 class MultiGoalActionHandle(IActionHandle):
     def __init__(self, action_client, goal_handle):
@@ -92,12 +110,23 @@ class MultiGoalActionHandle(IActionHandle):
     def wait_for_result(self):
         self.action_client.wait_for_result(self.goal_handle)
 
+    def goal_id(self):
+        return MultiGoalActionHandle.goal_id_of(self.goal_handle)
+
+    def is_done(self):
+        return IActionHandle.goal_handle_finished(self.goal_handle)
+
+    @staticmethod
+    def goal_id_of(goal_handle):
+        return goal_handle.comm_state_machine.action_goal.goal_id.id
+
 
 class SayToActionHandle(IActionHandle):
 
     def __init__(self, say_to_plan):
         IActionHandle.__init__(self)
         self.say_to_plan = say_to_plan
+        self.thread = say_to_plan.thread
 
     def cancel_action(self):
         self.say_to_plan.cancel()
@@ -105,14 +134,26 @@ class SayToActionHandle(IActionHandle):
     def wait_for_result(self):
         self.say_to_plan.wait()
 
+    def is_done(self):
+        if self.thread.is_alive():
+            return False
+
+        # The plan is reused by the robot's next say_to
+        if self.say_to_plan.thread is not self.thread:
+            return True
+
+        say_ah = self.say_to_plan.say_ah
+        return say_ah is None or say_ah.is_done()
+
 
 class SayToPlan():
     valid_words_regex = "\w+[']{0,1}\w*[!?,.]{0,1}"
     punctuation = "[' ']"
     spaces = "[,.]"
 
-    def __init__(self, robot):
+    def __init__(self, robot, cache_size=256):
         self.robot = robot
+        self.compiled_plans = LRUCache(cache_size)
         self.audience = None
         self.current_gazee = None
         self.sentence = ''
@@ -212,25 +253,39 @@ class SayToPlan():
 
     @staticmethod
     def num_words(text):
-        return len(re.findall(SayToPlan.valid_words_regex, text))
+        return num_words(text)
 
     @staticmethod
     def get_sentence(text):
+        return SayToPlan.split(text)[0]
+
+    @staticmethod
+    def split(text):
+        """ Parse marked up text once and return (sentence, tags), where tags is a list of (tag, attributes,
+            start_word_i, end_word_i) for each expression or gesture tag, end_word_i being exclusive.
+        """
+
         tree = ET.fromstring("<sayto>" + text + "</sayto>")
-        text = ""
+        chunks = []
+        tags = []
+        num_words = 0
 
         for node in tree.iter():
-            if node.tag == "sayto":
-                if node.text is not None:
-                    text += node.text + " "
-            else:
-                if node.text is not None:
-                    text += node.text + " "
+            start_word_i = num_words
+
+            if node.text is not None:
+                chunks.append(node.text)
+                num_words += SayToPlan.num_words(node.text)
+
+            if node.tag != "sayto":
+                tags.append((node.tag, node.attrib, start_word_i, num_words))
 
                 if node.tail is not None:
-                    text += node.text + " "
+                    chunks.append(node.tail)
+                    num_words += SayToPlan.num_words(node.tail)
 
-        return text.strip()
+        sentence = " ".join(chunk.strip() for chunk in chunks if chunk.strip() != "")
+        return sentence, tags
 
     @staticmethod
     def enum_contains(enum, name):
@@ -240,96 +295,126 @@ class SayToPlan():
 
         return False
 
-    def parse_parameters(self, text, audience, expression_enum, gesture_enum, tts_duration_srv):
-        self.reset()
-        self.audience = audience
+    @staticmethod
+    def duration(timings, start_word_i, end_word_i):
+        """ Return how long words start_word_i up to, but not including, end_word_i take to say, given a
+            TextToSpeechWordTimings response
+        """
 
-        ParamFormatting.assert_types(self.parse_parameters, text, str)
-        ParamFormatting.assert_types(self.parse_parameters, audience, Entity, Query)
+        end_word_i = min(end_word_i, len(timings.word_ends))
 
-        # if not is_callable(tts_duration_srv):
-        #     raise TypeError("parse_parameters() parameter tts_duration_srv={0} is not callable".format(tts_duration_srv))
+        if end_word_i <= start_word_i:
+            return 0.0
+        return timings.word_ends[end_word_i - 1] - timings.word_starts[start_word_i]
 
-        self.sentence = SayToPlan.get_sentence(text)  # Get sentence
-        self.gaze_change_locations = SayToPlan.get_gaze_change_locations(self.sentence)
+    @staticmethod
+    def compile(text, expression_enum, gesture_enum, tts_word_timings_srv):
+        """ Turn marked up text into a CompiledSayTo. The word timings are fetched with one call for the whole
+            sentence, and only if the text has tags.
+        """
 
-        # Get expressions and gestures
-        xml_tree = ET.fromstring("<sayto>" + text + "</sayto>")
-        seen_text = ''
+        sentence, tags = SayToPlan.split(text)
+        timings = None
 
-        for node in xml_tree.iter():
-            if node.tag == "sayto":
-                if node.text is not None:
-                    seen_text += node.text + " "
-            else:
-                start_word_i = SayToPlan.num_words(seen_text)
+        if len(tags) > 0:
+            timings = tts_word_timings_srv(sentence)
 
-                if node.text is not None:
-                    seen_text += node.text + " "
+        expression_names = set(e.name for e in expression_enum)
+        gesture_names = set(e.name for e in gesture_enum)
+        expression_lookup = {}
+        gesture_lookup = {}
 
-                end_word_i = SayToPlan.num_words(seen_text)
+        for goal_name, attributes, start_word_i, end_word_i in tags:
+            if goal_name in expression_names:
+                goal = ExpressionGoal()
+                goal.expression = goal_name
+                goal.intensity = 0.5
+                goal.speed = 0.5
 
-                goal_name = node.tag
+                if 'intensity' in attributes:
+                    goal.intensity = float(attributes["intensity"])
 
-                if SayToPlan.enum_contains(expression_enum, goal_name):
-                    goal = ExpressionGoal()
-                    goal.expression = goal_name
-                    goal.intensity = 0.5
-                    goal.speed = 0.5
+                if 'speed' in attributes:
+                    goal.speed = float(attributes["speed"])
 
-                    if 'intensity' in node.attrib:
-                        goal.intensity = float(node.attrib["intensity"])
+                goal.duration = SayToPlan.duration(timings, start_word_i, end_word_i)
+                expression_lookup[start_word_i] = goal
 
-                    if 'speed' in node.attrib:
-                        goal.speed = float(node.attrib["speed"])
+            elif goal_name in gesture_names:
+                goal = GestureGoal()
+                goal.gesture = goal_name
 
-                    goal.duration = tts_duration_srv(self.sentence, start_word_i, end_word_i).duration
-                    self.expression_lookup[start_word_i] = goal
+                if 'target' in attributes:     # Check if target is Entity
+                    goal.target = attributes["target"]
+                else:
+                    raise AttributeError('Please specify a target attribute for {0} gesture'.format(goal_name))
 
-                elif SayToPlan.enum_contains(gesture_enum, goal_name):
-                    goal = GestureGoal()
-                    goal.gesture = goal_name
+                goal.duration = SayToPlan.duration(timings, start_word_i, end_word_i)
+                gesture_lookup[start_word_i] = goal
 
-                    if 'target' in node.attrib:     # Check if target is Entity
-                        goal.target = node.attrib["target"]
-                    else:
-                        raise AttributeError('Please specify a target attribute for {0} gesture'.format(goal_name))
+            else:
+                raise TypeError('No gesture or expression called: {0}'.format(goal_name))
 
-                    goal.duration = tts_duration_srv(self.sentence, start_word_i, end_word_i).duration
-                    self.gesture_lookup[start_word_i] = goal
+        return CompiledSayTo(sentence, SayToPlan.get_gaze_change_locations(sentence), expression_lookup, gesture_lookup)
 
-                else:
-                    raise TypeError('No gesture or expression called: {0}'.format(goal_name))
+    @validate(text=is_a(str), audience=is_a(Entity, Query))
+    def parse_parameters(self, text, audience, expression_enum, gesture_enum, tts_word_timings_srv):
+        self.reset()
+        self.audience = audience
 
-                if node.tail is not None:
-                    seen_text += node.tail + " "
+        # Robots repeat the same lines, so compiled plans are kept, with the durations already fetched from the TTS
+        key = (text, expression_enum, gesture_enum)
+        compiled = self.compiled_plans.get_or_create(key, lambda: SayToPlan.compile(text, expression_enum, gesture_enum, tts_word_timings_srv))
+
+        self.sentence = compiled.sentence
+        self.gaze_change_locations = compiled.gaze_change_locations
+        self.expression_lookup = compiled.expression_lookup
+        self.gesture_lookup = compiled.gesture_lookup
+
+
+class CompiledSayTo():
+    """ What SayToPlan needs to perform a line of marked up text, worked out once per line. Treat it as read only: it
+        is shared by every performance of the line.
+    """
+
+    def __init__(self, sentence, gaze_change_locations, expression_lookup, gesture_lookup):
+        self.sentence = sentence
+        self.gaze_change_locations = gaze_change_locations
+        self.expression_lookup = expression_lookup
+        self.gesture_lookup = gesture_lookup
 
 
 class Robot(Entity):
     ENTITY_TYPE = 'robot'
 
-    def __init__(self, expression_enum, gesture_enum):
-        Entity.__init__(self, Robot.ENTITY_TYPE, Robot.ENTITY_TYPE + str(1), None)
+    def __init__(self, expression_enum, gesture_enum, namespace='', robot_id=1):
+        """ A robot whose action servers live under namespace. Several robots can be controlled from one process by
+        giving each its own namespace and robot_id; each robot then has its own World, which is created the first
+        time it is needed, e.g. by gaze() or gesture(), as it waits for the World's services.
+        """
+
+        Entity.__init__(self, Robot.ENTITY_TYPE, Robot.ENTITY_TYPE + str(robot_id), None)
         self.expression_enum = expression_enum
         self.gesture_enum = gesture_enum
+        self.namespace = namespace
 
-        self.gaze_client = actionlib.SimpleActionClient('gaze', TargetAction)
+        self.gaze_client = actionlib.SimpleActionClient(self.resolve('gaze'), TargetAction)
         self.gaze_found = False
 
-        self.expression_client = MultiGoalActionClient('expression', ExpressionAction)
+        self.expression_client = MultiGoalActionClient(self.resolve('expression'), ExpressionAction)
         self.expression_found = False
 
-        self.tts_client = actionlib.SimpleActionClient('text_to_speech', TextToSpeechAction)
+        self.tts_client = actionlib.SimpleActionClient(self.resolve('text_to_speech'), TextToSpeechAction)
         self.tts_found = False
 
-        self.gesture_client = MultiGoalActionClient('gesture', GestureAction)
+        self.gesture_client = MultiGoalActionClient(self.resolve('gesture'), GestureAction)
         self.gesture_found = False
 
-        self.tts_duration_srv = rospy.ServiceProxy('tts_subsentence_duration', TextToSpeechSubsentenceDuration)
-        self.tts_duration_found = False
+        self.tts_word_timings_srv = ServiceClientPool().get(self.resolve('tts_word_timings'), TextToSpeechWordTimings)
+        self.tts_word_timings_found = False
 
         self.event = None
-        self.action_handles = []
+        self.action_handles = ActionHandleRegistry()
         self.say_to_plan = SayToPlan(self)
         self.gaze_ah = None
         self.say_ah = None
@@ -338,9 +423,21 @@ class Robot(Entity):
         self.listen_cb = None
         self.listen_sub = None
 
+    def resolve(self, name):
+        """ Return name within this robot's namespace """
+        return rospy.names.ns_join(self.namespace, name)
+
+    def get_world(self):
+        """ Return the World of this robot's namespace, creating it on first use """
+
+        if self.world is None:
+            self.world = World(self.namespace)
+
+        return self.world
+
     def register_listen_callback(self, callback):
         self.listen_cb = callback
-        self.listen_sub = rospy.Subscriber("itf_listen", String, self.__listen, queue_size=10)
+        self.listen_sub = rospy.Subscriber(self.resolve("itf_listen"), String, self.__listen, queue_size=10)
 
     def __listen(self, msg):
 
@@ -352,12 +449,12 @@ class Robot(Entity):
         self.listen_cb(text)
 
     # Text to speech
+    @validate(text=is_a(str))
     def say(self, text):
         if not self.tts_found:
             self.wait_for_action_servers(self.tts_client)
             self.tts_found = True
 
-        ParamFormatting.assert_types(self.say, text, str)
         goal = TextToSpeechGoal()
         goal.sentence = text
         self.tts_client.send_goal(goal, feedback_cb=self.say_feedback, done_cb=self.say_done)
@@ -376,16 +473,13 @@ class Robot(Entity):
             self.say_ah = None
 
     # Gaze
+    @validate(target=is_a(Entity), speed=all_of(is_a(float), in_range(0.0, 1.0)))
     def gaze(self, target, speed=0.5):
         if not self.gaze_found:
             self.wait_for_action_servers(self.gaze_client)
             self.gaze_found = True
 
-        ParamFormatting.assert_types(self.gaze, target, Entity)
-        ParamFormatting.assert_types(self.gaze, speed, float)
-        ParamFormatting.assert_range(self.gaze, speed, 0.0, 1.0)
-
-        World().add_to_world(target)
+        self.get_world().add_to_world(target)
         goal = TargetGoal()
         goal.target = target.get_id()
         goal.speed = speed
@@ -420,35 +514,31 @@ class Robot(Entity):
         raise NotImplementedError("Please implement the blink method")
 
     # Facial expressions
+    @validate(expression=is_a(IExpression),
+              intensity=optional(all_of(is_a(float), in_range(0.0, 1.0))),
+              speed=optional(all_of(is_a(float), in_range(0.0, 1.0))),
+              duration=optional(all_of(is_a(float), greater_than(0.0))))
     def expression(self, expression, intensity=None, speed=None, duration=None):
         if not self.expression_found:
             self.wait_for_action_servers(self.expression_client)
             self.expression_found = True
 
-        ParamFormatting.assert_types(self.expression, expression, IExpression)
-
         goal = ExpressionGoal()
         goal.expression = expression.name
 
         if intensity is None:
             goal.intensity = -1
         else:
-            ParamFormatting.assert_types(self.expression, intensity, float)
-            ParamFormatting.assert_range(self.expression, intensity, 0.0, 1.0)
             goal.intensity = intensity
 
         if speed is None:
             goal.speed = -1
         else:
-            ParamFormatting.assert_types(self.expression, speed, float)
-            ParamFormatting.assert_range(self.expression, speed, 0.0, 1.0)
             goal.speed = speed
 
         if duration is None:
             goal.duration = -1
         else:
-            ParamFormatting.assert_types(self.expression, duration, float)
-            ParamFormatting.assert_greater_than(self.expression, duration, 0.0)
             goal.duration = duration
 
         gh = self.expression_client.send_goal(goal, done_cb=self.expression_done)
@@ -466,28 +556,24 @@ class Robot(Entity):
             self.remove_action_handle(ah)
 
     # Gestures
+    @validate(gesture=is_a(IGesture), target=optional(is_a(Entity)), duration=optional(all_of(is_a(float), greater_than(0.0))))
     def gesture(self, gesture, target=None, duration=None):
         if not self.gesture_found:
             self.wait_for_action_servers(self.gesture_client)
             self.gesture_found = True
 
-        ParamFormatting.assert_types(self.gesture, gesture, IGesture)
-
         goal = GestureGoal()
         goal.gesture = gesture.name
 
         if target is None:
             goal.target = ''
         else:
-            World().add_to_world(target)
-            ParamFormatting.assert_types(self.gesture, target, Entity)
+            self.get_world().add_to_world(target)
             goal.target = target.get_id()
 
         if duration is None:
             goal.duration = -1
         else:
-            ParamFormatting.assert_types(self.expression, duration, float)
-            ParamFormatting.assert_greater_than(self.expression, duration, 0.0)
             goal.duration = duration
 
         gh = self.gesture_client.send_goal(goal, done_cb=self.gesture_done)
@@ -506,15 +592,13 @@ class Robot(Entity):
             self.remove_action_handle(ah)
 
     # Speaking, gazing and gesturing simultaneously
+    @validate(text=is_a(str), audience=is_a(Entity, Query, list))
     def say_to(self, text, audience):
-        if not self.tts_duration_found:
-            self.wait_for_services(self.tts_duration_srv)
-            self.tts_duration_found = True
-
-        ParamFormatting.assert_types(self.say_to, text, str)
-        ParamFormatting.assert_types(self.say_to, audience, Entity, Query, list)
+        if not self.tts_word_timings_found:
+            self.wait_for_services(self.tts_word_timings_srv)
+            self.tts_word_timings_found = True
 
-        self.say_to_plan.parse_parameters(text, audience, self.expression_enum, self.gesture_enum, self.tts_duration_srv)
+        self.say_to_plan.parse_parameters(text, audience, self.expression_enum, self.gesture_enum, self.tts_word_timings_srv)
 
         ah = self.say_to_plan.execute()
         self.add_action_handle(ah)
@@ -556,23 +640,21 @@ class Robot(Entity):
             ahs = self.do(gesture)
             self.say_to_plan.add_action_handle(ahs[0])
 
+    @validate(action_handle=is_a(IActionHandle))
     def add_action_handle(self, action_handle):
-        with self.lock:
-            ParamFormatting.assert_types(self.add_action_handle, action_handle, IActionHandle)
-            self.action_handles.append(action_handle)
+        self.action_handles.add(action_handle)
 
     def get_action_handle(self, goal_handle):
-        with self.lock:
-            for ah in self.action_handles:
-                if isinstance(ah, MultiGoalActionHandle):
-                    if ah.goal_handle == goal_handle:
-                        return ah
+        return self.action_handles.get(MultiGoalActionHandle.goal_id_of(goal_handle))
 
+    @validate(action_handle=optional(is_a(IActionHandle)))
     def remove_action_handle(self, action_handle):
-        with self.lock:
-            ParamFormatting.assert_types(self.remove_action_handle, action_handle, IActionHandle)
-            if action_handle in self.action_handles:
-                    self.action_handles.remove(action_handle)
+        if action_handle is not None:
+            self.action_handles.remove(action_handle)
+
+    def live_action_handles(self):
+        """ The number of action handles that haven't finished or expired yet """
+        return self.action_handles.live()
 
     def do(self, *goals):
         action_handles = []
@@ -608,16 +690,16 @@ class Robot(Entity):
         return action_handles
 
     # Wait for one or more goals to finish
+    @validate(action_handles=is_a(IActionHandle))
     def wait(self, *action_handles):
         for ah in action_handles:
-            ParamFormatting.assert_types(self.wait, ah, IActionHandle)
             ah.wait_for_result()
             self.remove_action_handle(action_handle=ah)
 
     # Cancel one or more goals
+    @validate(action_handles=is_a(IActionHandle))
     def cancel(self, *action_handles):
         for ah in action_handles:
-            ParamFormatting.assert_types(self.wait, ah, IActionHandle)
             ah.cancel_action()
             self.remove_action_handle(action_handle=ah)
 
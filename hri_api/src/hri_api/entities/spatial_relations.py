@@ -0,0 +1,146 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import numpy
+
+
+class SpatialRelationTable(object):
+    """ Where every visible entity was, relative to the World's reference frame (normally the robot), at one World tick.
+
+        The World builds a new table each tick, so behaviours asking for the same relations many times in a tick read
+        them from here instead of each doing a transform lookup. Relations follow the GeomMath conventions: an entity
+        is in front if x >= 0, behind if x < 0, to the left if y >= 0 and to the right if y < 0. Bearings are in
+        radians, anticlockwise from the x axis.
+
+        If the entities' orientations are given too, relative_position() can also work out where anything in the table
+        is relative to any entity in it, e.g. where the robot is relative to a person, without a transform lookup.
+    """
+
+    def __init__(self, stamp, reference_frame, entity_ids, positions, orientations=None):
+        self.stamp = stamp
+        self.reference_frame = reference_frame
+        self.entity_ids = list(entity_ids)
+        self.index_lookup = dict((entity_id, i) for i, entity_id in enumerate(self.entity_ids))
+        self.positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        self.distances = numpy.sqrt(numpy.einsum('ij,ij->i', self.positions, self.positions))
+        self.bearings = numpy.arctan2(self.positions[:, 1], self.positions[:, 0])
+        self.infront = self.positions[:, 0] >= 0.0
+        self.behind = ~self.infront
+        self.left = self.positions[:, 1] >= 0.0
+        self.right = ~self.left
+
+        if orientations is None:
+            self.rotations = None
+        else:
+            self.rotations = SpatialRelationTable.rotation_matrices(orientations)
+
+    @staticmethod
+    def rotation_matrices(orientations):
+        """ Return the N x 3 x 3 rotation matrices of N (x, y, z, w) quaternions """
+
+        q = numpy.asarray(orientations, dtype=numpy.float64).reshape(-1, 4)
+        x, y, z, w = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+        rotations = numpy.empty((len(q), 3, 3))
+        rotations[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+        rotations[:, 0, 1] = 2.0 * (x * y - z * w)
+        rotations[:, 0, 2] = 2.0 * (x * z + y * w)
+        rotations[:, 1, 0] = 2.0 * (x * y + z * w)
+        rotations[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+        rotations[:, 1, 2] = 2.0 * (y * z - x * w)
+        rotations[:, 2, 0] = 2.0 * (x * z - y * w)
+        rotations[:, 2, 1] = 2.0 * (y * z + x * w)
+        rotations[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+        return rotations
+
+    def __len__(self):
+        return len(self.entity_ids)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.index_lookup
+
+    def index(self, entity_id):
+        """ Return the row of entity_id, or None if it wasn't visible at this tick """
+        return self.index_lookup.get(entity_id)
+
+    def age(self, now):
+        return now - self.stamp
+
+    def position(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return self.positions[i]
+
+    def relative_position(self, from_key, to_key):
+        """ Return the position of to_key relative to from_key, where each key is an entity id or the reference frame.
+            Returns None if either entity isn't in the table, or if from_key is an entity and orientations weren't
+            given.
+        """
+
+        if to_key == self.reference_frame:
+            to_position = numpy.zeros(3)
+        else:
+            j = self.index(to_key)
+
+            if j is None:
+                return None
+            to_position = self.positions[j]
+
+        if from_key == self.reference_frame:
+            return to_position
+
+        i = self.index(from_key)
+
+        if i is None or self.rotations is None:
+            return None
+
+        return numpy.dot(self.rotations[i].T, to_position - self.positions[i])
+
+    def distance(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return float(self.distances[i])
+
+    def bearing(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return float(self.bearings[i])
+
+    def closest(self):
+        """ Return the id of the closest entity, or None if the table is empty """
+
+        if len(self.entity_ids) == 0:
+            return None
+        return self.entity_ids[int(numpy.argmin(self.distances))]
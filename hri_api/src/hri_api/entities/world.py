@@ -4,81 +4,506 @@ import roslib; roslib.load_manifest('hri_api')
 import rospy
 from std_msgs.msg import UInt16MultiArray
 #from hri_api.srv import ExecuteQuery, GazeID, GestureID, IsQueryable, TFID, ExecuteQueryResponse, GazeIDResponse, GestureIDResponse, TFIDResponse, IsQueryableResponse
-from hri_msgs.msg import EntityMsg, EntityListMsg
+from hri_msgs.msg import EntityMsg, EntityListMsg, EntityStateMsg, WorldEventMsg, WorldStateMsg, WorldDeltaMsg
 import threading
-from hri_api.entities import Entity
+import tf
+import tf.transformations
+import numpy
+from hri_api.entities import Entity, WorldHistory, MotionPredictor, WorldEventLog, WorldEventType, EntityPool
+from hri_api.entities import WorldDelta, DeltaTracker, WorldFederation, SpatialRelationTable
+from hri_api.util import EventLogTruncatedError, SharedSnapshotWriter, WorldCheckpoint, CheckpointEntry
 from hri_api.query import Query
 from hri_api.query import is_callable
-from hri_api.util import Singleton, InitNode
-from hri_msgs.srv import TfFrame, TfFrameResponse, IfQueryableExecute, IfQueryableExecuteResponse, AddEntity, AddEntityResponse, SetVisibility, SetVisibilityResponse
+from hri_api.util import NamespacedSingleton, InitNode, SharedTransformListener, ServiceClientPool
+from hri_msgs.srv import TfFrame, TfFrameResponse, IfQueryableExecute, IfQueryableExecuteResponse, IfQueryableExecuteStates, IfQueryableExecuteStatesResponse, AddEntity, AddEntityResponse, SetVisibility, SetVisibilityResponse, WorldEventsSince, WorldEventsSinceResponse
 from std_srvs.srv import Empty
 import importlib
+import os
 
+try:
+    # Python 2
+    from cStringIO import StringIO as BytesIO
+except ImportError:
+    # Python 3
+    from io import BytesIO
 
-class World():
-    __metaclass__ = Singleton
 
-    def __init__(self):
-        InitNode()
-        self.tf_frame_service = rospy.Service('tf_frame_service', TfFrame, self.tf_frame_service_callback)
-        self.if_queryable_execute_service = rospy.Service('if_queryable_execute', IfQueryableExecute, self.if_queryable_execute_callback)
-        self.add_entity_srv = rospy.Service('add_entity', AddEntity, self.add_entity_callback)
-        self.set_visibility_srv = rospy.Service('set_visibility', SetVisibility, self.set_visibility_callback)
-        self.enable_perception_srv = rospy.ServiceProxy('perception_synthesiser/enable', Empty)
-        self.disable_perception_srv = rospy.ServiceProxy('perception_synthesiser/disable', Empty)
+class SerializedMessage(object):
+    """ Mixin for a message that writes out the bytes it was serialized to when cached, rather than serializing its
+        fields again every time it is sent.
+    """
+
+    serialized_types = {}
+
+    def serialize(self, buff):
+        buff.write(self.serialized)
+
+    @staticmethod
+    def cache(msg):
+        msg_type = type(msg)
+
+        if msg_type not in SerializedMessage.serialized_types:
+            SerializedMessage.serialized_types[msg_type] = type('Serialized' + msg_type.__name__, (SerializedMessage, msg_type), {})
+
+        cached = SerializedMessage.serialized_types[msg_type]()
+
+        for slot in msg_type.__slots__:
+            setattr(cached, slot, getattr(msg, slot))
+
+        buff = BytesIO()
+        msg.serialize(buff)
+        cached.serialized = buff.getvalue()
+        return cached
 
-        self.enable_perception_srv.wait_for_service()
-        self.disable_perception_srv.wait_for_service()
 
+class World():
+    """ The entities perceived by one robot. Worlds are per namespace: World() is the default World, and
+        World('robot2') is the World of the robot whose services and topics live under robot2/. Worlds in the same
+        process share the node and the transform buffer.
+    """
+
+    __metaclass__ = NamespacedSingleton
+
+    def __init__(self, namespace=''):
+        InitNode()
+        self.namespace = namespace
         self.entity_lock = threading.RLock()
         self.entities = []
         self.entity_id_lookup = {}
         self.entity_classes = {}
+        self.pool = EntityPool()
+        self.events = WorldEventLog(self.param('event_log_size', 1000))
+
+        # Entities out of sight for longer than eviction_timeout, and queries that haven't been executed for
+        # query_timeout, are removed from the World (seconds, 0 keeps them forever)
+        self.eviction_timeout = self.param('eviction_timeout', 30.0)
+        self.query_timeout = self.param('query_timeout', 60.0)
+        self.invisible_since = {}
+        self.query_last_used = {}
+        self.events_pub = rospy.Publisher(self.resolve('world_events'), WorldEventMsg, queue_size=100)
+        self.state_pub = rospy.Publisher(self.resolve('world_state'), WorldStateMsg, queue_size=1, latch=True)
+        self.type_codes = {}
+        self.type_names = []
+        self.entity_msgs = {}
+        self.entity_state_msgs = {}
+        self.query_responses = {}
+        self.query_state_responses = {}
+        self.shared_snapshot_path = rospy.get_param(self.resolve('hri/shared_snapshot_path'), '')
+        self.shared_snapshot = None
+
+        if self.shared_snapshot_path != '':
+            self.shared_snapshot = SharedSnapshotWriter(self.shared_snapshot_path, self.param('shared_snapshot_capacity', 256))
+
+        self.tl = SharedTransformListener()
+        self.reference_frame = self.param('reference_frame', 'base_link')
+        history_rate = self.param('history_rate', 10.0)
+        history_duration = self.param('history_duration', 30.0)
+        self.history = WorldHistory(int(history_rate * history_duration), self.param('history_max_entities', 64),
+                                    self.param('velocity_window', 0.5))
+        self.predictor = MotionPredictor(self.param('prediction_process_noise', 1.0),
+                                         self.param('prediction_measurement_noise', 0.01),
+                                         self.param('prediction_max_age', 1.0))
+
+        # Relations from the reference frame to every visible entity, rebuilt each tick for Entity's spatial methods
+        self.relations = None
+        self.relations_max_age = self.param('relations_max_age', 2.0 / history_rate)
+
+        # Entities made by add_entity are checkpointed so that a restarted World brings them back under the same ids
+        self.entity_origins = {}
+        self.checkpoint_path = rospy.get_param(self.resolve('hri/world_checkpoint_path'), '')
+        self.checkpoint_dirty = False
+        self.checkpoint_timer = None
+
+        if self.checkpoint_path != '':
+            self.restore_checkpoint()
+            self.write_checkpoint()
+            self.checkpoint_timer = rospy.Timer(rospy.Duration(self.param('checkpoint_period', 1.0)), self.checkpoint_tick)
+
+        # Robots sharing a space merge what they see into one index, in a frame they all share
+        self.federation = None
+        self.federation_frame = self.param('federation_frame', '')
+
+        if self.federation_frame != '':
+            self.robot_id = self.param('federation_robot_id', self.namespace if self.namespace != '' else rospy.get_name())
+            self.federation = WorldFederation(self.param('federation_association_radius', 0.5),
+                                              self.param('federation_max_age', 1.0))
+            self.delta_tracker = DeltaTracker(self.robot_id, self.param('federation_move_threshold', 0.05),
+                                              self.param('federation_keyframe_interval', 50))
+            federation_topic = self.param('federation_topic', '/hri_federation/deltas')
+            self.federation_pub = rospy.Publisher(federation_topic, WorldDeltaMsg, queue_size=10)
+            self.federation_sub = rospy.Subscriber(federation_topic, WorldDeltaMsg, self.federation_callback, queue_size=100)
+
+        self.tf_frame_service = rospy.Service(self.resolve('tf_frame_service'), TfFrame, self.tf_frame_service_callback)
+        self.if_queryable_execute_service = rospy.Service(self.resolve('if_queryable_execute'), IfQueryableExecute, self.if_queryable_execute_callback)
+        self.if_queryable_execute_states_service = rospy.Service(self.resolve('if_queryable_execute_states'), IfQueryableExecuteStates, self.if_queryable_execute_states_callback)
+        self.add_entity_srv = rospy.Service(self.resolve('add_entity'), AddEntity, self.add_entity_callback)
+        self.set_visibility_srv = rospy.Service(self.resolve('set_visibility'), SetVisibility, self.set_visibility_callback)
+        self.events_since_srv = rospy.Service(self.resolve('world_events_since'), WorldEventsSince, self.events_since_callback)
+
+        # With perception in process, the PerceptionSynthesizer calls attach_perception() instead of serving
+        self.perception = None
+        self.perception_in_process = self.param('perception_in_process', False)
+
+        if not self.perception_in_process:
+            self.enable_perception_srv = ServiceClientPool().get(self.resolve('perception_synthesiser/enable'), Empty)
+            self.disable_perception_srv = ServiceClientPool().get(self.resolve('perception_synthesiser/disable'), Empty)
+
+            self.enable_perception_srv.wait_for_service()
+            self.disable_perception_srv.wait_for_service()
+
+        self.tick_timer = rospy.Timer(rospy.Duration(1.0 / history_rate), self.tick)
 
         rospy.on_shutdown(self.shutdown)
-        self.enable_perception_srv()
+
+        if not self.perception_in_process:
+            self.enable_perception_srv()
+
+    def resolve(self, name):
+        """ Return name within this World's namespace """
+        return rospy.names.ns_join(self.namespace, name)
+
+    def param(self, name, default):
+        """ Return private parameter ~namespace/name, falling back to ~name and then to default """
+        return rospy.get_param('~' + self.resolve(name), rospy.get_param('~' + name, default))
 
     def __iter__(self):
         return iter(self.entities)
 
     def shutdown(self):
-        self.disable_perception_srv()
+        self.tick_timer.shutdown()
+
+        if self.checkpoint_timer is not None:
+            self.checkpoint_timer.shutdown()
+            self.write_checkpoint()
+
+        if self.perception is not None:
+            self.perception.disable()
+        elif not self.perception_in_process:
+            self.disable_perception_srv()
+
+        if self.shared_snapshot is not None:
+            self.shared_snapshot.close()
+            os.remove(self.shared_snapshot_path)
+
+    def tick(self, event=None):
+        with self.entity_lock:
+            visible = [entity for entity in self.entities if entity.is_visible()]
+
+        entities = []
+        entity_ids = []
+        tf_frames = []
+        positions = []
+        orientations = []
+
+        for entity in visible:
+            try:
+                tf_frame = World.tf_frame(entity)
+                (trans, rot) = self.tl.lookupTransform(self.reference_frame, tf_frame, rospy.Time())
+            except (tf.LookupException, tf.ConnectivityException, tf.ExtrapolationException):
+                continue
+
+            entities.append(entity)
+            entity_ids.append(entity.get_id())
+            tf_frames.append(tf_frame)
+            positions.append(trans)
+            orientations.append(rot)
+
+        stamp = rospy.get_time()
+        self.relations = SpatialRelationTable(stamp, self.reference_frame, entity_ids, positions, orientations)
+        dropped = self.history.append(stamp, entity_ids, positions)
+        self.predictor.update(stamp, entity_ids, positions)
+
+        if len(dropped) > 0:
+            rospy.logwarn("World history is full, couldn't record entities: {0}".format(dropped))
+
+        state = self.to_world_state_msg(stamp, entities, tf_frames, positions)
+        self.state_pub.publish(state)
+
+        if self.shared_snapshot is not None:
+            skipped = self.shared_snapshot.write(stamp, state.event_seq, state.type_names, state.entity_ids, state.type_codes,
+                                                 tf_frames, positions)
+
+            if len(skipped) > 0:
+                rospy.logwarn("Couldn't write entities to the shared World snapshot, they are beyond its capacity or "
+                              "their tf frames are too long: {0}".format(skipped))
+
+        if self.federation is not None:
+            self.federate(stamp, entities, positions)
+
+        self.evict_expired(stamp)
+
+    def evict_expired(self, stamp):
+        """ Evict the entities that have been out of sight for longer than eviction_timeout and expire the queries
+            that haven't been executed for query_timeout. Returns the ids that were removed.
+        """
+
+        with self.entity_lock:
+            expired = []
+
+            if self.eviction_timeout > 0:
+                expired += [entity_id for entity_id, since in self.invisible_since.items() if stamp - since > self.eviction_timeout]
+
+            if self.query_timeout > 0:
+                expired += [entity_id for entity_id, used in self.query_last_used.items() if stamp - used > self.query_timeout]
+
+            for entity_id in expired:
+                if entity_id in self.entity_id_lookup:
+                    self.remove_from_world(self.entity_id_lookup[entity_id])
+
+            return expired
+
+    def federate(self, stamp, entities, positions):
+        """ Send the federation what has changed since the last tick, then merge every robot's view """
+
+        try:
+            (trans, rot) = self.tl.lookupTransform(self.federation_frame, self.reference_frame, rospy.Time())
+        except (tf.LookupException, tf.ConnectivityException, tf.ExtrapolationException):
+            return
+
+        rotation = tf.transformations.quaternion_matrix(rot)[:3, :3]
+        shared_positions = numpy.dot(numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3), rotation.T) + trans
+        delta = self.delta_tracker.delta(stamp, trans, [e.get_id() for e in entities], [e.entity_type for e in entities], shared_positions)
+
+        self.federation.apply(delta)
+        self.federation_pub.publish(World.to_world_delta_msg(delta, self.federation_frame))
+        self.federation.merge(stamp)
+
+    def federation_callback(self, msg):
+        if msg.robot_id == self.robot_id:
+            return
+
+        # Positions in another frame can't be merged with ours
+        if msg.header.frame_id != self.federation_frame:
+            rospy.logwarn("Ignoring World delta from {0}: it is in frame '{1}', not the federation frame '{2}'".format(
+                msg.robot_id, msg.header.frame_id, self.federation_frame))
+            return
+
+        self.federation.apply(World.from_world_delta_msg(msg))
+
+    def type_code(self, entity_type):
+        with self.entity_lock:
+            if entity_type not in self.type_codes:
+                self.type_codes[entity_type] = len(self.type_names)
+                self.type_names.append(entity_type)
+
+            return self.type_codes[entity_type]
+
+    def to_world_state_msg(self, stamp, entities, tf_frames, positions):
+        msg = WorldStateMsg()
+        msg.header.stamp = rospy.Time.from_sec(stamp)
+        msg.header.frame_id = self.reference_frame
+        msg.event_seq = self.events.latest_seq()
+        msg.entity_ids = [int(entity.get_id()) for entity in entities]
+        msg.type_codes = [self.type_code(entity.entity_type) for entity in entities]
+
+        with self.entity_lock:
+            msg.type_names = list(self.type_names)
+        msg.tf_frames = tf_frames
+        msg.positions = numpy.asarray(positions, dtype=numpy.float32).ravel()
+        return msg
+
+    @staticmethod
+    def to_world_delta_msg(delta, federation_frame):
+        type_names = sorted(set(delta.entity_types))
+        type_codes = dict((name, i) for i, name in enumerate(type_names))
+
+        msg = WorldDeltaMsg()
+        msg.header.stamp = rospy.Time.from_sec(delta.stamp)
+        msg.header.frame_id = federation_frame
+        msg.robot_id = delta.robot_id
+        msg.seq = delta.seq
+        msg.full = delta.full
+        msg.origin = delta.origin.tolist()
+        msg.type_names = type_names
+        msg.entity_ids = delta.entity_ids
+        msg.type_codes = [type_codes[t] for t in delta.entity_types]
+        msg.positions = delta.positions.astype(numpy.float32).ravel()
+        msg.removed_ids = delta.removed_ids
+        return msg
+
+    @staticmethod
+    def from_world_delta_msg(msg):
+        entity_types = [msg.type_names[code] for code in bytearray(msg.type_codes)]
+        return WorldDelta(msg.robot_id, msg.seq, msg.header.stamp.to_sec(), msg.full, msg.origin, msg.entity_ids,
+                          entity_types, numpy.asarray(msg.positions, dtype=numpy.float64), msg.removed_ids)
+
+    def attach_perception(self, perception):
+        """ Use a PerceptionSynthesizer running in this process. Its perception sources call add_entity() and
+            set_visibility() directly rather than through the add_entity and set_visibility services.
+        """
+
+        self.perception = perception
+        perception.enable()
 
     def add_entity_callback(self, req):
+        return AddEntityResponse(self.add_entity(req.entity_module, req.entity_class, req.local_id))
+
+    def add_entity(self, entity_module, entity_class, local_id):
+        """ Add the entity of class entity_module.entity_class with local_id to the World and return its global id """
+
         with self.entity_lock:
-            module = importlib.import_module(req.entity_module)
-            entity_cls = getattr(module, req.entity_class)
-            entity = entity_cls.make(req.local_id)
+            module = importlib.import_module(entity_module)
+            entity_cls = getattr(module, entity_class)
+            previous = self.pool.live.get((entity_cls, local_id))
+            was_visible = previous is not None and previous.is_visible()
+
+            # A tracker that reuses the local id of an entity it lost may have given it to someone else, so the lost
+            # entity is evicted and the id comes back as a new entity, with its own id, history and predictor track
+            if previous is not None and not was_visible and previous.get_id() in self.entity_id_lookup:
+                self.remove_from_world(previous)
+
+            entity = self.pool.acquire(entity_cls, local_id)
+            self.entity_origins[entity.get_id()] = (entity_module, entity_class, local_id)
 
-            self.add_to_world(entity)
-            resp = AddEntityResponse()
-            resp.global_id = entity.get_id()
-            rospy.loginfo('added entity {0} to World'.format(entity))
-            return AddEntityResponse(resp.global_id)
+            # An entity that is still in sight is the same entity, and keeps its id
+            if entity.get_id() not in self.entity_id_lookup:
+                self.add_to_world(entity)
+
+            rospy.loginfo('added entity {0} to World, entity pool hit rate: {1:.2f}'.format(entity, self.pool.hit_rate()))
+            return entity.get_id()
 
     def set_visibility_callback(self, req):
-        with self.entity_lock:
-            entity = self.entity_from_entity_id(req.global_id)
-            entity.set_visible(req.is_visible)
+        self.set_visibility(req.global_id, req.is_visible)
         return SetVisibilityResponse()
 
+    def set_visibility(self, global_id, is_visible):
+        with self.entity_lock:
+            entity = self.entity_from_entity_id(global_id)
+
+            if entity.is_visible() != is_visible:
+                entity.set_visible(is_visible)
+
+                if is_visible:
+                    self.invisible_since.pop(global_id, None)
+                else:
+                    self.invisible_since[global_id] = rospy.get_time()
+
+                self.publish_event(WorldEventType.VISIBILITY_CHANGED, entity)
+
+    def publish_event(self, event_type, entity):
+        visible = isinstance(entity, Entity) and entity.is_visible()
+        event = self.events.append(rospy.get_time(), event_type, entity.get_id(), visible)
+        self.checkpoint_dirty = True
+        self.events_pub.publish(World.to_world_event_msg(event))
+
+    def events_since_callback(self, req):
+        response = WorldEventsSinceResponse()
+
+        try:
+            latest_seq, events = self.events.latest_and_since(req.seq)
+            response.events = [World.to_world_event_msg(event) for event in events]
+        except EventLogTruncatedError:
+            latest_seq = self.events.latest_seq()
+            response.truncated = True
+
+        response.latest_seq = latest_seq
+        return response
+
+    def restore_checkpoint(self):
+        """ Bring back the entities in the checkpoint, under the ids they had before the World restarted """
+
+        try:
+            entries = WorldCheckpoint.read(self.checkpoint_path)
+        except IOError:
+            return
+        except ValueError as exc:
+            rospy.logwarn("Couldn't restore the World: " + str(exc))
+            return
+
+        with self.entity_lock:
+            for entry in entries:
+                try:
+                    entity_cls = getattr(importlib.import_module(entry.entity_module), entry.entity_class)
+                except (ImportError, AttributeError) as exc:
+                    rospy.logwarn("Couldn't restore entity {0}: {1}".format(entry.entity_id, exc))
+                    continue
+
+                entity = self.pool.acquire(entity_cls, entry.local_id, entry.entity_id)
+                entity.set_visible(entry.visible)
+                self.entity_origins[entry.entity_id] = (entry.entity_module, entry.entity_class, entry.local_id)
+                self.add_to_world(entity)
+
+                if not entry.visible:
+                    self.invisible_since[entry.entity_id] = rospy.get_time()
+
+        rospy.loginfo('restored {0} entities from {1}'.format(len(entries), self.checkpoint_path))
+
+    def write_checkpoint(self):
+        with self.entity_lock:
+            entries = []
+
+            for entity_id, (entity_module, entity_class, local_id) in self.entity_origins.items():
+                entity = self.entity_id_lookup[entity_id]
+                entries.append(CheckpointEntry(entity_id, entity_module, entity_class, local_id, entity.is_visible()))
+
+            self.checkpoint_dirty = False
+
+        try:
+            WorldCheckpoint.write(self.checkpoint_path, entries)
+        except (IOError, OSError) as exc:
+            rospy.logwarn("Couldn't write World checkpoint: " + str(exc))
+
+    def checkpoint_tick(self, event=None):
+        if self.checkpoint_dirty:
+            self.write_checkpoint()
+
     def add_entity_class(self, cls, entity_type):
         self.entity_classes[entity_type] = cls
 
     def add_to_world(self, entity):
         entity_id = entity.get_id()
 
-        if isinstance(entity, Entity):
-            if entity_id not in self.entity_id_lookup:
-                self.entity_id_lookup[entity_id] = entity
-                self.entities.append(entity)
-                rospy.logdebug("Added entity with entity_id: %s", entity_id)
-        elif isinstance(entity, Query):
+        with self.entity_lock:
+            if isinstance(entity, Entity):
+                if entity_id not in self.entity_id_lookup:
+                    entity.world = self
+                    self.entity_id_lookup[entity_id] = entity
+                    self.entities.append(entity)
+                    self.entity_msgs[entity_id] = World.to_entity_msg(entity)
+                    self.publish_event(WorldEventType.ENTITY_ADDED, entity)
+                    rospy.logdebug("Added entity with entity_id: %s", entity_id)
+            elif isinstance(entity, Query):
+                if entity_id not in self.entity_id_lookup:
+                    self.entity_id_lookup[entity_id] = entity
+                    self.query_last_used[entity_id] = rospy.get_time()
+                    self.publish_event(WorldEventType.QUERY_REGISTERED, entity)
+                    rospy.logdebug("Added query with entity_id: %s", entity_id)
+            else:
+                raise TypeError("add_to_world() parameter entity={0} is not a subclass of Entity or Query".format(entity))
+
+    def remove_from_world(self, entity):
+        """ Evict an entity, or expire a query, so that its id is no longer resolved by the World """
+
+        entity_id = entity.get_id()
+
+        with self.entity_lock:
             if entity_id not in self.entity_id_lookup:
-                self.entity_id_lookup[entity_id] = entity
-                rospy.logdebug("Added query with entity_id: %s", entity_id)
-        else:
-            raise TypeError("add_to_world() parameter entity={0} is not a subclass of Entity or Query".format(entity))
+                return
+
+            del self.entity_id_lookup[entity_id]
+            self.invisible_since.pop(entity_id, None)
+            self.query_last_used.pop(entity_id, None)
+            self.entity_origins.pop(entity_id, None)
+            self.entity_msgs.pop(entity_id, None)
+            self.entity_state_msgs.pop(entity_id, None)
+            self.query_responses.pop(entity_id, None)
+            self.query_state_responses.pop(entity_id, None)
+
+            if isinstance(entity, Entity):
+                self.entities.remove(entity)
+
+                # Body parts added as gaze or gesture targets go with their entity
+                for child in [e for e in self.entities if e.parent is entity]:
+                    self.remove_from_world(child)
+
+                self.history.release(entity_id)
+                self.predictor.remove(entity_id)
+                self.pool.release(entity)
+                self.publish_event(WorldEventType.ENTITY_EVICTED, entity)
+                rospy.logdebug("Evicted entity with entity_id: %s", entity_id)
+            else:
+                self.publish_event(WorldEventType.QUERY_EXPIRED, entity)
+                rospy.logdebug("Expired query with entity_id: %s", entity_id)
 
     def entity_from_entity_id(self, entity_id):
         if not isinstance(entity_id, str):
@@ -91,29 +516,142 @@ class World():
 
     def tf_frame_service_callback(self, req):
         entity = self.entity_from_entity_id(req.entity_id)
-        tf_frame = entity.tf_frame_id()
-        return TfFrameResponse(tf_frame)
+        return TfFrameResponse(World.tf_frame(entity))
+
+    @staticmethod
+    def tf_frame(entity):
+        """ Return the frame that locates entity, the one translation_to uses. Every transport, i.e. the tf frame
+            service, entity states and the shared snapshot, gives out this frame.
+        """
+
+        try:
+            return entity.default_tf_frame_id()
+        except NotImplementedError:
+            return entity.tf_frame_id()
 
     def if_queryable_execute_callback(self, req):
         entity = self.entity_from_entity_id(req.entity_id)
+
+        if not isinstance(entity, Query):
+            return IfQueryableExecuteResponse(is_queryable=False)
+
+        self.touch_query(req.entity_id)
+        entities = entity.execute()
+        membership = tuple(e.get_id() for e in entities)
+
+        # Reuse the serialized response while the query keeps returning the same entities
+        with self.entity_lock:
+            cached = self.query_responses.get(req.entity_id)
+
+        if cached is not None and cached[0] == membership:
+            return cached[1]
+
         response = IfQueryableExecuteResponse()
+        response.is_queryable = True
+        response.entities = self.to_entity_list_msg(entities).entities
+        response = SerializedMessage.cache(response)
+        self.cache_query_response(self.query_responses, req.entity_id, membership, response)
+        return response
+
+    def if_queryable_execute_states_callback(self, req):
+        entity = self.entity_from_entity_id(req.entity_id)
+
+        if not isinstance(entity, Query):
+            return IfQueryableExecuteStatesResponse(is_queryable=False)
+
+        self.touch_query(req.entity_id)
+        entities = entity.execute()
+        membership = tuple(e.get_id() for e in entities)
+
+        # Positions come from the last tick, so a response with positions is only reusable until the next tick
+        if req.include_positions:
+            key = (membership, self.history.version)
+        else:
+            key = (membership, None)
+
+        with self.entity_lock:
+            cached = self.query_state_responses.get(req.entity_id)
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        response = IfQueryableExecuteStatesResponse()
+        response.is_queryable = True
+        response.reference_frame = self.reference_frame
 
-        if isinstance(entity, Query):
-            response.is_queryable = True
-            entities = entity.execute()
-            response.entities = World.to_entity_list_msg(entities)
+        if req.include_positions:
+            entity_ids, positions = self.history.snapshot()
+            position_lookup = dict(zip(entity_ids, positions))
+            response.entities = [self.to_entity_state_msg(e, position_lookup.get(e.get_id())) for e in entities]
         else:
-            response.is_queryable = False
+            response.entities = [self.to_entity_state_msg(e) for e in entities]
 
+        response = SerializedMessage.cache(response)
+        self.cache_query_response(self.query_state_responses, req.entity_id, key, response)
         return response
 
+    def touch_query(self, query_id):
+        with self.entity_lock:
+            if query_id in self.entity_id_lookup:
+                self.query_last_used[query_id] = rospy.get_time()
+
+    def cache_query_response(self, responses, query_id, key, response):
+        """ Cache the response to query_id, unless the query expired while the response was being built """
+
+        with self.entity_lock:
+            if query_id in self.entity_id_lookup:
+                responses[query_id] = (key, response)
+
+    def to_entity_state_msg(self, entity, position=None):
+        entity_id = entity.get_id()
+
+        with self.entity_lock:
+            msg = self.entity_state_msgs.get(entity_id)
+
+            if msg is None:
+                msg = EntityStateMsg()
+                msg.entity_id = entity_id
+                msg.entity_type = entity.entity_type
+                msg.tf_frame = World.tf_frame(entity)
+
+                # Entities evicted while a query was executing aren't cached again
+                if entity_id in self.entity_id_lookup:
+                    self.entity_state_msgs[entity_id] = msg
+
+        if position is None:
+            return msg
+
+        msg_with_position = EntityStateMsg(entity_id=msg.entity_id, entity_type=msg.entity_type, tf_frame=msg.tf_frame)
+        msg_with_position.has_position = True
+        msg_with_position.position.x, msg_with_position.position.y, msg_with_position.position.z = position
+        return msg_with_position
+
     @staticmethod
-    def to_entity_list_msg(entities):
+    def to_world_event_msg(event):
+        msg = WorldEventMsg()
+        msg.seq = event.seq
+        msg.stamp = rospy.Time.from_sec(event.stamp)
+        msg.event_type = event.event_type.value
+        msg.entity_id = event.entity_id
+        msg.is_visible = event.visible
+        return msg
+
+    def to_entity_list_msg(self, entities):
         entity_list_msg = EntityListMsg()
 
-        for entity in entities:
-            entity_msg = EntityMsg()
-            entity_msg.entity_id = entity.get_id()
-            entity_list_msg.entities.append(entity_msg)
+        with self.entity_lock:
+            for entity in entities:
+                msg = self.entity_msgs.get(entity.get_id())
+
+                if msg is None:
+                    msg = World.to_entity_msg(entity)
+
+                entity_list_msg.entities.append(msg)
 
         return entity_list_msg
+
+    @staticmethod
+    def to_entity_msg(entity):
+        entity_msg = EntityMsg()
+        entity_msg.entity_id = entity.get_id()
+        return entity_msg
@@ -0,0 +1,101 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import threading
+from collections import deque
+from enum import Enum
+from hri_api.util import EventLogTruncatedError
+
+
+class WorldEventType(Enum):
+    ENTITY_ADDED = 1
+    VISIBILITY_CHANGED = 2
+    ENTITY_EVICTED = 3
+    QUERY_REGISTERED = 4
+    QUERY_EXPIRED = 5
+
+
+class WorldEvent(object):
+    def __init__(self, seq, stamp, event_type, entity_id, visible):
+        self.seq = seq
+        self.stamp = stamp
+        self.event_type = event_type
+        self.entity_id = entity_id
+        self.visible = visible
+
+    def __repr__(self):
+        return "WorldEvent(seq={0}, type={1}, entity_id={2}, visible={3})".format(self.seq, self.event_type.name, self.entity_id, self.visible)
+
+
+class WorldEventLog(object):
+    """ A bounded, ordered log of World lifecycle events.
+
+        Every event gets the next sequence number, starting at 1. A consumer keeps the last sequence number it has
+        applied and calls since() to catch up, so it only does work for what has changed.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.events = deque(maxlen=capacity)
+        self.seq = 0
+        self.lock = threading.RLock()
+
+    def append(self, stamp, event_type, entity_id, visible=True):
+        with self.lock:
+            self.seq += 1
+            event = WorldEvent(self.seq, stamp, event_type, entity_id, visible)
+            self.events.append(event)
+            return event
+
+    def latest_seq(self):
+        return self.seq
+
+    def since(self, seq):
+        """ Return the events with a sequence number greater than seq, oldest first.
+
+            Raises EventLogTruncatedError if some of those events have already been dropped from the log, in which
+            case the consumer has to rebuild its mirror from the World and continue from latest_seq().
+        """
+
+        with self.lock:
+            if seq >= self.seq:
+                return []
+
+            first = self.seq - len(self.events) + 1
+
+            if seq + 1 < first:
+                raise EventLogTruncatedError("events {0} to {1} have been dropped from the log".format(seq + 1, first - 1))
+
+            return list(self.events)[seq + 1 - first:]
+
+    def latest_and_since(self, seq):
+        """ Return (latest_seq(), since(seq)), read together so that no event can be appended in between """
+
+        with self.lock:
+            return self.seq, self.since(seq)
@@ -0,0 +1,328 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import threading
+import numpy
+
+
+class WorldDelta(object):
+    """ The changes to one robot's World since the delta before it, in the frame shared by the federation """
+
+    def __init__(self, robot_id, seq, stamp, full, origin, entity_ids, entity_types, positions, removed_ids):
+        """
+        :param robot_id: id of the robot the delta comes from
+        :param seq: sequence number of the delta, one more than the robot's previous delta
+        :param stamp: time of the World tick the delta was made from, in seconds
+        :param full: True if the delta holds every entity the robot can see rather than just the changes
+        :param origin: position of the robot in the shared frame
+        :param entity_ids: ids of the entities that were added or have moved
+        :param entity_types: entity type of each of entity_ids
+        :param positions: N x 3 positions of entity_ids in the shared frame
+        :param removed_ids: ids of the entities that are no longer visible
+        """
+
+        self.robot_id = robot_id
+        self.seq = seq
+        self.stamp = stamp
+        self.full = full
+        self.origin = numpy.asarray(origin, dtype=numpy.float64)
+        self.entity_ids = list(entity_ids)
+        self.entity_types = list(entity_types)
+        self.positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        self.removed_ids = list(removed_ids)
+
+    def __len__(self):
+        return len(self.entity_ids) + len(self.removed_ids)
+
+
+class DeltaTracker(object):
+    """ Turns the entities one robot sees each tick into WorldDeltas, so that only entities that appeared, moved or
+        disappeared are sent to the rest of the federation. Every keyframe_interval deltas a full delta is sent
+        instead, so robots that missed a delta or joined late catch up.
+    """
+
+    def __init__(self, robot_id, move_threshold=0.05, keyframe_interval=50):
+        """
+        :param robot_id: id of this robot in the federation
+        :param move_threshold: distance in metres an entity has to move from its last sent position to be sent again
+        :param keyframe_interval: number of deltas between full deltas
+        """
+
+        self.robot_id = robot_id
+        self.move_threshold = move_threshold
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.sent = {}
+
+    def delta(self, stamp, origin, entity_ids, entity_types, positions):
+        """ Return the WorldDelta from the last call to the entities visible now """
+
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        self.seq += 1
+        full = (self.seq - 1) % self.keyframe_interval == 0
+
+        if full:
+            changed = numpy.ones(len(entity_ids), dtype=bool)
+        else:
+            last = numpy.array([self.sent.get(e, (numpy.nan, numpy.nan, numpy.nan)) for e in entity_ids]).reshape(-1, 3)
+            moved = numpy.sqrt(numpy.sum((positions - last) ** 2, axis=1))
+            changed = numpy.isnan(moved) | (moved > self.move_threshold)
+
+        current = set(entity_ids)
+        removed_ids = [e for e in self.sent if e not in current]
+
+        for e in removed_ids:
+            del self.sent[e]
+
+        for i in numpy.flatnonzero(changed):
+            self.sent[entity_ids[i]] = positions[i]
+
+        return WorldDelta(self.robot_id, self.seq, stamp, full, origin,
+                          [entity_ids[i] for i in numpy.flatnonzero(changed)],
+                          [entity_types[i] for i in numpy.flatnonzero(changed)],
+                          positions[changed], removed_ids)
+
+
+class FederatedEntity(object):
+    """ One entity as seen by any number of robots in the federation """
+
+    def __init__(self, track_id, entity_type, position, members):
+        """
+        :param track_id: id of the entity in the federation, kept for as long as some robot keeps seeing it
+        :param entity_type: entity type, e.g. 'person'
+        :param position: mean position of the robots' observations in the shared frame
+        :param members: list of (robot_id, entity_id) of the observations that were merged into this entity
+        """
+
+        self.track_id = track_id
+        self.entity_type = entity_type
+        self.position = position
+        self.members = members
+
+    def __repr__(self):
+        return 'FederatedEntity({0}, {1}, {2})'.format(self.track_id, self.entity_type, self.members)
+
+
+class WorldFederation(object):
+    """ One index of the entities seen by several robots sharing a space.
+
+        Each robot's view is kept up to date from its WorldDeltas. merge() then associates the observations of all
+        robots once per tick: an observation stays with the entity it was merged into last tick while it is within
+        association_radius of it, otherwise it joins the closest entity of the same type within association_radius
+        that no other observation from the same robot belongs to, or starts a new entity. Queries over the merged
+        entities, such as the closest person to any robot, are computed once per merge.
+    """
+
+    def __init__(self, association_radius=0.5, max_age=1.0):
+        """
+        :param association_radius: distance in metres within which observations from different robots are merged
+        :param max_age: seconds after its last delta at which a robot is dropped from the federation
+        """
+
+        self.association_radius = association_radius
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.views = {}
+        self.seqs = {}
+        self.stamps = {}
+        self.origins = {}
+        self.assignments = {}
+        self.entities = []
+        self.next_track_id = 1
+        self.version = 0
+        self.query_cache = {}
+
+    def apply(self, delta):
+        """ Apply a robot's delta to its view. Returns False if a delta from the robot was missed, in which case its
+            deltas are ignored until its next full delta.
+        """
+
+        with self.lock:
+            robot_id = delta.robot_id
+
+            if delta.full:
+                self.views[robot_id] = {}
+            elif robot_id not in self.views or self.seqs[robot_id] + 1 != delta.seq:
+                self.views.pop(robot_id, None)
+                return False
+
+            view = self.views[robot_id]
+
+            for entity_id in delta.removed_ids:
+                view.pop(entity_id, None)
+
+            for entity_id, entity_type, position in zip(delta.entity_ids, delta.entity_types, delta.positions):
+                view[entity_id] = (entity_type, position)
+
+            self.seqs[robot_id] = delta.seq
+            self.stamps[robot_id] = delta.stamp
+            self.origins[robot_id] = delta.origin
+            return True
+
+    def robots(self):
+        with self.lock:
+            return sorted(self.origins.keys())
+
+    def merge(self, stamp):
+        """ Associate the observations of every robot heard from in the last max_age seconds and return the merged
+            list of FederatedEntity.
+        """
+
+        with self.lock:
+            for robot_id in [r for r, s in self.stamps.items() if stamp - s > self.max_age]:
+                self.views.pop(robot_id, None)
+                del self.stamps[robot_id]
+                del self.seqs[robot_id]
+                del self.origins[robot_id]
+
+            keys = []
+            types = []
+            positions = []
+
+            for robot_id in sorted(self.views.keys()):
+                for entity_id, (entity_type, position) in self.views[robot_id].items():
+                    keys.append((robot_id, entity_id))
+                    types.append(entity_type)
+                    positions.append(position)
+
+            positions = numpy.array(positions, dtype=numpy.float64).reshape(-1, 3)
+            previous = dict((e.track_id, e.position) for e in self.entities)
+            track_ids = []
+            track_types = []
+            track_robots = []
+            track_positions = []
+            members = []
+
+            def assign(i, t):
+                track_robots[t].add(keys[i][0])
+                members[t].append(i)
+
+            def new_track(i, track_id):
+                track_ids.append(track_id)
+                track_types.append(types[i])
+                track_robots.append(set())
+                track_positions.append(positions[i])
+                members.append([])
+                assign(i, len(track_ids) - 1)
+
+            # Observations that are still close to the entity they belonged to last tick stay with it
+            unassigned = []
+            track_index = {}
+
+            for i, key in enumerate(keys):
+                track_id = self.assignments.get(key)
+
+                if track_id in previous and numpy.linalg.norm(positions[i] - previous[track_id]) <= self.association_radius:
+                    if track_id in track_index and keys[i][0] not in track_robots[track_index[track_id]]:
+                        assign(i, track_index[track_id])
+                        continue
+                    elif track_id not in track_index:
+                        track_index[track_id] = len(track_ids)
+                        new_track(i, track_id)
+                        continue
+
+                unassigned.append(i)
+
+            # The rest join the closest entity of their type that their robot isn't already part of, or start their own
+            for i in unassigned:
+                t = None
+
+                if len(track_ids) > 0:
+                    distances = numpy.sqrt(numpy.sum((numpy.array(track_positions) - positions[i]) ** 2, axis=1))
+                    compatible = numpy.array([track_types[k] == types[i] and keys[i][0] not in track_robots[k]
+                                              for k in range(len(track_ids))])
+                    distances[~compatible] = numpy.inf
+                    k = int(numpy.argmin(distances))
+
+                    if distances[k] <= self.association_radius:
+                        t = k
+
+                if t is None:
+                    new_track(i, self.next_track_id)
+                    self.next_track_id += 1
+                else:
+                    assign(i, t)
+
+            self.assignments = {}
+            self.entities = []
+
+            for t, track_id in enumerate(track_ids):
+                member_keys = [keys[i] for i in members[t]]
+
+                for key in member_keys:
+                    self.assignments[key] = track_id
+
+                position = positions[members[t]].mean(axis=0)
+                self.entities.append(FederatedEntity(track_id, track_types[t], position, member_keys))
+
+            self.version += 1
+            self.query_cache = {}
+            return self.entities
+
+    def track_of(self, robot_id, entity_id):
+        """ Return the track id that robot_id's entity_id was merged into, or None """
+
+        with self.lock:
+            return self.assignments.get((robot_id, entity_id))
+
+    def distances(self, entity_type=None):
+        """ Return (entities, robot_ids, distances), where distances[i, j] is the distance between entities[i] and
+            robot_ids[j], computed once per merge.
+        """
+
+        with self.lock:
+            key = ('distances', entity_type)
+
+            if key not in self.query_cache:
+                entities = [e for e in self.entities if entity_type is None or e.entity_type == entity_type]
+                robot_ids = self.robots()
+                entity_positions = numpy.array([e.position for e in entities]).reshape(-1, 3)
+                origins = numpy.array([self.origins[r] for r in robot_ids]).reshape(-1, 3)
+                distances = numpy.sqrt(numpy.sum((entity_positions[:, None, :] - origins[None, :, :]) ** 2, axis=2))
+                self.query_cache[key] = (entities, robot_ids, distances)
+
+            return self.query_cache[key]
+
+    def closest_to_any(self, entity_type=None):
+        """ Return (entity, robot_id, distance) for the entity closest to any robot, or None if there are none """
+
+        with self.lock:
+            key = ('closest_to_any', entity_type)
+
+            if key not in self.query_cache:
+                entities, robot_ids, distances = self.distances(entity_type)
+
+                if distances.size == 0:
+                    self.query_cache[key] = None
+                else:
+                    i, j = numpy.unravel_index(numpy.argmin(distances), distances.shape)
+                    self.query_cache[key] = (entities[i], robot_ids[j], float(distances[i, j]))
+
+            return self.query_cache[key]
@@ -0,0 +1,296 @@
+# Copyright (c) 2014, James Diprose
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import threading
+import numpy
+
+
+class WorldHistory(object):
+    """ A bounded ring buffer of per-tick World snapshots.
+
+        Each tick stores the stamp, which entities were visible and their positions in the World's reference
+        frame. Storage is columnar: every entity is given a slot (a column) that it keeps for as long as it appears
+        in the buffer, so a tick is one row write and temporal questions are answered with array operations.
+    """
+
+    def __init__(self, capacity=300, max_entities=64, velocity_window=0.5):
+        if capacity < 1:
+            raise ValueError("WorldHistory() parameter capacity={0} must be at least 1".format(capacity))
+
+        if max_entities < 1:
+            raise ValueError("WorldHistory() parameter max_entities={0} must be at least 1".format(max_entities))
+
+        self.capacity = capacity
+        self.max_entities = max_entities
+        self.velocity_window = velocity_window
+        self.lock = threading.RLock()
+
+        self.stamps = numpy.zeros(capacity, dtype=numpy.float64)
+        self.positions = numpy.zeros((capacity, max_entities, 3), dtype=numpy.float64)
+        self.visible = numpy.zeros((capacity, max_entities), dtype=bool)
+        self.head = -1
+        self.size = 0
+        self.version = 0
+
+        self.slot_lookup = {}
+        self.slot_ids = [None] * max_entities
+        self.last_seen = numpy.full(max_entities, -numpy.inf)
+        self.motion_cache = None
+
+    def __len__(self):
+        return self.size
+
+    def append(self, stamp, entity_ids, positions):
+        """ Record one tick.
+
+        :param stamp: time of the tick in seconds, must not be older than the previous tick
+        :param entity_ids: ids of the entities visible during the tick
+        :param positions: N x 3 positions of those entities, in the same order as entity_ids
+        :return: the ids that were not recorded because every slot is in use
+        """
+
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+
+        if len(entity_ids) != len(positions):
+            raise ValueError("append() parameter entity_ids has {0} ids but positions has {1} rows".format(len(entity_ids), len(positions)))
+
+        with self.lock:
+            if self.size > 0 and stamp < self.stamps[self.head]:
+                raise ValueError("append() parameter stamp={0} is older than the latest tick {1}".format(stamp, self.stamps[self.head]))
+
+            # Claim the row first so that a slot last seen in the evicted row can be recycled
+            row = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.head = row
+            self.visible[row] = False
+            self.stamps[row] = stamp
+
+            slots = []
+            kept = []
+            dropped = []
+
+            for i, entity_id in enumerate(entity_ids):
+                try:
+                    slot = self.slot(entity_id)
+                except IndexError:
+                    dropped.append(entity_id)
+                    continue
+
+                self.last_seen[slot] = stamp   # Claimed slots can't be recycled for the rest of the tick
+                slots.append(slot)
+                kept.append(i)
+
+            self.positions[row, slots] = positions[kept]
+            self.visible[row, slots] = True
+            self.version += 1
+
+        return dropped
+
+    def slot(self, entity_id):
+        """ Return the column used for entity_id, allocating or recycling one if it doesn't have one yet """
+
+        with self.lock:
+            if entity_id in self.slot_lookup:
+                return self.slot_lookup[entity_id]
+
+            slot = int(numpy.argmin(self.last_seen))
+
+            if self.slot_ids[slot] is not None:
+                if self.last_seen[slot] >= self.oldest_stamp():
+                    raise IndexError("slot() WorldHistory is tracking more than max_entities={0} entities".format(self.max_entities))
+
+                self.release(self.slot_ids[slot])
+
+            self.slot_lookup[entity_id] = slot
+            self.slot_ids[slot] = entity_id
+            return slot
+
+    def release(self, entity_id):
+        """ Forget entity_id and free its column """
+
+        with self.lock:
+            if entity_id in self.slot_lookup:
+                slot = self.slot_lookup.pop(entity_id)
+                self.slot_ids[slot] = None
+                self.visible[:, slot] = False
+                self.last_seen[slot] = -numpy.inf
+                self.version += 1
+
+    def rows(self):
+        """ Return the row indices of the buffer from oldest to newest """
+        return numpy.arange(self.head - self.size + 1, self.head + 1) % self.capacity
+
+    def latest_stamp(self):
+        if self.size == 0:
+            return None
+        return self.stamps[self.head]
+
+    def oldest_stamp(self):
+        if self.size == 0:
+            return numpy.inf
+        return self.stamps[(self.head - self.size + 1) % self.capacity]
+
+    def row_at(self, seconds_ago):
+        """ Return the newest row recorded at least seconds_ago before the latest tick, or None if there isn't one """
+
+        with self.lock:
+            if self.size == 0:
+                return None
+
+            rows = self.rows()
+            stamp = self.stamps[self.head] - seconds_ago
+            i = numpy.searchsorted(self.stamps[rows], stamp, side='right') - 1
+
+            if i < 0:
+                return None
+            return rows[i]
+
+    def snapshot(self, seconds_ago=0.0):
+        """ Return (entity_ids, positions) of the entities that were visible seconds_ago before the latest tick """
+
+        with self.lock:
+            row = self.row_at(seconds_ago)
+
+            if row is None:
+                return [], numpy.zeros((0, 3))
+
+            slots = numpy.flatnonzero(self.visible[row])
+            return [self.slot_ids[s] for s in slots], self.positions[row, slots].copy()
+
+    def distances(self, seconds_ago=0.0, origin=(0.0, 0.0, 0.0)):
+        """ Return a dict of entity_id to distance from origin for the entities visible seconds_ago """
+
+        entity_ids, positions = self.snapshot(seconds_ago)
+        distances = numpy.linalg.norm(positions - numpy.asarray(origin, dtype=numpy.float64), axis=1)
+        return dict(zip(entity_ids, distances.tolist()))
+
+    def closest(self, seconds_ago=0.0, origin=(0.0, 0.0, 0.0)):
+        """ Return the id of the entity that was closest to origin seconds_ago, or None """
+
+        entity_ids, positions = self.snapshot(seconds_ago)
+
+        if len(entity_ids) == 0:
+            return None
+
+        distances = numpy.linalg.norm(positions - numpy.asarray(origin, dtype=numpy.float64), axis=1)
+        return entity_ids[int(numpy.argmin(distances))]
+
+    def within_for(self, radius, duration, origin=(0.0, 0.0, 0.0)):
+        """ Return the ids of the entities that have been visible and within radius of origin for every tick in the
+            last duration seconds. Returns an empty list if the buffer doesn't cover the whole duration.
+        """
+
+        with self.lock:
+            if self.size == 0:
+                return []
+
+            start = self.stamps[self.head] - duration
+
+            if self.oldest_stamp() > start:
+                return []
+
+            rows = self.rows()
+            rows = rows[self.stamps[rows] >= start]
+            distances = numpy.linalg.norm(self.positions[rows] - numpy.asarray(origin, dtype=numpy.float64), axis=2)
+            inside = numpy.logical_and(self.visible[rows], distances <= radius).all(axis=0)
+            return [self.slot_ids[s] for s in numpy.flatnonzero(inside)]
+
+    def motion(self, window=None):
+        """ Estimate the motion of every entity visible in both the latest tick and the tick window seconds before it,
+            using finite differences. The estimate is computed for all entities at once and cached until the next tick.
+
+        :param window: seconds to difference over, defaults to velocity_window
+        :return: (entity_ids, velocities, range_rates) where velocities is N x 3 (m/s) and range_rates is the rate of
+                 change of each entity's distance from the reference frame origin (negative when approaching)
+        """
+
+        if window is None:
+            window = self.velocity_window
+
+        with self.lock:
+            key = (self.version, window)
+
+            if self.motion_cache is not None and self.motion_cache[0] == key:
+                return self.motion_cache[1]
+
+            motion = [], numpy.zeros((0, 3)), numpy.zeros(0)
+            then = self.row_at(window)
+
+            if then is not None:
+                dt = self.stamps[self.head] - self.stamps[then]
+
+                if dt > 0:
+                    slots = numpy.flatnonzero(numpy.logical_and(self.visible[self.head], self.visible[then]))
+                    now_positions = self.positions[self.head, slots]
+                    then_positions = self.positions[then, slots]
+                    velocities = (now_positions - then_positions) / dt
+                    range_rates = (numpy.linalg.norm(now_positions, axis=1) - numpy.linalg.norm(then_positions, axis=1)) / dt
+                    motion = [self.slot_ids[s] for s in slots], velocities, range_rates
+
+            self.motion_cache = (key, motion)
+            return motion
+
+    def velocity(self, entity_id, window=None):
+        """ Return the estimated velocity of entity_id as a length 3 array, or None if it can't be estimated """
+
+        entity_ids, velocities, range_rates = self.motion(window)
+
+        if entity_id in entity_ids:
+            return velocities[entity_ids.index(entity_id)]
+        return None
+
+    def range_rates(self, window=None):
+        """ Return a dict of entity_id to the rate of change of its distance from the reference frame origin """
+
+        entity_ids, velocities, range_rates = self.motion(window)
+        return dict(zip(entity_ids, range_rates.tolist()))
+
+    def relative_range_rate(self, entity_id, other_id, window=None):
+        """ Return the rate of change of the distance between two entities, or None if it can't be estimated """
+
+        if window is None:
+            window = self.velocity_window
+
+        with self.lock:
+            then = self.row_at(window)
+
+            if then is None or entity_id not in self.slot_lookup or other_id not in self.slot_lookup:
+                return None
+
+            dt = self.stamps[self.head] - self.stamps[then]
+            slots = [self.slot_lookup[entity_id], self.slot_lookup[other_id]]
+
+            if dt <= 0 or not (self.visible[self.head, slots].all() and self.visible[then, slots].all()):
+                return None
+
+            now_positions = self.positions[self.head, slots]
+            then_positions = self.positions[then, slots]
+            distance_now = numpy.linalg.norm(now_positions[0] - now_positions[1])
+            distance_then = numpy.linalg.norm(then_positions[0] - then_positions[1])
+            return (distance_now - distance_then) / dt
@@ -1,2 +1,4 @@
 from .util import *
-from .geom_math import *
\ No newline at end of file
+from .geom_math import *
+from .point import *
+from .point_array import *
\ No newline at end of file
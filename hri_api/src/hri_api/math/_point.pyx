@@ -0,0 +1,72 @@
+# Compiled version of hri_api.math.Point, built by setup.py when Cython is available
+from libc.math cimport sqrt
+
+
+cdef class Point:
+    cdef public double x
+    cdef public double y
+    cdef public double z
+
+    def __init__(self, double x=0.0, double y=0.0, double z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def set_x(self, double x):
+        self.x = x
+
+    def set_y(self, double y):
+        self.y = y
+
+    def set_z(self, double z):
+        self.z = z
+
+    cpdef Point add(self, object b):
+        cdef double bx, by, bz
+        _coords(b, &bx, &by, &bz)
+        return Point(self.x + bx, self.y + by, self.z + bz)
+
+    cpdef Point subtract(self, object b):
+        cdef double bx, by, bz
+        _coords(b, &bx, &by, &bz)
+        return Point(self.x - bx, self.y - by, self.z - bz)
+
+    cpdef Point multiply(self, double constant):
+        return Point(self.x * constant, self.y * constant, self.z * constant)
+
+    cpdef Point normalize(self):
+        cdef double length = self.length()
+        return Point(self.x / length, self.y / length, self.z / length)
+
+    cpdef double length(self):
+        return sqrt((self.x * self.x) + (self.y * self.y) + (self.z * self.z))
+
+    cpdef double distance_to(self, object other):
+        cdef double ox, oy, oz
+        _coords(other, &ox, &oy, &oz)
+        cdef double dx = self.x - ox
+        cdef double dy = self.y - oy
+        cdef double dz = self.z - oz
+        return sqrt(dx * dx + dy * dy + dz * dz)
+
+    def __reduce__(self):
+        return Point, (self.x, self.y, self.z)
+
+    def __repr__(self):
+        return "x: " + str(self.x) + " y: " + str(self.y) + " z: " + str(self.z)
+
+
+cdef inline void _coords(object p, double *x, double *y, double *z) except *:
+    # Compiled Points are read straight from their struct, anything else (PurePoint, geometry_msgs/Point) through
+    # its x, y and z attributes
+    cdef Point c
+
+    if type(p) is Point:
+        c = <Point>p
+        x[0] = c.x
+        y[0] = c.y
+        z[0] = c.z
+    else:
+        x[0] = p.x
+        y[0] = p.y
+        z[0] = p.z
@@ -2,34 +2,73 @@
 import roslib
 roslib.load_manifest('hri_api')
 
-import math
+import numpy
 from geometry_msgs.msg import Point
+from .point_array import PointArray
 
 class GeomMath(object):
+    """ Spatial relations between points. The array versions take N x 3 arrays (or anything to_array() accepts),
+        broadcast like numpy does, and return one value per row; the scalar versions take two Points.
+    """
+
+    @staticmethod
+    def to_array(points):
+        """ Return points as an N x 3 float array. points can be a PointArray, a Point, a list of Points or an
+            array-like of x, y, z rows.
+        """
+
+        # PointArrays have x, y and z too, so these are checked before the single point case
+        if isinstance(points, PointArray):
+            return points.array
+
+        if isinstance(points, numpy.ndarray):
+            return points.astype(numpy.float64, copy=False).reshape(-1, 3)
+
+        if hasattr(points, 'x'):
+            return numpy.array([[points.x, points.y, points.z]], dtype=numpy.float64)
+
+        if len(points) > 0 and hasattr(points[0], 'x'):
+            return numpy.array([[p.x, p.y, p.z] for p in points], dtype=numpy.float64)
+
+        return numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+
+    @staticmethod
+    def distances_between(p1, p2):
+        d = GeomMath.to_array(p1) - GeomMath.to_array(p2)
+        return numpy.sqrt(numpy.einsum('ij,ij->i', d, d))
+
+    @staticmethod
+    def are_infront_of(p1, p2):
+        return GeomMath.to_array(p1)[:, 0] >= GeomMath.to_array(p2)[:, 0]
+
+    @staticmethod
+    def are_behind(p1, p2):
+        return GeomMath.to_array(p1)[:, 0] < GeomMath.to_array(p2)[:, 0]
+
+    @staticmethod
+    def are_left_of(p1, p2):
+        return GeomMath.to_array(p1)[:, 1] >= GeomMath.to_array(p2)[:, 1]
+
+    @staticmethod
+    def are_right_of(p1, p2):
+        return GeomMath.to_array(p1)[:, 1] < GeomMath.to_array(p2)[:, 1]
+
     @staticmethod
     def distance_between(p1, p2):
-        return math.sqrt(p1.x*p2.x + p1.y*p2.y + p1.z*p2.z)
+        return float(GeomMath.distances_between(p1, p2)[0])
 
     @staticmethod
     def is_infront_of(p1, p2):
-        if p1.x >= p2.x:
-            return True
-        return False
+        return bool(GeomMath.are_infront_of(p1, p2)[0])
 
     @staticmethod
     def is_behind(p1, p2):
-        if p1.x < p2.x:
-            return True
-        return False
+        return bool(GeomMath.are_behind(p1, p2)[0])
 
     @staticmethod
     def is_left_of(p1, p2):
-        if p1.y >= p2.y:
-            return True
-        return False
+        return bool(GeomMath.are_left_of(p1, p2)[0])
 
     @staticmethod
     def is_right_of(p1, p2):
-        if p1.y < p2.y:
-            return True
-        return False
+        return bool(GeomMath.are_right_of(p1, p2)[0])
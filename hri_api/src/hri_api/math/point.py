@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+import math
+
+
+class PurePoint(object):
+    """ A 3D point. Used when the compiled Point extension hasn't been built. """
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def set_x(self, x):
+        self.x = float(x)
+
+    def set_y(self, y):
+        self.y = float(y)
+
+    def set_z(self, z):
+        self.z = float(z)
+
+    def add(self, b):
+        return PurePoint(self.x + b.x, self.y + b.y, self.z + b.z)
+
+    def subtract(self, b):
+        return PurePoint(self.x - b.x, self.y - b.y, self.z - b.z)
+
+    def multiply(self, constant):
+        return PurePoint(self.x * constant, self.y * constant, self.z * constant)
+
+    def normalize(self):
+        length = self.length()
+        return PurePoint(self.x / length, self.y / length, self.z / length)
+
+    def length(self):
+        return math.sqrt((self.x * self.x) + (self.y * self.y) + (self.z * self.z))
+
+    def distance_to(self, other):
+        dx = self.x - other.x
+        dy = self.y - other.y
+        dz = self.z - other.z
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+    def __reduce__(self):
+        return PurePoint, (self.x, self.y, self.z)
+
+    def __repr__(self):
+        return "x: " + str(self.x) + " y: " + str(self.y) + " z: " + str(self.z)
+
+
+# Use the compiled Point if setup.py built it, otherwise the pure Python one with the same interface
+try:
+    from ._point import Point
+    POINT_COMPILED = True
+except ImportError:
+    Point = PurePoint
+    POINT_COMPILED = False
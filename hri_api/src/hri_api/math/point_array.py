@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+import numpy
+from .point import Point
+
+
+class PointArray(object):
+    """ Many 3D points in one contiguous N x 3 float64 buffer.
+
+        array, x, y and z are numpy views onto the buffer, so they can be handed to numpy code without copying.
+        The batch operations work on every point at once and return a new PointArray; other can be a PointArray, a
+        single point with x, y and z attributes, or anything numpy can broadcast against an N x 3 array.
+    """
+
+    __slots__ = ('array',)
+
+    def __init__(self, data=None):
+        if data is None:
+            data = numpy.zeros((0, 3))
+
+        self.array = numpy.ascontiguousarray(data, dtype=numpy.float64).reshape(-1, 3)
+
+    @staticmethod
+    def zeros(n):
+        return PointArray(numpy.zeros((n, 3)))
+
+    @staticmethod
+    def from_points(points):
+        """ Make a PointArray from a list of objects with x, y and z attributes, e.g. Points or geometry_msgs/Points """
+
+        array = numpy.empty((len(points), 3))
+
+        for i, p in enumerate(points):
+            array[i, 0] = p.x
+            array[i, 1] = p.y
+            array[i, 2] = p.z
+
+        return PointArray(array)
+
+    @staticmethod
+    def as_array(other):
+        if isinstance(other, PointArray):
+            return other.array
+
+        if hasattr(other, 'x'):
+            return numpy.array([other.x, other.y, other.z])
+
+        return numpy.asarray(other, dtype=numpy.float64)
+
+    @property
+    def x(self):
+        return self.array[:, 0]
+
+    @property
+    def y(self):
+        return self.array[:, 1]
+
+    @property
+    def z(self):
+        return self.array[:, 2]
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PointArray(self.array[index])
+
+        row = self.array[index]
+        return Point(row[0], row[1], row[2])
+
+    def __setitem__(self, index, point):
+        self.array[index] = PointArray.as_array(point)
+
+    def __iter__(self):
+        for row in self.array:
+            yield Point(row[0], row[1], row[2])
+
+    def to_points(self):
+        return list(self)
+
+    def add(self, other):
+        return PointArray(self.array + PointArray.as_array(other))
+
+    def subtract(self, other):
+        return PointArray(self.array - PointArray.as_array(other))
+
+    def multiply(self, constant):
+        return PointArray(self.array * constant)
+
+    def lengths(self):
+        return numpy.sqrt(numpy.einsum('ij,ij->i', self.array, self.array))
+
+    def normalize(self):
+        """ Return the unit vectors of the points. Points of zero length stay zero. """
+
+        lengths = self.lengths()
+        lengths[lengths == 0.0] = 1.0
+        return PointArray(self.array / lengths[:, None])
+
+    def distances_to(self, other):
+        """ Return the distance from each point to other, or to the matching point of other """
+
+        d = self.array - PointArray.as_array(other)
+        return numpy.sqrt(numpy.einsum('ij,ij->i', d, d))
+
+    def __repr__(self):
+        return 'PointArray(' + repr(self.array.tolist()) + ')'
@@ -3,5 +3,4 @@ class Util(object):
     @staticmethod
     def assert_type(instance, type):
         if not isinstance(instance, type):
-            name = [ k for k,v in locals().iteritems() if v is instance][0]
-            raise TypeError(name + ' must be a ' + type.__name__)
+            raise TypeError('{0} must be a {1}'.format(instance, getattr(type, '__name__', type)))
@@ -82,6 +82,50 @@ class Query(object):
 
         return OrderedQuery(self, 1, key)
 
+    def select_within_for(self, radius, duration):
+        '''Select the entities that have stayed within radius metres of the robot for the last duration seconds,
+        according to the World history.
+
+        Note: This method uses deferred execution.
+        '''
+
+        def within():
+            ids = set(Query.world_history().within_for(radius, duration))
+            return itertools.ifilter(lambda x: x.get_id() in ids, self)
+
+        return Query(self, func=within)
+
+    def sort_by_distance_at(self, seconds_ago):
+        '''Sort entities by their distance to the robot seconds_ago, according to the World history. Entities
+        that weren't visible at that time are placed last.
+
+        Note: This method uses deferred execution.
+        '''
+
+        def sorted_by_distance():
+            distances = Query.world_history().distances(seconds_ago)
+            return OrderedQuery(self, -1, lambda x: distances.get(x.get_id(), float('inf')))
+
+        return Query(self, func=sorted_by_distance)
+
+    def sort_by_velocity(self):
+        '''Sort entities by how fast they are moving towards the robot, fastest approaching first. Velocities are
+        estimated once per World tick for every entity. Entities without an estimate are placed last.
+
+        Note: This method uses deferred execution.
+        '''
+
+        def sorted_by_velocity():
+            range_rates = Query.world_history().range_rates()
+            return OrderedQuery(self, -1, lambda x: range_rates.get(x.get_id(), float('inf')))
+
+        return Query(self, func=sorted_by_velocity)
+
+    @staticmethod
+    def world_history():
+        from hri_api.entities import World
+        return World().history
+
     def take(self, n):
         Util.assert_type(n, (int, long))
         n = max(0, n)
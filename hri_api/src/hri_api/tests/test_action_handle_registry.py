@@ -0,0 +1,62 @@
+from unittest import TestCase
+from hri_api.actions import ActionHandleRegistry
+
+__author__ = 'Jamie Diprose'
+
+
+class Handle(object):
+    def __init__(self, goal_id=None):
+        self.id = goal_id
+        self.done = False
+
+    def goal_id(self):
+        return self.id
+
+    def is_done(self):
+        return self.done
+
+
+class TestActionHandleRegistry(TestCase):
+    def test_add_get_remove(self):
+        registry = ActionHandleRegistry()
+        gesture = Handle('goal1')
+        gaze = Handle()
+
+        registry.add(gesture)
+        registry.add(gaze)
+        registry.add(gaze)
+
+        self.assertEqual(registry.live(), 2)
+        self.assertTrue(registry.get('goal1') is gesture)
+        self.assertTrue(gaze in registry)
+
+        registry.remove(gesture)
+        registry.remove(gesture)
+
+        self.assertEqual(registry.get('goal1'), None)
+        self.assertEqual(registry.live(), 1)
+
+    def test_sweep(self):
+        registry = ActionHandleRegistry()
+        handles = [Handle(str(i)) for i in range(4)]
+
+        for handle in handles:
+            registry.add(handle)
+
+        handles[0].done = True
+        handles[2].done = True
+
+        self.assertEqual(registry.sweep(), 2)
+        self.assertEqual([h.goal_id() for h in sorted(registry.values(), key=lambda h: h.goal_id())], ['1', '3'])
+        self.assertEqual(registry.peak, 4)
+
+    def test_expires_on_add(self):
+        registry = ActionHandleRegistry(sweep_interval=10)
+
+        for i in range(100):
+            handle = Handle()
+            registry.add(handle)
+            handle.done = True      # Finished, but never removed
+
+        self.assertTrue(registry.live() <= 10)
+        self.assertEqual(registry.expired + registry.live(), 100)
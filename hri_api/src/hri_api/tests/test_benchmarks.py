@@ -0,0 +1,28 @@
+from unittest import TestCase
+import json
+import random
+import numpy
+from hri_api.benchmarks.geometry import run, make_backends, OPERATIONS
+
+__author__ = 'Jamie Diprose'
+
+
+class TestGeometryBenchmarks(TestCase):
+    def test_run(self):
+        report = run(sizes=[1, 10], min_time=0.0)
+        backends = set(r['backend'] for r in report['results'])
+
+        self.assertEqual(backends, set(['python', 'geom_math', 'point', 'numpy', 'point_array']))
+        self.assertEqual(set(r['operation'] for r in report['results']), set(['distance', 'infront', 'behind', 'left', 'right']))
+        self.assertEqual(len(report['results']), 2 * len(backends) * len(OPERATIONS))
+        self.assertTrue(all(r['seconds_per_call'] >= 0.0 and r['calls'] >= 3 for r in report['results']))
+        json.loads(json.dumps(report))
+
+    def test_backends_agree(self):
+        backends = make_backends(50, random.Random(0))
+
+        for operation in OPERATIONS:
+            expected = numpy.asarray(backends['python'][operation]())
+
+            for backend in backends:
+                numpy.testing.assert_allclose(numpy.asarray(backends[backend][operation]()), expected, rtol=1e-6)
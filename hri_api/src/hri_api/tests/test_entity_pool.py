@@ -0,0 +1,76 @@
+from unittest import TestCase
+from hri_api.entities import EntityPool
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeEntity(object):
+    last_id = 0
+
+    def __init__(self, local_id):
+        self.local_id = local_id
+        self.visible = True
+        self.entity_id = FakeEntity.new_id()
+
+    @classmethod
+    def make(cls, local_id):
+        return FakeEntity(local_id)
+
+    @staticmethod
+    def new_id():
+        FakeEntity.last_id += 1
+        return str(FakeEntity.last_id)
+
+    def get_id(self):
+        return self.entity_id
+
+    def set_id(self, entity_id):
+        self.entity_id = entity_id
+
+    def set_visible(self, visible):
+        self.visible = visible
+
+    def reset(self):
+        self.visible = True
+
+
+class TestEntityPool(TestCase):
+    def setUp(self):
+        self.pool = EntityPool()
+
+    def test_live_reuse(self):
+        a = self.pool.acquire(FakeEntity, 1)
+        a.visible = False
+        b = self.pool.acquire(FakeEntity, 1)
+        self.assertTrue(a is b)
+        self.assertTrue(b.visible)
+        self.assertFalse(self.pool.acquire(FakeEntity, 2) is a)
+        self.assertAlmostEqual(self.pool.hit_rate(), 1.0 / 3.0)
+
+    def test_release(self):
+        a = self.pool.acquire(FakeEntity, 1)
+        a_id = a.get_id()
+        self.pool.release(a)
+        b = self.pool.acquire(FakeEntity, 1)
+
+        self.assertFalse(b is a)
+        self.assertNotEqual(b.get_id(), a_id)
+        self.assertEqual(a.get_id(), a_id)
+        self.assertFalse(a.visible)
+
+    def test_release_twice(self):
+        a = self.pool.acquire(FakeEntity, 1)
+        self.pool.release(a)
+        b = self.pool.acquire(FakeEntity, 1)
+        self.pool.release(a)
+        self.assertTrue(self.pool.acquire(FakeEntity, 1) is b)
+
+    def test_live_keeps_id(self):
+        a = self.pool.acquire(FakeEntity, 1)
+        a_id = a.get_id()
+        self.assertEqual(self.pool.acquire(FakeEntity, 1).get_id(), a_id)
+
+    def test_restore_id(self):
+        a = self.pool.acquire(FakeEntity, 1)
+        self.pool.release(a)
+        self.assertEqual(self.pool.acquire(FakeEntity, 1, '42').get_id(), '42')
@@ -0,0 +1,53 @@
+from unittest import TestCase
+import math
+from hri_api.entities import Entity, SpatialRelationTable
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeWorld(object):
+    def __init__(self, relations):
+        self.relations = relations
+        self.relations_max_age = 1.0
+
+
+class FakeEntity(Entity):
+    def __init__(self, world, tf_frame):
+        # Entity.__init__ would start a node
+        self.entity_id = Entity.new_id()
+        self.world = world
+        self.entity_type = 'fake'
+        self.tf_frame_prefix = tf_frame
+        self.parent = None
+        self.visible = True
+
+    def default_tf_frame_id(self):
+        return self.tf_frame_prefix
+
+    def translation_to(self, target):
+        raise AssertionError("relation should have been read from the table")
+
+
+class TestEntityRelations(TestCase):
+    def setUp(self):
+        world = FakeWorld(None)
+        self.robot = FakeEntity(world, 'base_link')
+        self.person = FakeEntity(world, 'person_head')  # Facing the robot
+        self.other = FakeEntity(world, 'other_head')    # Facing the same way as the robot
+        world.relations = SpatialRelationTable(0.0, 'base_link', [self.person.get_id(), self.other.get_id()],
+                                               [[2.0, 0.0, 0.0], [3.0, 1.0, 0.0]],
+                                               [[0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+
+    def test_robot_relations(self):
+        self.assertTrue(self.robot.is_infront_of(self.person))
+        self.assertTrue(self.robot.is_left_of(self.other))
+        self.assertAlmostEqual(self.person.distance_to(self.robot), 2.0)
+
+    def test_person_relations(self):
+        self.assertTrue(self.person.is_infront_of(self.robot))
+        self.assertTrue(self.person.is_behind(self.other))
+        self.assertTrue(self.person.is_right_of(self.other))
+        self.assertTrue(self.other.is_behind(self.person))
+        self.assertTrue(self.other.is_right_of(self.person))
+        self.assertAlmostEqual(self.other.distance_to(self.person), math.sqrt(2.0))
+        self.assertAlmostEqual(self.other.distance_to(self.robot), math.sqrt(10.0))
@@ -0,0 +1,75 @@
+from unittest import TestCase
+import rospy
+from hri_api.entities import Entity, WorldHistory, MotionPredictor
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeWorld(object):
+    def __init__(self, history, predictor=None):
+        self.history = history
+        self.predictor = predictor
+
+
+class FakeEntity(Entity):
+    def __init__(self, world):
+        # Entity.__init__ would start a node
+        self.entity_id = Entity.new_id()
+        self.world = world
+        self.entity_type = 'fake'
+        self.tf_frame_prefix = 'fake' + self.entity_id
+        self.parent = None
+        self.visible = True
+
+
+class TestEntityVelocity(TestCase):
+    def setUp(self):
+        history = WorldHistory(capacity=10, max_entities=4, velocity_window=1.0)
+        world = FakeWorld(history)
+        self.robot = FakeEntity(world)      # At the origin, not tracked by the history
+        self.person = FakeEntity(world)
+        self.other = FakeEntity(world)
+
+        for t in range(5):
+            history.append(float(t), [self.person.get_id(), self.other.get_id()],
+                           [[4.0 - t, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    def test_robot_to_person(self):
+        self.assertAlmostEqual(self.robot.velocity(self.person), -1.0)
+
+    def test_person_to_robot(self):
+        self.assertAlmostEqual(self.person.velocity(self.robot), -1.0)
+
+    def test_tracked_pair(self):
+        self.assertTrue(self.person.velocity(self.other) < 0.0)
+        self.assertAlmostEqual(self.other.velocity(self.other), 0.0)
+
+    def test_untracked_pair(self):
+        self.assertEqual(self.robot.velocity(FakeEntity(self.robot.world)), 0.0)
+
+
+class TestEntityPrediction(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        predictor = MotionPredictor(max_age=1.0)
+        world = FakeWorld(None, predictor)
+        self.robot = FakeEntity(world)      # At the origin, not tracked by the predictor
+        self.person = FakeEntity(world)
+        self.other = FakeEntity(world)
+        now = rospy.get_time()
+
+        for i in range(10):
+            t = now - 0.9 + i * 0.1
+            predictor.update(t, [self.person.get_id(), self.other.get_id()], [[2.0 + t - now, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    def test_predicted_position(self):
+        position = self.robot.predicted_position(self.person, 0.5)
+        self.assertAlmostEqual(position.x, 2.5, places=1)
+        self.assertAlmostEqual(position.y, 0.0, places=2)
+
+        position = self.other.predicted_position(self.person)
+        self.assertAlmostEqual(position.x, 2.0, places=2)
+        self.assertAlmostEqual(position.y, -1.0, places=2)
+
+    def test_unknown(self):
+        self.assertEqual(self.person.predicted_position(self.robot), None)
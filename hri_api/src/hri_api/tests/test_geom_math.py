@@ -3,8 +3,10 @@ from unittest import TestCase
 __author__ = 'Jamie Diprose'
 
 from geometry_msgs.msg import Point
-from hri_api.math import GeomMath
+from hri_api.math import GeomMath, PointArray
 import math
+import random
+import numpy
 
 class TestGeomMath(TestCase):
     def __init__(self, *args, **kwargs):
@@ -17,7 +19,7 @@ class TestGeomMath(TestCase):
 
     def test_distance_to(self):
         distance = GeomMath.distance_between(self.center, self.infront)
-        self.assertEqual(distance, math.sqrt(3))
+        self.assertEqual(distance, 1.0)
 
     def test_is_infront_of(self):
         self.assertTrue(GeomMath.is_infront_of(self.infront, self.center))
@@ -35,4 +37,48 @@ class TestGeomMath(TestCase):
         self.assertTrue(GeomMath.is_right_of(self.right, self.center))
         self.assertFalse(GeomMath.is_right_of(self.left, self.center))
 
+    def test_arrays(self):
+        points = GeomMath.to_array([self.infront, self.behind, self.left, self.right])
+        numpy.testing.assert_allclose(GeomMath.distances_between(points, self.center), [1.0, 1.0, 1.0, 1.0])
+        self.assertEqual(GeomMath.are_infront_of(points, self.center).tolist(), [True, False, True, True])
+        self.assertEqual(GeomMath.are_left_of(points, self.center).tolist(), [True, True, True, False])
 
+    def test_point_array(self):
+        points = PointArray([[2.0, 1.0, 0.0], [0.0, 1.0, 0.0], [1.0, 2.0, 0.0]])
+
+        self.assertEqual(GeomMath.to_array(points).shape, (3, 3))
+        self.assertEqual(GeomMath.distances_between(points, self.center).tolist(), [1.0, 1.0, 1.0])
+        self.assertEqual(GeomMath.are_infront_of(points, self.center).tolist(), [True, False, True])
+        self.assertEqual(GeomMath.are_behind(points, self.center).tolist(), [False, True, False])
+        self.assertEqual(GeomMath.are_left_of(points, self.center).tolist(), [True, True, True])
+        self.assertEqual(GeomMath.are_right_of(points, PointArray([[0.0, 3.0, 0.0]])).tolist(), [True, True, True])
+        self.assertEqual(GeomMath.distances_between(points.array, points).tolist(), [0.0, 0.0, 0.0])
+
+
+class TestGeomMathAgreement(TestCase):
+    """ The scalar and array versions agree on randomly generated points, including points that share coordinates """
+
+    def random_point(self, rng):
+        return Point(*[rng.choice([rng.uniform(-10.0, 10.0), float(rng.randint(-2, 2))]) for i in range(3)])
+
+    def test_agreement(self):
+        rng = random.Random(1234)
+
+        for trial in range(50):
+            n = rng.randint(1, 20)
+            p1 = [self.random_point(rng) for i in range(n)]
+            p2 = [self.random_point(rng) for i in range(n)]
+
+            distances = GeomMath.distances_between(p1, p2)
+            masks = [(GeomMath.are_infront_of(p1, p2), GeomMath.is_infront_of),
+                     (GeomMath.are_behind(p1, p2), GeomMath.is_behind),
+                     (GeomMath.are_left_of(p1, p2), GeomMath.is_left_of),
+                     (GeomMath.are_right_of(p1, p2), GeomMath.is_right_of)]
+
+            for i in range(n):
+                expected = math.sqrt((p1[i].x - p2[i].x) ** 2 + (p1[i].y - p2[i].y) ** 2 + (p1[i].z - p2[i].z) ** 2)
+                self.assertAlmostEqual(GeomMath.distance_between(p1[i], p2[i]), expected)
+                self.assertAlmostEqual(distances[i], expected)
+
+                for mask, scalar in masks:
+                    self.assertEqual(bool(mask[i]), scalar(p1[i], p2[i]))
@@ -0,0 +1,30 @@
+from unittest import TestCase
+from hri_api.util import LRUCache
+
+__author__ = 'Jamie Diprose'
+
+
+class TestLRUCache(TestCase):
+    def test_eviction(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)    # 'b' is now the least recently used
+        cache.put('c', 3)
+
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_get_or_create(self):
+        cache = LRUCache()
+        calls = []
+
+        def create():
+            calls.append(1)
+            return None
+
+        self.assertEqual(cache.get_or_create('a', create), None)
+        self.assertEqual(cache.get_or_create('a', create), None)
+        self.assertEqual(len(calls), 1)
+        self.assertAlmostEqual(cache.hit_rate(), 0.5)
@@ -0,0 +1,34 @@
+from unittest import TestCase
+from hri_api.entities import MotionPredictor
+
+__author__ = 'Jamie Diprose'
+
+
+class TestMotionPredictor(TestCase):
+    def setUp(self):
+        self.predictor = MotionPredictor(max_age=1.0)
+
+        for i in range(30):
+            t = i * 0.1
+            self.predictor.update(t, ['walking', 'standing'], [[t, 0.0, 0.0], [2.0, 1.0, 0.0]])
+
+    def test_predict(self):
+        walking = self.predictor.predict('walking', 3.1)
+        self.assertAlmostEqual(walking[0], 3.1, places=3)
+        standing = self.predictor.predict('standing', 3.1)
+        self.assertAlmostEqual(standing[0], 2.0, places=3)
+        self.assertAlmostEqual(standing[1], 1.0, places=3)
+
+    def test_stale(self):
+        self.assertEqual(self.predictor.predict('walking', 5.0), None)
+        self.assertEqual(self.predictor.predict('unknown', 3.0), None)
+
+    def test_predict_all(self):
+        entity_ids, positions = self.predictor.predict_all(3.0)
+        self.assertEqual(entity_ids, ['walking', 'standing'])
+        self.assertEqual(positions.shape, (2, 3))
+
+    def test_remove(self):
+        self.predictor.remove('walking')
+        self.assertFalse('walking' in self.predictor)
+        self.assertAlmostEqual(self.predictor.predict('standing', 3.0)[0], 2.0, places=3)
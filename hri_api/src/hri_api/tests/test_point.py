@@ -0,0 +1,70 @@
+from unittest import TestCase
+import math
+import numpy
+import geometry_msgs.msg
+from hri_api.math import Point, PurePoint, PointArray, POINT_COMPILED
+
+__author__ = 'Jamie Diprose'
+
+
+class TestPoint(TestCase):
+    def check_point(self, cls):
+        a = cls(1.0, 2.0, 2.0)
+        b = cls(1.0, 0.0, 0.0)
+
+        self.assertEqual(a.length(), 3.0)
+        self.assertEqual(a.distance_to(b), math.sqrt(8.0))
+
+        c = a.add(b).subtract(b).multiply(2.0)
+        self.assertEqual((c.x, c.y, c.z), (2.0, 4.0, 4.0))
+        self.assertAlmostEqual(c.normalize().length(), 1.0)
+
+    def test_pure_point(self):
+        self.check_point(PurePoint)
+
+    def test_point(self):
+        self.check_point(Point)
+
+    def test_compiled_point(self):
+        try:
+            from hri_api.math import _point
+        except ImportError:
+            self.skipTest("the compiled Point extension hasn't been built")
+
+        self.assertTrue(POINT_COMPILED)
+        self.assertTrue(Point is _point.Point)
+        self.check_point(_point.Point)
+
+    def test_mixed_points(self):
+        for cls, other in [(Point, PurePoint), (PurePoint, Point), (Point, geometry_msgs.msg.Point)]:
+            a = cls(1.0, 2.0, 2.0)
+            b = other(1.0, 0.0, 0.0)
+
+            self.assertEqual(a.distance_to(b), math.sqrt(8.0))
+            c = a.add(b).subtract(b)
+            self.assertEqual((c.x, c.y, c.z), (1.0, 2.0, 2.0))
+
+
+class TestPointArray(TestCase):
+    def setUp(self):
+        self.points = PointArray.from_points([Point(3.0, 4.0, 0.0), Point(0.0, 0.0, 0.0), Point(1.0, 2.0, 2.0)])
+
+    def test_views(self):
+        self.assertTrue(self.points.array.flags['C_CONTIGUOUS'])
+        self.points.x[1] = 5.0
+        self.assertEqual(self.points[1].x, 5.0)
+
+        self.points[1] = Point(1.0, 1.0, 1.0)
+        self.assertEqual(self.points.array[1].tolist(), [1.0, 1.0, 1.0])
+
+    def test_batch(self):
+        numpy.testing.assert_allclose(self.points.lengths(), [5.0, 0.0, 3.0])
+        numpy.testing.assert_allclose(self.points.normalize().lengths(), [1.0, 0.0, 1.0])
+        numpy.testing.assert_allclose(self.points.add(Point(1.0, 0.0, 0.0)).x, [4.0, 1.0, 2.0])
+        numpy.testing.assert_allclose(self.points.subtract(self.points).lengths(), [0.0, 0.0, 0.0])
+        numpy.testing.assert_allclose(self.points.multiply(2.0).lengths(), [10.0, 0.0, 6.0])
+        numpy.testing.assert_allclose(self.points.distances_to(Point(0.0, 0.0, 0.0)), [5.0, 0.0, 3.0])
+
+    def test_matches_point(self):
+        for i, p in enumerate(self.points):
+            self.assertAlmostEqual(self.points.distances_to(Point(1.0, 1.0, 1.0))[i], p.distance_to(Point(1.0, 1.0, 1.0)))
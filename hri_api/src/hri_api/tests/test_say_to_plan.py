@@ -0,0 +1,69 @@
+from unittest import TestCase
+from enum import Enum
+from hri_api.entities.robot import SayToPlan
+
+__author__ = 'Jamie Diprose'
+
+
+class Expression(Enum):
+    smile = 1
+
+
+class Gesture(Enum):
+    wave = 1
+
+
+class WordTimingsService(object):
+    """ Every word takes 0.5 seconds to say """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, sentence):
+        self.calls.append(sentence)
+        self.word_starts = [i * 0.5 for i in range(len(sentence.split()))]
+        self.word_ends = [start + 0.5 for start in self.word_starts]
+        return self
+
+
+class TestSayToPlan(TestCase):
+    text = "Hello <smile>my name is</smile> Bob, <wave target='1'>nice to</wave> meet you."
+
+    def test_split(self):
+        sentence, tags = SayToPlan.split(self.text)
+        self.assertEqual(sentence, "Hello my name is Bob, nice to meet you.")
+        self.assertEqual([(tag, start, end) for tag, attributes, start, end in tags], [('smile', 1, 4), ('wave', 5, 7)])
+
+    def test_compile(self):
+        service = WordTimingsService()
+        compiled = SayToPlan.compile(self.text, Expression, Gesture, service)
+
+        self.assertEqual(compiled.expression_lookup[1].expression, 'smile')
+        self.assertEqual(compiled.expression_lookup[1].duration, 1.5)
+        self.assertEqual(compiled.gesture_lookup[5].target, '1')
+        self.assertEqual(compiled.gesture_lookup[5].duration, 1.0)
+        self.assertEqual(service.calls, ["Hello my name is Bob, nice to meet you."])
+
+    def test_compile_no_tags(self):
+        service = WordTimingsService()
+        SayToPlan.compile("Hello there.", Expression, Gesture, service)
+        self.assertEqual(service.calls, [])
+
+    def test_duration(self):
+        timings = WordTimingsService()("one two three")
+        self.assertEqual(SayToPlan.duration(timings, 0, 3), 1.5)
+        self.assertEqual(SayToPlan.duration(timings, 1, 10), 1.0)
+        self.assertEqual(SayToPlan.duration(timings, 2, 2), 0.0)
+
+    def test_unknown_tag(self):
+        self.assertRaises(TypeError, SayToPlan.compile, "<nod>Hello</nod>", Expression, Gesture, WordTimingsService())
+
+    def test_cached(self):
+        plan = SayToPlan(None)
+        service = WordTimingsService()
+
+        plan.compiled_plans.get_or_create((self.text, Expression, Gesture), lambda: SayToPlan.compile(self.text, Expression, Gesture, service))
+        compiled = plan.compiled_plans.get_or_create((self.text, Expression, Gesture), lambda: SayToPlan.compile(self.text, Expression, Gesture, service))
+
+        self.assertEqual(len(service.calls), 1)
+        self.assertEqual(compiled.sentence, "Hello my name is Bob, nice to meet you.")
@@ -0,0 +1,67 @@
+from unittest import TestCase
+import rospy
+from hri_api.util import PooledServiceClient, ServiceClientPool
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeProxy(object):
+    def __init__(self, failures):
+        self.failures = failures
+        self.closed = False
+
+    def __call__(self, value):
+        if self.failures:
+            self.failures.pop()
+            raise rospy.ServiceException("connection lost")
+        return value * 2
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient(PooledServiceClient):
+    """ Connects to FakeProxies, the first failures of which raise ServiceExceptions """
+
+    def __init__(self, failures, retries=3):
+        PooledServiceClient.__init__(self, 'fake_service', object, retries=retries, backoff=0.0)
+        self.failures = [None] * failures
+        self.proxies = []
+
+    def connect(self):
+        self.stats.connects += 1
+        self.proxies.append(FakeProxy(self.failures))
+        return self.proxies[-1]
+
+
+class TestServiceClientPool(TestCase):
+    def test_persistent(self):
+        client = FakeClient(0)
+        self.assertEqual(client(1), 2)
+        self.assertEqual(client(2), 4)
+
+        self.assertEqual(len(client.proxies), 1)
+        self.assertEqual(client.stats.calls, 2)
+        self.assertEqual(client.stats.errors, 0)
+
+    def test_reconnect(self):
+        client = FakeClient(2)
+        self.assertEqual(client(3), 6)
+
+        self.assertEqual(len(client.proxies), 3)
+        self.assertTrue(client.proxies[0].closed)
+        self.assertEqual(client.stats.errors, 2)
+        self.assertEqual(client.stats.connects, 3)
+
+    def test_gives_up(self):
+        client = FakeClient(2, retries=2)
+        self.assertRaises(rospy.ServiceException, client, 1)
+        self.assertEqual(client.proxy, None)
+
+    def test_pool(self):
+        pool = ServiceClientPool()
+        client = pool.get('pooled_service', int)
+
+        self.assertTrue(pool.get('pooled_service', int) is client)
+        self.assertTrue(pool.stats()[client.resolved_name] is client.stats)
+        self.assertRaises(TypeError, pool.get, 'pooled_service', float)
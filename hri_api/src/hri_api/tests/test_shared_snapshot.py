@@ -0,0 +1,63 @@
+from unittest import TestCase
+import os
+import tempfile
+from hri_api.util import SharedSnapshotWriter, SharedSnapshotReader
+
+__author__ = 'Jamie Diprose'
+
+
+class TestSharedSnapshot(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.writer = SharedSnapshotWriter(self.path, capacity=2)
+        self.reader = SharedSnapshotReader(self.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        os.remove(self.path)
+
+    def test_empty(self):
+        snapshot = self.reader.read()
+        self.assertEqual(snapshot.version, 0)
+        self.assertEqual(len(snapshot), 0)
+
+    def test_read(self):
+        self.writer.write(1.0, 7, ['person'], [11, 12], [0, 0], ['person1_head', 'person2_head'], [[1, 2, 3], [4, 5, 6]])
+        snapshot = self.reader.read()
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(snapshot.event_seq, 7)
+        self.assertEqual(snapshot.tf_frame('12'), 'person2_head')
+        self.assertEqual(snapshot.entity_type(11), 'person')
+        self.assertEqual(list(snapshot.position(11)), [1.0, 2.0, 3.0])
+        self.assertEqual(snapshot.tf_frame(13), None)
+
+    def test_double_buffering(self):
+        self.writer.write(1.0, 1, ['person'], [11], [0], ['person1_head'], [[0, 0, 0]])
+        self.writer.write(2.0, 2, ['person'], [12, 13, 14], [0, 0, 0], ['a', 'b', 'c'], [[0, 0, 0]] * 3)
+        snapshot = self.reader.read()
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(snapshot.tf_frame(11), None)
+
+    def test_skipped(self):
+        long_frame = 'person3_' + 'x' * 60
+        skipped = self.writer.write(1.0, 1, ['person'], [11, 12, 13], [0, 0, 0], ['a', long_frame, 'c'], [[0, 0, 0]] * 3)
+        snapshot = self.reader.read()
+
+        # The frame that doesn't fit is left out rather than cut short, making room for the next entity
+        self.assertEqual(skipped, [12])
+        self.assertEqual(snapshot.tf_frame(12), None)
+        self.assertEqual(snapshot.tf_frame(13), 'c')
+        self.assertEqual(self.writer.write(2.0, 2, ['person'], [11, 12, 13], [0, 0, 0], ['a', 'b', 'c'], [[0, 0, 0]] * 3), [13])
+
+    def test_new_writer(self):
+        self.assertTrue(self.reader.is_current())
+        writer = SharedSnapshotWriter(self.path, capacity=2)
+        writer.write(1.0, 1, ['person'], [11], [0], ['person1_head'], [[0, 0, 0]])
+
+        # The old file is replaced rather than truncated, so readers that still map it can read it safely
+        self.assertFalse(self.reader.is_current())
+        self.assertEqual(self.reader.read().version, 0)
+        writer.close()
@@ -0,0 +1,71 @@
+from unittest import TestCase
+import numpy
+import tf
+from hri_api.entities import Person
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeListener(object):
+    """ Knows every joint of person1 except the ones in missing, at x = the joint's index in Person.JOINTS. Joints are
+        known up to time 7.0, or the time given for them in latest, and can't be extrapolated beyond it.
+    """
+
+    def __init__(self, missing=(), latest=None):
+        self.missing = missing
+        self.latest = latest or {}
+        self.lookups = []
+
+    def latest_time(self, frame):
+        joint = frame[len('person1_'):]
+
+        if joint in self.missing:
+            raise tf.Exception(frame)
+
+        return self.latest.get(joint, 7.0)
+
+    def getLatestCommonTime(self, source_frame, target_frame):
+        return self.latest_time(target_frame)
+
+    def lookupTransform(self, target_frame, source_frame, stamp):
+        self.lookups.append((target_frame, source_frame, stamp))
+
+        if stamp > self.latest_time(source_frame):
+            raise tf.ExtrapolationException(source_frame)
+
+        joint = source_frame[len('person1_'):]
+        return [float(Person.JOINTS.index(joint)), 1.0, 2.0], [0.0, 0.0, 0.0, 1.0]
+
+
+class TestSkeletonPose(TestCase):
+    def setUp(self):
+        self.person = Person(1)
+
+    def test_skeleton_pose(self):
+        listener = FakeListener()
+        self.person.tl = listener
+        pose = self.person.skeleton_pose('base_link')
+
+        self.assertEqual(pose.shape, (len(Person.JOINTS), 3))
+        self.assertEqual(pose[:, 0].tolist(), [float(i) for i in range(len(Person.JOINTS))])
+        self.assertEqual([lookup[1] for lookup in listener.lookups], ['person1_' + joint for joint in Person.JOINTS])
+
+        # Every joint comes from the person's one listener, relative to the reference, at one common time
+        self.assertEqual(set(lookup[0] for lookup in listener.lookups), set(['base_link']))
+        self.assertEqual(set(lookup[2] for lookup in listener.lookups), set([7.0]))
+
+    def test_missing_joint(self):
+        self.person.tl = FakeListener(missing=('left_hand',))
+        pose = self.person.skeleton_pose('base_link')
+
+        self.assertTrue(numpy.isnan(pose[Person.JOINTS.index('left_hand')]).all())
+        self.assertEqual(pose[Person.JOINTS.index('head')].tolist(), [0.0, 1.0, 2.0])
+
+    def test_joint_behind(self):
+        # A hand published behind the torso is still resolved, and the rest of the pose is taken at its time
+        listener = FakeListener(latest={'left_hand': 6.5})
+        self.person.tl = listener
+        pose = self.person.skeleton_pose('base_link')
+
+        self.assertFalse(numpy.isnan(pose).any())
+        self.assertEqual(set(lookup[2] for lookup in listener.lookups), set([6.5]))
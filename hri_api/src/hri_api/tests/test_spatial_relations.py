@@ -0,0 +1,41 @@
+from unittest import TestCase
+import math
+import numpy
+from hri_api.entities import SpatialRelationTable
+
+__author__ = 'Jamie Diprose'
+
+
+class TestSpatialRelationTable(TestCase):
+    def setUp(self):
+        self.table = SpatialRelationTable(10.0, 'base_link', ['1', '2', '3'],
+                                          [[2.0, 1.0, 0.0], [-1.0, -1.0, 0.0], [3.0, -4.0, 0.0]])
+
+    def test_relations(self):
+        self.assertEqual(self.table.infront.tolist(), [True, False, True])
+        self.assertEqual(self.table.behind.tolist(), [False, True, False])
+        self.assertEqual(self.table.left.tolist(), [True, False, False])
+        self.assertEqual(self.table.right.tolist(), [False, True, True])
+
+    def test_lookup(self):
+        self.assertAlmostEqual(self.table.distance('3'), 5.0)
+        self.assertAlmostEqual(self.table.bearing('2'), -3.0 * math.pi / 4.0)
+        self.assertEqual(self.table.distance('4'), None)
+        self.assertEqual(self.table.closest(), '2')
+        self.assertAlmostEqual(self.table.age(10.5), 0.5)
+
+    def test_empty(self):
+        table = SpatialRelationTable(0.0, 'base_link', [], [])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.closest(), None)
+
+    def test_relative_position(self):
+        table = SpatialRelationTable(0.0, 'base_link', ['1', '2'], [[2.0, 0.0, 0.0], [2.0, 1.0, 0.0]],
+                                     [[0.0, 0.0, 1.0, 0.0], [0.0, 0.0, math.sin(math.pi / 4.0), math.cos(math.pi / 4.0)]])
+
+        numpy.testing.assert_allclose(table.relative_position('base_link', '2'), [2.0, 1.0, 0.0])
+        numpy.testing.assert_allclose(table.relative_position('1', 'base_link'), [2.0, 0.0, 0.0], atol=1e-12)
+        numpy.testing.assert_allclose(table.relative_position('1', '2'), [0.0, -1.0, 0.0], atol=1e-12)
+        numpy.testing.assert_allclose(table.relative_position('2', '1'), [-1.0, 0.0, 0.0], atol=1e-12)
+        self.assertEqual(table.relative_position('1', '3'), None)
+        self.assertEqual(self.table.relative_position('1', 'base_link'), None)
@@ -0,0 +1,57 @@
+from unittest import TestCase
+from hri_api.util import validate, is_a, in_range, greater_than, all_of, optional, set_validation_enabled
+
+__author__ = 'Jamie Diprose'
+
+
+class Primitives(object):
+    @validate(target=is_a(str), speed=all_of(is_a(float), in_range(0.0, 1.0)))
+    def gaze(self, target, speed=0.5):
+        return target, speed
+
+    @validate(duration=optional(all_of(is_a(float), greater_than(0.0))))
+    def expression(self, name, duration=None):
+        return duration
+
+    @validate(handles=is_a(int))
+    def wait(self, *handles):
+        return handles
+
+
+class TestValidation(TestCase):
+    def setUp(self):
+        self.primitives = Primitives()
+
+    def test_pass(self):
+        self.assertEqual(self.primitives.gaze('person1'), ('person1', 0.5))
+        self.assertEqual(self.primitives.gaze('person1', speed=1.0), ('person1', 1.0))
+        self.assertEqual(self.primitives.expression('smile'), None)
+        self.assertEqual(self.primitives.expression('smile', duration=2.0), 2.0)
+        self.assertEqual(self.primitives.wait(1, 2), (1, 2))
+
+    def test_fail(self):
+        self.assertRaises(TypeError, self.primitives.gaze, 1)
+        self.assertRaises(TypeError, self.primitives.gaze, 'person1', 1)
+        self.assertRaises(TypeError, self.primitives.gaze, 'person1', speed=2.0)
+        self.assertRaises(TypeError, self.primitives.expression, 'smile', -1.0)
+        self.assertRaises(TypeError, self.primitives.wait, 1, 'a')
+
+    def test_message(self):
+        with self.assertRaises(TypeError) as cm:
+            self.primitives.gaze('person1', 2.0)
+
+        self.assertEqual(str(cm.exception), "gaze() parameter speed=2.0 is not between the range 0.0 - 1.0")
+
+    def test_unknown_parameter(self):
+        self.assertRaises(ValueError, validate(speed=is_a(float)), lambda target: target)
+
+    def test_disabled(self):
+        def gaze(target):
+            return target
+
+        set_validation_enabled(False)
+
+        try:
+            self.assertTrue(validate(target=is_a(str))(gaze) is gaze)
+        finally:
+            set_validation_enabled(True)
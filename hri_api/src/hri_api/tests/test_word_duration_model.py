@@ -0,0 +1,47 @@
+from unittest import TestCase
+from hri_api.util import WordDurationModel, split_words
+
+__author__ = 'Jamie Diprose'
+
+
+class Estimator(object):
+    """ Each word takes 0.1 seconds per letter, slower voices take twice as long """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, word, voice):
+        self.calls += 1
+        scale = 2.0 if voice == 'slow' else 1.0
+        return 0.1 * len(word) * scale
+
+
+class TestWordDurationModel(TestCase):
+    sentence = "Hi my name is Bob."
+
+    def test_split_words(self):
+        self.assertEqual(split_words(self.sentence), ['Hi', 'my', 'name', 'is', 'Bob.'])
+
+    def test_duration(self):
+        model = WordDurationModel(Estimator())
+        self.assertAlmostEqual(model.duration(self.sentence, 0, 5), 1.4)
+        self.assertAlmostEqual(model.duration(self.sentence, 2, 4), 0.6)
+        self.assertAlmostEqual(model.duration(self.sentence, 4, 10), 0.4)
+        self.assertEqual(model.duration(self.sentence, 3, 3), 0.0)
+
+    def test_estimated_once(self):
+        estimator = Estimator()
+        model = WordDurationModel(estimator)
+
+        for i in range(5):
+            model.duration(self.sentence, 0, i + 1)
+
+        self.assertEqual(estimator.calls, 5)
+        self.assertAlmostEqual(model.duration(self.sentence, 0, 2, voice='slow'), 0.8)
+        self.assertEqual(estimator.calls, 10)
+
+    def test_word_timings(self):
+        starts, ends = WordDurationModel(Estimator()).word_timings("a bb")
+        self.assertEqual(len(starts), 2)
+        self.assertAlmostEqual(starts[1], 0.1)
+        self.assertAlmostEqual(ends[1], 0.3)
@@ -0,0 +1,307 @@
+from unittest import TestCase
+import os
+import tempfile
+import threading
+import time
+import rospy
+from hri_api.query import Query
+from hri_api.entities import World, Entity, EntityPool, WorldEventLog, WorldEventType, WorldHistory, MotionPredictor
+from hri_api.entities import DeltaTracker
+from hri_api.util import WorldCheckpoint, CheckpointEntry
+
+__author__ = 'Jamie Diprose'
+
+
+class FakePublisher(object):
+    def __init__(self):
+        self.msgs = []
+
+    def publish(self, msg):
+        self.msgs.append(msg)
+
+
+class FakePerson(Entity):
+    def __init__(self, local_id, parent=None):
+        # Entity.__init__ would start a node
+        self.entity_id = Entity.new_id()
+        self.world = None
+        self.entity_type = 'person'
+        self.tf_frame_prefix = 'person' + str(local_id)
+        self.parent = parent
+        self.visible = True
+
+    @classmethod
+    def make(cls, local_id):
+        return FakePerson(local_id)
+
+    def default_tf_frame_id(self):
+        if self.parent is None:
+            return self.tf_frame_id() + '_head'
+        return self.tf_frame_id()
+
+
+class FakeListener(object):
+    def lookupTransform(self, target_frame, source_frame, stamp):
+        return [1.0, 2.0, 0.0], [0.0, 0.0, 0.0, 1.0]
+
+
+class FakeSnapshot(object):
+    def write(self, stamp, event_seq, type_names, entity_ids, type_codes, tf_frames, positions):
+        self.entity_ids = list(entity_ids)
+        self.tf_frames = list(tf_frames)
+        return []
+
+
+class FakeFederation(object):
+    def __init__(self):
+        self.deltas = []
+
+    def apply(self, delta):
+        self.deltas.append(delta)
+
+
+class FakeRequest(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def make_world(eviction_timeout=10.0, query_timeout=10.0):
+    """ A World with its entity bookkeeping, but without a node, services, timers or publishers """
+
+    world = World.__new__(World)
+    world.namespace = ''
+    world.entity_lock = threading.RLock()
+    world.entities = []
+    world.entity_id_lookup = {}
+    world.entity_origins = {}
+    world.entity_msgs = {}
+    world.entity_state_msgs = {}
+    world.query_responses = {}
+    world.query_state_responses = {}
+    world.pool = EntityPool()
+    world.events = WorldEventLog()
+    world.events_pub = FakePublisher()
+    world.history = WorldHistory(capacity=10, max_entities=4)
+    world.predictor = MotionPredictor()
+    world.checkpoint_dirty = False
+    world.eviction_timeout = eviction_timeout
+    world.query_timeout = query_timeout
+    world.invisible_since = {}
+    world.query_last_used = {}
+    world.tl = FakeListener()
+    world.reference_frame = 'base_link'
+    world.relations = None
+    world.state_pub = FakePublisher()
+    world.shared_snapshot = FakeSnapshot()
+    world.federation = None
+    world.type_codes = {}
+    world.type_names = []
+    return world
+
+
+class TestWorldTfFrames(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        self.world = make_world()
+        self.entity_id = self.world.add_entity(__name__, 'FakePerson', 1)
+        self.entity = self.world.entity_from_entity_id(self.entity_id)
+
+    def test_transports_agree(self):
+        self.world.tick()
+        tf_frame = self.world.tf_frame_service_callback(FakeRequest(entity_id=self.entity_id)).tf_frame
+
+        self.assertEqual(tf_frame, 'person1_head')
+        self.assertEqual(self.world.to_entity_state_msg(self.entity).tf_frame, tf_frame)
+        self.assertEqual(self.world.shared_snapshot.tf_frames, [tf_frame])
+        self.assertEqual(self.world.state_pub.msgs[-1].tf_frames, [tf_frame])
+
+
+class TestWorldEviction(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        self.world = make_world()
+        self.entity_id = self.world.add_entity(__name__, 'FakePerson', 1)
+        self.entity = self.world.entity_from_entity_id(self.entity_id)
+        self.world.history.append(rospy.get_time(), [self.entity_id], [[1.0, 0.0, 0.0]])
+
+    def test_visible_kept(self):
+        self.assertEqual(self.world.evict_expired(rospy.get_time() + 100.0), [])
+        self.assertTrue(self.entity_id in self.world.entity_id_lookup)
+
+    def test_evicted(self):
+        self.world.set_visibility(self.entity_id, False)
+        now = rospy.get_time()
+
+        self.assertEqual(self.world.evict_expired(now + 5.0), [])
+        self.assertEqual(self.world.evict_expired(now + 11.0), [self.entity_id])
+
+        event = self.world.events.since(0)[-1]
+        self.assertEqual(event.event_type, WorldEventType.ENTITY_EVICTED)
+        self.assertEqual(event.entity_id, self.entity_id)
+        self.assertEqual(len(self.world.events_pub.msgs), self.world.events.latest_seq())
+
+        self.assertFalse(self.entity_id in self.world.history.slot_lookup)
+        self.assertFalse(self.entity_id in self.world.entity_id_lookup)
+        self.assertFalse(self.entity in self.world.entities)
+        self.assertFalse((FakePerson, 1) in self.world.pool.live)
+
+    def test_parts_evicted(self):
+        head = FakePerson('head', self.entity)
+        self.world.add_to_world(head)
+        self.world.set_visibility(self.entity_id, False)
+        self.world.evict_expired(rospy.get_time() + 11.0)
+
+        self.assertFalse(head.get_id() in self.world.entity_id_lookup)
+        self.assertEqual(self.world.entities, [])
+
+    def test_eviction_off(self):
+        self.world.eviction_timeout = 0
+        self.world.set_visibility(self.entity_id, False)
+        self.assertEqual(self.world.evict_expired(rospy.get_time() + 100.0), [])
+
+    def test_query_expired(self):
+        query = Query([])
+        self.world.add_to_world(query)
+        self.assertEqual(self.world.evict_expired(rospy.get_time() + 11.0), [query.get_id()])
+
+        event = self.world.events.since(0)[-1]
+        self.assertEqual(event.event_type, WorldEventType.QUERY_EXPIRED)
+        self.assertFalse(query.get_id() in self.world.entity_id_lookup)
+
+
+class ExpiringQuery(Query):
+    """ A query that expires while it is being executed, as if the World's timer had expired it """
+
+    def __init__(self, world):
+        Query.__init__(self, [])
+        self.world = world
+
+    def execute(self):
+        self.world.remove_from_world(self)
+        return []
+
+
+class TestWorldQueryCaches(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        self.world = make_world()
+
+    def test_expired_while_executing(self):
+        query = ExpiringQuery(self.world)
+        self.world.add_to_world(query)
+
+        self.world.if_queryable_execute_callback(FakeRequest(entity_id=query.get_id()))
+        self.assertFalse(query.get_id() in self.world.query_responses)
+        self.assertFalse(query.get_id() in self.world.query_last_used)
+
+        self.world.add_to_world(query)
+        self.world.if_queryable_execute_states_callback(FakeRequest(entity_id=query.get_id(), include_positions=False))
+        self.assertFalse(query.get_id() in self.world.query_state_responses)
+
+    def test_type_codes(self):
+        names = ['type' + str(i) for i in range(200)]
+        threads = [threading.Thread(target=lambda offset=offset: [self.world.type_code(name) for name in names[offset::4]])
+                   for offset in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(self.world.type_names), sorted(names))
+        self.assertTrue(all(self.world.type_names[self.world.type_codes[name]] == name for name in names))
+
+
+class TestWorldReAdd(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        self.world = make_world()
+        self.entity_id = self.world.add_entity(__name__, 'FakePerson', 1)
+        self.world.history.append(rospy.get_time(), [self.entity_id], [[1.0, 0.0, 0.0]])
+        self.world.predictor.update(rospy.get_time(), [self.entity_id], [[1.0, 0.0, 0.0]])
+
+    def test_readd_while_visible(self):
+        seq = self.world.events.latest_seq()
+        self.assertEqual(self.world.add_entity(__name__, 'FakePerson', 1), self.entity_id)
+        self.assertEqual(self.world.events.latest_seq(), seq)
+
+    def test_readd_after_invisible(self):
+        self.world.set_visibility(self.entity_id, False)
+        seq = self.world.events.latest_seq()
+        entity_id = self.world.add_entity(__name__, 'FakePerson', 1)
+
+        # Whoever the tracker gave the local id to is a new entity, not the one that was lost
+        self.assertNotEqual(entity_id, self.entity_id)
+        self.assertTrue(self.world.entity_from_entity_id(entity_id).is_visible())
+        self.assertFalse(self.entity_id in self.world.entity_id_lookup)
+        self.assertFalse(self.entity_id in self.world.history.slot_lookup)
+        self.assertFalse(self.entity_id in self.world.predictor)
+        self.assertEqual([(event.event_type, event.entity_id) for event in self.world.events.since(seq)],
+                         [(WorldEventType.ENTITY_EVICTED, self.entity_id), (WorldEventType.ENTITY_ADDED, entity_id)])
+
+    def test_held_reference(self):
+        held = self.world.entity_from_entity_id(self.entity_id)
+        self.world.set_visibility(self.entity_id, False)
+        entity_id = self.world.add_entity(__name__, 'FakePerson', 1)
+
+        # A behaviour still holding the lost entity mustn't find that it has become whoever took its local id
+        self.assertFalse(self.world.entity_from_entity_id(entity_id) is held)
+        self.assertEqual(held.get_id(), self.entity_id)
+        self.assertFalse(held.is_visible())
+
+
+class TestWorldRestore(TestCase):
+    def setUp(self):
+        rospy.rostime.set_rostime_initialized(True)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_ids_not_reused(self):
+        # The checkpoint was written by an earlier process, which numbered its ids from its own epoch
+        epoch, last_id = Entity.id_epoch, Entity.last_id
+        Entity.id_epoch = None
+        earlier = [Entity.new_id(), Entity.new_id()]
+        Entity.id_epoch, Entity.last_id = epoch, last_id
+        time.sleep(0.002)
+
+        robot = FakePerson('robot')
+        WorldCheckpoint.write(self.path, [CheckpointEntry(entity_id, __name__, 'FakePerson', i, True)
+                                          for i, entity_id in enumerate(earlier)])
+        world = make_world()
+        world.checkpoint_path = self.path
+        world.restore_checkpoint()
+
+        self.assertEqual(sorted(world.entity_id_lookup.keys()), sorted(earlier))
+        self.assertFalse(robot.get_id() in world.entity_id_lookup)
+        self.assertFalse(world.add_entity(__name__, 'FakePerson', 5) in earlier)
+
+    def test_new_epoch(self):
+        Entity.last_id = Entity.IDS_PER_EPOCH - 1
+        a = int(Entity.new_id())
+        b = int(Entity.new_id())
+        self.assertTrue(b > a)
+        self.assertEqual(b % Entity.IDS_PER_EPOCH, 2)
+
+
+class TestWorldFederationFrame(TestCase):
+    def setUp(self):
+        self.world = make_world()
+        self.world.robot_id = 'a'
+        self.world.federation_frame = 'map'
+        self.world.federation = FakeFederation()
+        self.delta = DeltaTracker('b', 0.05, 50).delta(0.0, [1.0, 0.0, 0.0], ['1'], ['person'], [[2.0, 0.0, 0.0]])
+
+    def test_frame_set(self):
+        msg = World.to_world_delta_msg(self.delta, 'map')
+        self.assertEqual(msg.header.frame_id, 'map')
+
+        self.world.federation_callback(msg)
+        self.assertEqual([delta.entity_ids for delta in self.world.federation.deltas], [['1']])
+
+    def test_other_frame_rejected(self):
+        self.world.federation_callback(World.to_world_delta_msg(self.delta, 'odom'))
+        self.assertEqual(self.world.federation.deltas, [])
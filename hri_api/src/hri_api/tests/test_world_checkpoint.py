@@ -0,0 +1,40 @@
+from unittest import TestCase
+import os
+import tempfile
+from hri_api.util import WorldCheckpoint, CheckpointEntry
+
+__author__ = 'Jamie Diprose'
+
+
+class TestWorldCheckpoint(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        entries = [CheckpointEntry('3', 'hri_api.entities', 'Person', 1, True),
+                   CheckpointEntry('9', 'hri_api.entities', 'Person', 2, False),
+                   CheckpointEntry('12', 'my_robot.entities', 'Ball', 1, True)]
+
+        WorldCheckpoint.write(self.path, entries)
+        self.assertEqual(WorldCheckpoint.read(self.path), entries)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_empty(self):
+        WorldCheckpoint.write(self.path, [])
+        self.assertEqual(WorldCheckpoint.read(self.path), [])
+
+    def test_corrupt(self):
+        WorldCheckpoint.write(self.path, [CheckpointEntry('3', 'hri_api.entities', 'Person', 1, True)])
+
+        with open(self.path, 'r+b') as f:
+            f.seek(20)
+            f.write(b'X')
+
+        self.assertRaises(ValueError, WorldCheckpoint.read, self.path)
+
+    def test_not_a_checkpoint(self):
+        self.assertRaises(ValueError, WorldCheckpoint.read, self.path)
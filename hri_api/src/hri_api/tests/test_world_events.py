@@ -0,0 +1,34 @@
+from unittest import TestCase
+from hri_api.entities import WorldEventLog, WorldEventType
+from hri_api.util import EventLogTruncatedError
+
+__author__ = 'Jamie Diprose'
+
+
+class TestWorldEventLog(TestCase):
+    def setUp(self):
+        self.log = WorldEventLog(capacity=3)
+        self.log.append(0.0, WorldEventType.ENTITY_ADDED, '1')
+        self.log.append(1.0, WorldEventType.VISIBILITY_CHANGED, '1', False)
+
+    def test_sequence_numbers(self):
+        self.assertEqual(self.log.latest_seq(), 2)
+        self.assertEqual([event.seq for event in self.log.since(0)], [1, 2])
+
+    def test_since(self):
+        events = self.log.since(1)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].event_type, WorldEventType.VISIBILITY_CHANGED)
+        self.assertFalse(events[0].visible)
+        self.assertEqual(self.log.since(2), [])
+
+    def test_latest_and_since(self):
+        latest_seq, events = self.log.latest_and_since(1)
+        self.assertEqual(latest_seq, 2)
+        self.assertEqual([event.seq for event in events], [2])
+
+    def test_truncated(self):
+        self.log.append(2.0, WorldEventType.QUERY_REGISTERED, '2')
+        self.log.append(3.0, WorldEventType.ENTITY_EVICTED, '1')
+        self.assertRaises(EventLogTruncatedError, self.log.since, 0)
+        self.assertEqual([event.seq for event in self.log.since(1)], [2, 3, 4])
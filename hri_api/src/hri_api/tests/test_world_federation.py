@@ -0,0 +1,89 @@
+from unittest import TestCase
+from hri_api.entities import DeltaTracker, WorldFederation
+
+__author__ = 'Jamie Diprose'
+
+
+class StandInRobot(object):
+    """ Stands in for another robot's World: reports what it sees through a DeltaTracker """
+
+    def __init__(self, robot_id, origin, keyframe_interval=50):
+        self.origin = origin
+        self.tracker = DeltaTracker(robot_id, move_threshold=0.05, keyframe_interval=keyframe_interval)
+
+    def see(self, stamp, entities):
+        ids = sorted(entities.keys())
+        return self.tracker.delta(stamp, self.origin, ids, ['person'] * len(ids), [entities[e] for e in ids])
+
+
+class TestWorldFederation(TestCase):
+    def setUp(self):
+        self.federation = WorldFederation(association_radius=0.5, max_age=1.0)
+        self.a = StandInRobot('a', [0.0, 0.0, 0.0])
+        self.b = StandInRobot('b', [4.0, 0.0, 0.0])
+
+    def test_deduplicate(self):
+        # Both robots see the person at x=2, only robot a sees the one at x=-1
+        self.federation.apply(self.a.see(0.0, {'1': [2.0, 0.0, 0.0], '2': [-1.0, 0.0, 0.0]}))
+        self.federation.apply(self.b.see(0.0, {'7': [2.1, 0.1, 0.0]}))
+        entities = self.federation.merge(0.0)
+
+        self.assertEqual(len(entities), 2)
+        self.assertEqual(self.federation.track_of('a', '1'), self.federation.track_of('b', '7'))
+        self.assertNotEqual(self.federation.track_of('a', '1'), self.federation.track_of('a', '2'))
+
+    def test_same_robot_not_merged(self):
+        self.federation.apply(self.a.see(0.0, {'1': [2.0, 0.0, 0.0], '2': [2.1, 0.0, 0.0]}))
+        self.assertEqual(len(self.federation.merge(0.0)), 2)
+
+    def test_only_deltas_sent(self):
+        delta = self.a.see(0.0, {'1': [2.0, 0.0, 0.0], '2': [-1.0, 0.0, 0.0]})
+        self.assertTrue(delta.full)
+        self.assertEqual(len(delta), 2)
+
+        delta = self.a.see(0.1, {'1': [2.01, 0.0, 0.0], '2': [-1.5, 0.0, 0.0], '3': [0.0, 3.0, 0.0]})
+        self.assertFalse(delta.full)
+        self.assertEqual(delta.entity_ids, ['2', '3'])
+
+        delta = self.a.see(0.2, {'2': [-1.5, 0.0, 0.0], '3': [0.0, 3.0, 0.0]})
+        self.assertEqual(delta.entity_ids, [])
+        self.assertEqual(delta.removed_ids, ['1'])
+
+    def test_stable_tracks(self):
+        self.federation.apply(self.a.see(0.0, {'1': [2.0, 0.0, 0.0]}))
+        self.federation.apply(self.b.see(0.0, {'7': [2.1, 0.0, 0.0]}))
+        self.federation.merge(0.0)
+        track_id = self.federation.track_of('a', '1')
+
+        self.federation.apply(self.a.see(0.1, {'1': [2.3, 0.0, 0.0]}))
+        self.federation.apply(self.b.see(0.1, {'7': [2.4, 0.0, 0.0]}))
+        self.federation.merge(0.1)
+        self.assertEqual(self.federation.track_of('a', '1'), track_id)
+        self.assertEqual(self.federation.track_of('b', '7'), track_id)
+
+    def test_missed_delta(self):
+        robot = StandInRobot('c', [0.0, 0.0, 0.0], keyframe_interval=3)
+        self.assertTrue(self.federation.apply(robot.see(0.0, {'1': [1.0, 0.0, 0.0]})))
+        robot.see(0.1, {'1': [1.0, 0.0, 0.0], '2': [2.0, 0.0, 0.0]})
+        self.assertFalse(self.federation.apply(robot.see(0.2, {'1': [1.0, 0.0, 0.0], '2': [2.0, 0.0, 0.0]})))
+        self.assertEqual(len(self.federation.merge(0.2)), 0)
+
+        # The next full delta brings the robot's view back
+        self.assertTrue(self.federation.apply(robot.see(0.3, {'1': [1.0, 0.0, 0.0], '2': [2.0, 0.0, 0.0]})))
+        self.assertEqual(len(self.federation.merge(0.3)), 2)
+
+    def test_closest_to_any(self):
+        self.federation.apply(self.a.see(0.0, {'1': [2.0, 0.0, 0.0], '2': [-1.0, 0.0, 0.0]}))
+        self.federation.apply(self.b.see(0.0, {'7': [2.1, 0.0, 0.0], '8': [4.0, 0.5, 0.0]}))
+        self.federation.merge(0.0)
+        entity, robot_id, distance = self.federation.closest_to_any('person')
+
+        self.assertEqual(robot_id, 'b')
+        self.assertEqual(entity.members, [('b', '8')])
+        self.assertAlmostEqual(distance, 0.5)
+
+    def test_robot_dropped(self):
+        self.federation.apply(self.a.see(0.0, {'1': [2.0, 0.0, 0.0]}))
+        self.federation.apply(self.b.see(1.0, {'7': [3.0, 0.0, 0.0]}))
+        self.federation.merge(1.5)
+        self.assertEqual(self.federation.robots(), ['b'])
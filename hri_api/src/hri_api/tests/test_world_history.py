@@ -0,0 +1,51 @@
+from unittest import TestCase
+from hri_api.entities import WorldHistory
+
+__author__ = 'Jamie Diprose'
+
+
+class TestWorldHistory(TestCase):
+    def setUp(self):
+        self.history = WorldHistory(capacity=5, max_entities=2)
+
+        for t in range(5):
+            self.history.append(float(t), ['near', 'far'], [[0.5, 0.0, 0.0], [5.0 - t, 0.0, 0.0]])
+
+    def test_closest(self):
+        self.assertEqual(self.history.closest(), 'near')
+        self.assertEqual(self.history.closest(4.0), 'near')
+
+    def test_distances(self):
+        distances = self.history.distances(2.0)
+        self.assertAlmostEqual(distances['near'], 0.5)
+        self.assertAlmostEqual(distances['far'], 3.0)
+
+    def test_within_for(self):
+        self.assertEqual(self.history.within_for(1.0, 4.0), ['near'])
+        self.assertEqual(sorted(self.history.within_for(5.0, 4.0)), ['far', 'near'])
+        self.assertEqual(self.history.within_for(1.0, 10.0), [])
+
+    def test_capacity(self):
+        self.history.append(5.0, ['near'], [[0.0, 0.0, 0.0]])
+        self.assertEqual(len(self.history), 5)
+        self.assertEqual(self.history.append(6.0, ['new'], [[0.0, 0.0, 0.0]]), ['new'])
+
+    def test_slot_recycling(self):
+        for t in range(5, 10):
+            self.history.append(float(t), ['near'], [[0.0, 0.0, 0.0]])
+
+        self.assertEqual(self.history.append(10.0, ['new'], [[1.0, 0.0, 0.0]]), [])
+        self.assertEqual(self.history.snapshot()[0], ['new'])
+        self.assertTrue('far' not in self.history.slot_lookup)
+
+    def test_older_stamp(self):
+        self.assertRaises(ValueError, self.history.append, 1.0, [], [])
+
+    def test_motion(self):
+        self.history.velocity_window = 2.0
+        velocity = self.history.velocity('far')
+        self.assertAlmostEqual(velocity[0], -1.0)
+        self.assertAlmostEqual(self.history.velocity('near')[0], 0.0)
+        self.assertAlmostEqual(self.history.range_rates()['far'], -1.0)
+        self.assertAlmostEqual(self.history.relative_range_rate('far', 'near'), -1.0)
+        self.assertEqual(self.history.velocity('unknown'), None)
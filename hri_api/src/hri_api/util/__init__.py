@@ -1,4 +1,11 @@
 from .errors import *
 from .robot_config_parser import *
 from .singleton import *
-from .init_node import *
\ No newline at end of file
+from .init_node import *
+from .transform import *
+from .shared_snapshot import *
+from .world_checkpoint import *
+from .validation import *
+from .lru_cache import *
+from .words import *
+from .service_client_pool import *
\ No newline at end of file
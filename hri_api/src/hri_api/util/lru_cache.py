@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """ A thread safe cache that keeps the max_size most recently used values """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.values:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            value = self.values.pop(key)
+            self.values[key] = value
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.values.pop(key, None)
+            self.values[key] = value
+
+            if len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+
+    def get_or_create(self, key, create):
+        """ Return the value for key, calling create() to make it if it isn't cached. create() is called outside of
+            the lock, so slow ones don't hold up other threads.
+        """
+
+        value = self.get(key, LRUCache)
+
+        if value is LRUCache:
+            value = create()
+            self.put(key, value)
+
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+
+        if total == 0:
+            return 0.0
+        return float(self.hits) / total
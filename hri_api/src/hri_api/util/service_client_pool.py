@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+import threading
+import time
+import rospy
+from hri_api.util import Singleton
+
+
+class ServiceStats(object):
+    """ Call counts and latencies (in seconds) of one service """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.connects = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def record(self, latency):
+        self.calls += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def mean_latency(self):
+        if self.calls == 0:
+            return 0.0
+        return self.total_latency / self.calls
+
+    def __repr__(self):
+        return "ServiceStats(calls={0}, errors={1}, connects={2}, mean={3:.4f}s, max={4:.4f}s)".format(
+            self.calls, self.errors, self.connects, self.mean_latency(), self.max_latency)
+
+
+class PooledServiceClient(object):
+    """ A persistent connection to one service, shared by everything in the process that calls it. The connection is
+        made on the first call. When a call fails the connection is closed and the call retried on a new one, waiting
+        backoff seconds before the first retry and doubling the wait up to max_backoff; the last failure is raised.
+        Calls are serialised because a persistent connection can only carry one request at a time.
+    """
+
+    def __init__(self, name, service_class, retries=3, backoff=0.05, max_backoff=1.0):
+        self.resolved_name = rospy.resolve_name(name)
+        self.service_class = service_class
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = ServiceStats()
+        self.proxy = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        rospy.loginfo("connecting to %s", self.resolved_name)
+        self.stats.connects += 1
+        return rospy.ServiceProxy(self.resolved_name, self.service_class, persistent=True)
+
+    def wait_for_service(self, timeout=None):
+        rospy.ServiceProxy(self.resolved_name, self.service_class).wait_for_service(timeout)
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            backoff = self.backoff
+
+            for attempt in range(1, self.retries + 1):
+                if self.proxy is None:
+                    self.proxy = self.connect()
+
+                start = time.time()
+
+                try:
+                    response = self.proxy(*args, **kwargs)
+                except rospy.ServiceException as exc:
+                    self.stats.errors += 1
+                    self.proxy.close()
+                    self.proxy = None
+
+                    if attempt == self.retries:
+                        raise
+
+                    rospy.logwarn("%s: service did not process request, reconnecting: %s", self.resolved_name, exc)
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+                self.stats.record(time.time() - start)
+                return response
+
+    def close(self):
+        with self.lock:
+            if self.proxy is not None:
+                self.proxy.close()
+                self.proxy = None
+
+
+class ServiceClientPool():
+    """ The process wide set of PooledServiceClients, one per resolved service name, e.g.
+
+        add_entity_srv = ServiceClientPool().get('add_entity', AddEntity)
+    """
+
+    __metaclass__ = Singleton
+
+    def __init__(self):
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, service_class, **options):
+        """ Return the client for service name, creating it with options (see PooledServiceClient) if there isn't
+            one yet
+        """
+
+        resolved_name = rospy.resolve_name(name)
+
+        with self.lock:
+            client = self.clients.get(resolved_name)
+
+            if client is None:
+                client = PooledServiceClient(resolved_name, service_class, **options)
+                self.clients[resolved_name] = client
+
+            elif client.service_class is not service_class:
+                raise TypeError("ServiceClientPool: {0} is already a {1} service, not {2}".format(
+                    resolved_name, client.service_class.__name__, service_class.__name__))
+
+            return client
+
+    def stats(self):
+        """ Return a dictionary of ServiceStats by resolved service name """
+
+        with self.lock:
+            return dict((name, client.stats) for name, client in self.clients.items())
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+import mmap
+import os
+import struct
+import time
+import numpy
+
+
+class SharedSnapshotLayout(object):
+    """ Layout of a double buffered World snapshot in shared memory.
+
+        The file starts with a header holding a sequence counter, followed by two buffers. The writer fills the
+        buffer that readers aren't using and then flips the counter (seqlock style): the counter is odd while a write
+        is in progress and the active buffer is (counter // 2) % 2.
+    """
+
+    MAGIC = b'HRIW'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIQII')             # magic, layout version, sequence counter, capacity, max types
+    META = struct.Struct('<dQII')                 # stamp, event_seq, entity count, type count
+    TYPE_NAME_DTYPE = numpy.dtype('S32')
+    RECORD_DTYPE = numpy.dtype([('entity_id', '<i8'), ('type_code', 'u1'), ('tf_frame', 'S63'), ('position', '<f4', (3,))])
+
+    def __init__(self, capacity, max_types):
+        self.capacity = capacity
+        self.max_types = max_types
+        self.types_offset = SharedSnapshotLayout.META.size
+        self.records_offset = self.types_offset + max_types * SharedSnapshotLayout.TYPE_NAME_DTYPE.itemsize
+        self.buffer_size = self.records_offset + capacity * SharedSnapshotLayout.RECORD_DTYPE.itemsize
+        self.size = SharedSnapshotLayout.HEADER.size + 2 * self.buffer_size
+
+    def buffer_offset(self, index):
+        return SharedSnapshotLayout.HEADER.size + index * self.buffer_size
+
+    def views(self, mm, index):
+        """ Return numpy views (type_names, records) onto buffer index of mm, without copying """
+
+        offset = self.buffer_offset(index)
+        type_names = numpy.frombuffer(mm, SharedSnapshotLayout.TYPE_NAME_DTYPE, self.max_types, offset + self.types_offset)
+        records = numpy.frombuffer(mm, SharedSnapshotLayout.RECORD_DTYPE, self.capacity, offset + self.records_offset)
+        return type_names, records
+
+
+class SharedSnapshot(object):
+    def __init__(self, version, stamp, event_seq, type_names, records):
+        self.version = version
+        self.stamp = stamp
+        self.event_seq = event_seq
+        self.type_names = type_names
+        self.records = records
+        self.index_lookup = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def index(self, entity_id):
+        """ Return the row of entity_id in records, or None if it wasn't visible in this snapshot """
+
+        if self.index_lookup is None:
+            self.index_lookup = dict((int(e), i) for i, e in enumerate(self.records['entity_id']))
+
+        return self.index_lookup.get(int(entity_id))
+
+    def tf_frame(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return self.records['tf_frame'][i].decode('utf-8')
+
+    def position(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return self.records['position'][i]
+
+    def entity_type(self, entity_id):
+        i = self.index(entity_id)
+
+        if i is None:
+            return None
+        return self.type_names[self.records['type_code'][i]]
+
+
+class SharedSnapshotWriter(object):
+    """ Writes World snapshots to the file at path. The file is made under a temporary name and renamed into place, so
+        readers still mapping the file of an earlier writer are never truncated under them; they can tell that they
+        should reopen path because it no longer names the file they have mapped (see SharedSnapshotReader.is_current).
+    """
+
+    def __init__(self, path, capacity=256, max_types=16):
+        self.path = path
+        self.layout = SharedSnapshotLayout(capacity, max_types)
+        self.seq = 0
+
+        tmp_path = path + '.tmp'
+        fd = os.open(tmp_path, os.O_CREAT | os.O_TRUNC | os.O_RDWR, 0o644)
+
+        try:
+            os.ftruncate(fd, self.layout.size)
+            self.mm = mmap.mmap(fd, self.layout.size)
+        finally:
+            os.close(fd)
+
+        self.write_header()
+        self.buffers = [self.layout.views(self.mm, 0), self.layout.views(self.mm, 1)]
+        os.rename(tmp_path, path)
+
+    def write_header(self):
+        SharedSnapshotLayout.HEADER.pack_into(self.mm, 0, SharedSnapshotLayout.MAGIC, SharedSnapshotLayout.VERSION,
+                                              self.seq, self.layout.capacity, self.layout.max_types)
+
+    def write(self, stamp, event_seq, type_names, entity_ids, type_codes, tf_frames, positions):
+        """ Write a new snapshot and return the ids of the entities that couldn't be written: those beyond capacity,
+            and those whose tf frame is too long for a record. Type names beyond max_types are not written.
+        """
+
+        max_frame_length = SharedSnapshotLayout.RECORD_DTYPE['tf_frame'].itemsize
+        frames = [frame.encode('utf-8') for frame in tf_frames]
+        rows = [i for i, frame in enumerate(frames) if len(frame) <= max_frame_length][:self.layout.capacity]
+        written = set(rows)
+        skipped = [entity_id for i, entity_id in enumerate(entity_ids) if i not in written]
+        count = len(rows)
+        type_count = min(len(type_names), self.layout.max_types)
+        index = (self.seq // 2 + 1) % 2
+        buffer_type_names, records = self.buffers[index]
+
+        # Odd while writing: readers of the active buffer are unaffected, but know a write has started
+        self.seq += 1
+        self.write_header()
+
+        buffer_type_names[:type_count] = [name.encode('utf-8') for name in type_names[:type_count]]
+        records['entity_id'][:count] = [entity_ids[i] for i in rows]
+        records['type_code'][:count] = [type_codes[i] for i in rows]
+        records['tf_frame'][:count] = [frames[i] for i in rows]
+        records['position'][:count] = numpy.asarray(positions, dtype=numpy.float32).reshape(-1, 3)[rows]
+        SharedSnapshotLayout.META.pack_into(self.mm, self.layout.buffer_offset(index), stamp, event_seq, count, type_count)
+
+        self.seq += 1
+        self.write_header()
+        return skipped
+
+    def close(self):
+        self.buffers = None
+        self.mm.close()
+
+
+class SharedSnapshotReader(object):
+
+    def __init__(self, path, retries=100):
+        self.path = path
+        self.retries = retries
+
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+            self.file_id = (stat.st_dev, stat.st_ino)
+
+        magic, version, seq, capacity, max_types = SharedSnapshotLayout.HEADER.unpack_from(self.mm, 0)
+
+        if magic != SharedSnapshotLayout.MAGIC or version != SharedSnapshotLayout.VERSION:
+            raise ValueError("{0} is not a version {1} World snapshot".format(path, SharedSnapshotLayout.VERSION))
+
+        self.layout = SharedSnapshotLayout(capacity, max_types)
+        self.buffers = [self.layout.views(self.mm, 0), self.layout.views(self.mm, 1)]
+
+    def is_current(self):
+        """ Return False if path has been removed, or now names the file of a newer writer, e.g. a restarted World """
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+
+        return (stat.st_dev, stat.st_ino) == self.file_id
+
+    def seq(self):
+        return SharedSnapshotLayout.HEADER.unpack_from(self.mm, 0)[2]
+
+    def version(self):
+        """ Return the number of snapshots written so far """
+        return self.seq() // 2
+
+    def read(self):
+        """ Return a consistent copy of the active snapshot. Raises IOError if the writer kept overwriting it. """
+
+        for i in range(self.retries):
+            start = self.seq()
+            index = (start // 2) % 2
+            stamp, event_seq, count, type_count = SharedSnapshotLayout.META.unpack_from(self.mm, self.layout.buffer_offset(index))
+            type_names, records = self.buffers[index]
+            type_names = [name.decode('utf-8') for name in type_names[:type_count]]
+            records = records[:count].copy()
+
+            # The active buffer is only rewritten once the writer has started its second write after start
+            if self.seq() < (start | 1) + 2:
+                return SharedSnapshot(start // 2, stamp, event_seq, type_names, records)
+
+            time.sleep(0)
+
+        raise IOError("couldn't read a consistent snapshot from {0}".format(self.path))
+
+    def close(self):
+        self.buffers = None
+        self.mm.close()
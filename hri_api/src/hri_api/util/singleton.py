@@ -6,4 +6,15 @@ class Singleton(type):
     def __call__(cls, *args, **kwargs):
         if cls not in cls._instances:
             cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
\ No newline at end of file
+        return cls._instances[cls]
+
+
+class NamespacedSingleton(type):
+    """ Like Singleton, but with one instance per namespace, given as the first constructor argument """
+
+    _instances = {}
+    def __call__(cls, namespace='', *args, **kwargs):
+        key = (cls, namespace)
+        if key not in cls._instances:
+            cls._instances[key] = super(NamespacedSingleton, cls).__call__(namespace, *args, **kwargs)
+        return cls._instances[key]
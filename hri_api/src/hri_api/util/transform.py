@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+import tf
+from hri_api.util import Singleton
+
+
+class SharedTransformListener(tf.TransformListener):
+    """ One TransformListener per process. Every listener subscribes to /tf and buffers every transform, so entities,
+        Worlds and robots in the same process share this one instead of each making their own.
+    """
+
+    __metaclass__ = Singleton
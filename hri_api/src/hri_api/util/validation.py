@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+import functools
+import inspect
+import os
+
+
+# Set HRI_API_VALIDATION=0 to leave the checks out of decorated functions entirely. It is read when the functions are
+# decorated, i.e. when their modules are imported.
+VALIDATION_ENABLED = os.environ.get('HRI_API_VALIDATION', '1') != '0'
+
+
+def set_validation_enabled(enabled):
+    """ Turn validation on or off for functions decorated from now on """
+
+    global VALIDATION_ENABLED
+    VALIDATION_ENABLED = enabled
+
+
+class Check(object):
+    """ A test on one parameter value, and a function describing a value that fails it, used only for errors """
+
+    def __init__(self, test, describe, error=TypeError):
+        self.test = test
+        self.describe = describe
+        self.error = error
+
+    def fail(self, func_name, param_name, value):
+        return self.error("{0}() parameter {1}={2} {3}".format(func_name, param_name, value, self.describe(value)))
+
+
+def is_a(*types):
+    return Check(lambda value: isinstance(value, types), lambda value: "is not part of type {0}".format(types))
+
+
+def in_range(minimum, maximum):
+    return Check(lambda value: minimum <= value <= maximum,
+                 lambda value: "is not between the range {0} - {1}".format(minimum, maximum))
+
+
+def greater_than(other_value):
+    return Check(lambda value: value > other_value, lambda value: "is not greater than {0}".format(other_value))
+
+
+def all_of(*checks):
+    """ Passes if every check passes; the error is that of the first check that fails """
+
+    tests = [check.test for check in checks]
+
+    def describe(value):
+        for check in checks:
+            if not check.test(value):
+                return check.describe(value)
+
+    return Check(lambda value: all(test(value) for test in tests), describe, checks[0].error)
+
+
+def optional(check):
+    """ Passes for None, otherwise runs check """
+    return Check(lambda value: value is None or check.test(value), check.describe, check.error)
+
+
+def validate(**checks):
+    """ Decorator that checks the named parameters of a function on every call, e.g.
+
+        @validate(target=is_a(Entity), speed=all_of(is_a(float), in_range(0.0, 1.0)))
+        def gaze(self, target, speed=0.5):
+
+        The parameter positions are worked out once, when the function is decorated. A check on the *args parameter
+        is run on each of the extra positional arguments. Parameters left at their default values aren't checked.
+        Errors are only formatted when a check fails. If validation is turned off the function is returned unchanged.
+    """
+
+    def decorator(func):
+        if not VALIDATION_ENABLED:
+            return func
+
+        spec = getattr(inspect, 'getfullargspec', None)
+
+        if spec is None:
+            spec = inspect.getargspec
+
+        argspec = spec(func)
+        func_name = func.__name__
+        positional = []
+        varargs_check = None
+
+        for name, check in checks.items():
+            if name == argspec.varargs:
+                varargs_check = check
+            elif name in argspec.args:
+                positional.append((argspec.args.index(name), name, check.test, check))
+            else:
+                raise ValueError("validate(): {0}() has no parameter {1}".format(func_name, name))
+
+        positional.sort()
+        first_vararg = len(argspec.args)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            n = len(args)
+
+            for index, name, test, check in positional:
+                if index < n:
+                    value = args[index]
+                elif name in kwargs:
+                    value = kwargs[name]
+                else:
+                    continue
+
+                if not test(value):
+                    raise check.fail(func_name, name, value)
+
+            if varargs_check is not None:
+                for value in args[first_vararg:]:
+                    if not varargs_check.test(value):
+                        raise varargs_check.fail(func_name, argspec.varargs, value)
+
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import re
+from .lru_cache import LRUCache
+
+
+# A word, with an apostrophe and trailing punctuation attached, as counted by SayToPlan and the TTS servers
+WORD_REGEX = re.compile("\w+[']{0,1}\w*[!?,.]{0,1}")
+
+
+def split_words(text):
+    return WORD_REGEX.findall(text)
+
+
+def num_words(text):
+    return len(WORD_REGEX.findall(text))
+
+
+class WordDurationModel(object):
+    """ Answers how long any run of words in a sentence takes to say. estimator(word, voice) returns the duration of
+        a single word (in seconds); it is called once per word of a sentence, and the running totals are kept in an
+        LRU cache keyed by (sentence, voice), so each query afterwards is a subtraction.
+    """
+
+    def __init__(self, estimator, cache_size=128):
+        self.estimator = estimator
+        self.prefix_sums = LRUCache(cache_size)
+
+    def cumulative(self, sentence, voice=''):
+        """ Return a list whose i-th item is the time taken to say the first i words of sentence """
+
+        def create():
+            totals = [0.0]
+
+            for word in split_words(sentence):
+                totals.append(totals[-1] + self.estimator(word, voice))
+
+            return totals
+
+        return self.prefix_sums.get_or_create((sentence, voice), create)
+
+    def duration(self, sentence, start_word_index, end_word_index, voice=''):
+        """ Return the time taken to say words start_word_index up to, but not including, end_word_index """
+
+        totals = self.cumulative(sentence, voice)
+        n = len(totals) - 1
+        start_word_index = max(0, min(start_word_index, n))
+        end_word_index = max(0, min(end_word_index, n))
+
+        if end_word_index <= start_word_index:
+            return 0.0
+        return totals[end_word_index] - totals[start_word_index]
+
+    def word_timings(self, sentence, voice=''):
+        """ Return two lists, the time from the start of sentence at which each word starts and ends """
+
+        totals = self.cumulative(sentence, voice)
+        return totals[:-1], totals[1:]
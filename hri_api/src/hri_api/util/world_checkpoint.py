@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+import os
+import struct
+import zlib
+from collections import namedtuple
+import numpy
+
+
+CheckpointEntry = namedtuple('CheckpointEntry', ['entity_id', 'entity_module', 'entity_class', 'local_id', 'visible'])
+
+
+class WorldCheckpoint(object):
+    """ Compact binary checkpoint of the entities the World created through add_entity, so that a restarted World can
+        bring them back under the same global ids, and perception sources can rebuild their local to global id maps,
+        without a round of add_entity calls.
+
+        The file holds a header, a table of 'module:Class' names, one fixed size record per entity and a CRC32 of
+        everything before it. Files are written to a temporary file and renamed over the old one, so readers see
+        either the previous checkpoint or the new one.
+    """
+
+    MAGIC = b'HRWK'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIII')              # magic, format version, class count, entity count
+    NAME_LENGTH = struct.Struct('<H')
+    CRC = struct.Struct('<I')
+    RECORD_DTYPE = numpy.dtype([('entity_id', '<i8'), ('class_index', '<u2'), ('local_id', '<i4'), ('visible', 'u1')])
+
+    @staticmethod
+    def write(path, entries):
+        """ Atomically replace the checkpoint at path with entries, a list of CheckpointEntry """
+
+        class_names = []
+        class_indices = {}
+        records = numpy.zeros(len(entries), WorldCheckpoint.RECORD_DTYPE)
+
+        for i, entry in enumerate(entries):
+            class_name = entry.entity_module + ':' + entry.entity_class
+
+            if class_name not in class_indices:
+                class_indices[class_name] = len(class_names)
+                class_names.append(class_name)
+
+            records[i] = (int(entry.entity_id), class_indices[class_name], entry.local_id, entry.visible)
+
+        chunks = [WorldCheckpoint.HEADER.pack(WorldCheckpoint.MAGIC, WorldCheckpoint.VERSION, len(class_names), len(records))]
+
+        for class_name in class_names:
+            encoded = class_name.encode('utf-8')
+            chunks.append(WorldCheckpoint.NAME_LENGTH.pack(len(encoded)))
+            chunks.append(encoded)
+
+        chunks.append(bytes(records.data))
+        data = b''.join(chunks)
+        data += WorldCheckpoint.CRC.pack(zlib.crc32(data) & 0xffffffff)
+
+        tmp_path = path + '.tmp'
+
+        # The data has to be on disk before the rename is, or a crash could leave an empty file under path
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.rename(tmp_path, path)
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    @staticmethod
+    def read(path):
+        """ Return the list of CheckpointEntry stored at path. Raises IOError if the file can't be read and ValueError
+            if it isn't a valid checkpoint.
+        """
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < WorldCheckpoint.HEADER.size + WorldCheckpoint.CRC.size:
+            raise ValueError("{0} is too short to be a World checkpoint".format(path))
+
+        (crc,) = WorldCheckpoint.CRC.unpack_from(data, len(data) - WorldCheckpoint.CRC.size)
+        data = data[:-WorldCheckpoint.CRC.size]
+
+        if zlib.crc32(data) & 0xffffffff != crc:
+            raise ValueError("World checkpoint {0} is corrupt".format(path))
+
+        magic, version, class_count, entity_count = WorldCheckpoint.HEADER.unpack_from(data, 0)
+
+        if magic != WorldCheckpoint.MAGIC or version != WorldCheckpoint.VERSION:
+            raise ValueError("{0} is not a version {1} World checkpoint".format(path, WorldCheckpoint.VERSION))
+
+        offset = WorldCheckpoint.HEADER.size
+        class_names = []
+
+        for i in range(class_count):
+            (length,) = WorldCheckpoint.NAME_LENGTH.unpack_from(data, offset)
+            offset += WorldCheckpoint.NAME_LENGTH.size
+            class_names.append(data[offset:offset + length].decode('utf-8').split(':'))
+            offset += length
+
+        if len(data) - offset != entity_count * WorldCheckpoint.RECORD_DTYPE.itemsize:
+            raise ValueError("World checkpoint {0} has the wrong number of records".format(path))
+
+        records = numpy.frombuffer(data, WorldCheckpoint.RECORD_DTYPE, entity_count, offset)
+        entries = []
+
+        for entity_id, class_index, local_id, visible in records.tolist():
+            entity_module, entity_class = class_names[class_index]
+            entries.append(CheckpointEntry(str(entity_id), entity_module, entity_class, local_id, bool(visible)))
+
+        return entries
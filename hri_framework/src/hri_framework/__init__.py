@@ -3,4 +3,6 @@ from .tts_action_server import *
 from .multi_goal_action_server import *
 from .gesture_action_server import *
 from .expression_action_server import *
-from .perception_synthesiser import *
\ No newline at end of file
+from .perception_synthesiser import *
+from .shared_world import *
+from .remote_query import *
\ No newline at end of file
@@ -1,73 +1,92 @@
 #!/usr/bin/env python
 import rospy
-from hri_msgs.srv import TfFrame, IfQueryableExecute, IfQueryableExecuteResponse
+from hri_msgs.srv import TfFrame, IfQueryableExecute, IfQueryableExecuteResponse, IfQueryableExecuteStates
 from hri_framework.singleton import Singleton
+from hri_framework.shared_world import SharedWorld
+from hri_api.util import ServiceClientPool, NamespacedSingleton
 
 
 class TfFrameService():
     __metaclass__ = Singleton
 
     def __init__(self):
-        self.service = TfFrameService.connect()
+        self.service = ServiceClientPool().get('tf_frame_service', TfFrame)
 
     def call_service(self, entity_id):
-        for i in range(1, 3):
-            try:
-                response = self.service(entity_id)
-                break
-            except rospy.ServiceException as exc:
-                print("tf_frame_service: service did not process request: " + str(exc))
-                self.service.close()
-                self.service = TfFrameService.connect()
-
-        return response.tf_frame
-
-    @staticmethod
-    def connect():
-        rospy.loginfo('connecting to tf_frame_service')
-        return rospy.ServiceProxy('tf_frame_service', TfFrame, persistent=True)
+        return self.service(entity_id).tf_frame
 
 
 class IfQueryableExecuteService():
     __metaclass__ = Singleton
 
     def __init__(self):
-        self.service = self.connect()
+        self.service = ServiceClientPool().get('if_queryable_execute', IfQueryableExecute)
 
     def call_service(self, entity_id):
-        for i in range(1, 3):
-            try:
-                response = self.service(entity_id)
-                break
-            except rospy.ServiceException as exc:
-                print("if_queryable_execute: service did not process request: " + str(exc))
-                self.service.close()
-                self.service = IfQueryableExecuteService.connect()
+        response = self.service(entity_id)
 
         if response.is_queryable:
             entity_proxies = []
-            for entity_id in response.entities:
-                entity_proxies.append(EntityProxy(entity_id))
+            for entity_msg in response.entities:
+                entity_proxies.append(EntityProxy(entity_msg.entity_id))
             return entity_proxies
         else:
             return None
 
-    @staticmethod
-    def connect():
-        rospy.loginfo('connecting to if_queryable_execute')
-        return rospy.ServiceProxy('if_queryable_execute', IfQueryableExecute, persistent=True)
+
+class IfQueryableExecuteStatesService():
+    __metaclass__ = NamespacedSingleton
+
+    def __init__(self, namespace=''):
+        self.service = ServiceClientPool().get(rospy.names.ns_join(namespace, 'if_queryable_execute_states'),
+                                               IfQueryableExecuteStates)
+
+    def call_service(self, entity_id, include_positions=False):
+        response = self.service(entity_id, include_positions)
+
+        if response.is_queryable:
+            entity_proxies = []
+            for entity_state in response.entities:
+                entity_proxies.append(EntityProxy.from_entity_state_msg(entity_state, response.reference_frame))
+            return entity_proxies
+        else:
+            return None
 
 
 class EntityProxy():
-    def __init__(self, entity_id):
+    def __init__(self, entity_id, tf_frame_id=None, entity_type=None, position=None, reference_frame=None):
         self.entity_id = entity_id
+        self.tf_frame_id = tf_frame_id
+        self.entity_type = entity_type
+        self.position = position
+        self.reference_frame = reference_frame
+
+    @staticmethod
+    def from_entity_state_msg(entity_state, reference_frame):
+        position = None
+
+        if entity_state.has_position:
+            position = entity_state.position
+
+        return EntityProxy(entity_state.entity_id, entity_state.tf_frame, entity_state.entity_type, position, reference_frame)
 
     def tf_frame(self):
-        service = TfFrameService()
-        return service.call_service(self.entity_id)
+        if self.tf_frame_id is not None:
+            return self.tf_frame_id
+
+        tf_frame = SharedWorld().tf_frame(self.entity_id)
+
+        if tf_frame is None:
+            service = TfFrameService()
+            tf_frame = service.call_service(self.entity_id)
 
-    def if_queryable_execute(self):
-        service = IfQueryableExecuteService()
-        return service.call_service()
+        self.tf_frame_id = tf_frame     # An entity's frame never changes
+        return tf_frame
 
+    def if_queryable_execute(self, include_positions=False):
+        """ Execute the query with this id and return proxies for its results, with their tf frames, types and
+            optionally positions filled in by the same call. Returns None if this entity isn't a query.
+        """
 
+        service = IfQueryableExecuteStatesService()
+        return service.call_service(self.entity_id, include_positions)
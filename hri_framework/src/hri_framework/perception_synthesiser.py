@@ -7,6 +7,7 @@ from hri_msgs.srv import SetVisibility
 from std_srvs.srv import Empty, EmptyResponse
 from std_msgs.msg import UInt16MultiArray
 from rospy import ServiceException
+from hri_api.util import WorldCheckpoint, ServiceClientPool
 
 
 class PerceivedEntity():
@@ -23,9 +24,25 @@ class PerceivedEntity():
         self.visible = visible
 
 
+class WorldServiceClient():
+    """ Talks to a World in another process through its add_entity and set_visibility services. A World in the
+        same process offers the same add_entity() and set_visibility() methods and can be used in its place.
+    """
+
+    def __init__(self):
+        self.add_entity_srv = ServiceClientPool().get('add_entity', AddEntity)
+        self.set_visibility_srv = ServiceClientPool().get('set_visibility', SetVisibility)
+
+    def add_entity(self, entity_module, entity_class, local_id):
+        return self.add_entity_srv(entity_module, entity_class, local_id).global_id
+
+    def set_visibility(self, global_id, is_visible):
+        self.set_visibility_srv(global_id, is_visible)
+
+
 class PerceptionSource():
 
-    def __init__(self, topic_name, entity_module, entity_class):
+    def __init__(self, topic_name, entity_module, entity_class, world):
         self.topic_name = topic_name
         self.entity_module = entity_module
         self.entity_class = entity_class
@@ -33,8 +50,7 @@ class PerceptionSource():
         self.entities = []
         self.lock = RLock()
         self.source_sub = None
-        self.add_entity_srv = rospy.ServiceProxy('add_entity', AddEntity)
-        self.set_visibility_srv = rospy.ServiceProxy('set_visibility', SetVisibility)
+        self.world = world
 
     def reset(self):
         with self.lock:
@@ -44,9 +60,24 @@ class PerceptionSource():
             self.entity_lookup.clear()
             self.entities = []
 
-    def enable(self):
+    def enable(self, checkpoint=()):
+        """ Start following the perception topic.
+
+        :param checkpoint: the World's checkpoint entries; those of this source's class restore its local to global id
+                           mappings, so entities the World already knows about aren't added again
+        """
+
         with self.lock:
             self.reset()
+
+            for entry in checkpoint:
+                if entry.entity_module == self.entity_module and entry.entity_class == self.entity_class:
+                    entity = PerceivedEntity(entry.local_id)
+                    entity.set_global_id(entry.entity_id)
+                    entity.set_visibility(entry.visible)
+                    self.entities.append(entity)
+                    self.entity_lookup[entity.local_id] = entity
+
             self.source_sub = rospy.Subscriber(self.topic_name, UInt16MultiArray, self.update_entities, queue_size=10)
 
     def disable(self):
@@ -84,17 +115,24 @@ class PerceptionSource():
         entity.set_visibility(visible)
 
         try:
-            self.set_visibility_srv(visible)
+            self.world.set_visibility(entity.global_id, visible)
+        except (IndexError, ServiceException):
+            # The World evicts entities that are out of sight for too long; one that comes back is added again
+            if visible:
+                self.add_entity(entity)
+            else:
+                self.disable()
         except:
             self.disable()
 
     def add_entity(self, entity):
 
         try:
-            res = self.add_entity_srv(self.entity_module, self.entity_class, entity.local_id)
-            entity.global_id = res.global_id
-            self.entities.append(entity)
-            self.entity_lookup[entity.local_id] = entity
+            entity.global_id = self.world.add_entity(self.entity_module, self.entity_class, entity.local_id)
+
+            if entity.local_id not in self.entity_lookup:
+                self.entities.append(entity)
+                self.entity_lookup[entity.local_id] = entity
         except:
             self.disable()
 
@@ -107,40 +145,69 @@ class PerceptionSource():
 
 class PerceptionSynthesizer():
 
-    def __init__(self):
+    def __init__(self, world=None):
+        """
+        :param world: a World in this process to update directly. If None, the World is reached through its services and
+                      this synthesiser is enabled and disabled through the perception_synthesiser/enable|disable services.
+        """
+
         if rospy.has_param('~perception_sources_yaml'):
             path = rospy.get_param('~perception_sources_yaml')
         else:
             raise Exception('Please specify perception_sources_yaml parameter')
 
-        self.sources = PerceptionSynthesizer.parse_yaml(path)
-        rospy.loginfo(str(self.sources))
-
         self.lock = RLock()
         self.enabled = False
-        self.enable_srv = rospy.Service('perception_synthesiser/enable', Empty, self.enable_callback)
-        self.disable_srv = rospy.Service('perception_synthesiser/disable', Empty, self.disable_callback)
+
+        if world is None:
+            self.checkpoint_path = rospy.get_param('hri/world_checkpoint_path', '')
+            self.sources = PerceptionSynthesizer.parse_yaml(path, WorldServiceClient())
+            self.enable_srv = rospy.Service('perception_synthesiser/enable', Empty, self.enable_callback)
+            self.disable_srv = rospy.Service('perception_synthesiser/disable', Empty, self.disable_callback)
+        else:
+            self.checkpoint_path = world.checkpoint_path
+            self.sources = PerceptionSynthesizer.parse_yaml(path, world)
+            world.attach_perception(self)
+
+        rospy.loginfo(str(self.sources))
 
     def enable_callback(self, req):
+        self.enable()
+        return EmptyResponse()
+
+    def disable_callback(self, req):
+        self.disable()
+        return EmptyResponse()
+
+    def enable(self):
         with self.lock:
             self.enabled = True
+            checkpoint = self.read_checkpoint()
 
             for source in self.sources:
-                source.enable()
+                source.enable(checkpoint)
 
-        return EmptyResponse()
-
-    def disable_callback(self, req):
+    def disable(self):
         with self.lock:
             self.enabled = False
 
             for source in self.sources:
                 source.disable()
 
-        return EmptyResponse()
+    def read_checkpoint(self):
+        """ Return the entries of the World's checkpoint, which the World writes before enabling perception """
+
+        if self.checkpoint_path == '':
+            return []
+
+        try:
+            return WorldCheckpoint.read(self.checkpoint_path)
+        except (IOError, ValueError) as exc:
+            rospy.logwarn("Couldn't read World checkpoint, perception sources start empty: " + str(exc))
+            return []
 
     @staticmethod
-    def parse_yaml(path):
+    def parse_yaml(path, world):
         with open(path, 'r') as file:
             config = yaml.load(file)
 
@@ -152,7 +219,7 @@ class PerceptionSynthesizer():
             entity_module = entity_data['module']
             entity_class = entity_data['class']
 
-            source = PerceptionSource(topic_name, entity_module, entity_class)
+            source = PerceptionSource(topic_name, entity_module, entity_class, world)
             sources.append(source)
 
         return sources
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+import rospy
+import threading
+from threading import Thread
+from hri_msgs.msg import WorldEventMsg
+from hri_api.query import Query
+from hri_api.util import NamespacedSingleton
+from hri_framework.entity_proxy import IfQueryableExecuteStatesService
+
+
+class WorldVersion():
+    """ Follows the World's event sequence number, which changes whenever an entity is added, evicted or changes
+        visibility, or a query is registered or expires. WorldVersion('robot2') follows the World in namespace robot2.
+    """
+
+    __metaclass__ = NamespacedSingleton
+
+    def __init__(self, namespace=''):
+        self.seq = 0
+        self.events_sub = rospy.Subscriber(rospy.names.ns_join(namespace, 'world_events'), WorldEventMsg,
+                                           self.event_callback, queue_size=100)
+
+    def event_callback(self, msg):
+        self.seq = max(self.seq, msg.seq)
+
+
+class RemoteQuery(Query):
+    """ A local stand-in for a Query held by the World. Results are leased: they are served from the cache until
+        lease seconds have passed or, with track_version, until the World's membership changes. A stale result is
+        still returned straight away while a background thread fetches the new one, so only the first execute()
+        waits on the World.
+
+        Queries built on a RemoteQuery, e.g. remote_query.select_type(...), run locally on the cached results. The
+        query is held by the World in namespace.
+    """
+
+    def __init__(self, query_id, lease=0.1, include_positions=False, track_version=True, namespace=''):
+        # Query.__init__ would start a node; remote queries live inside nodes that have already been started
+        self.iterable = self
+        self.func = self.execute
+        self.query_id = query_id
+        self.lease = lease
+        self.include_positions = include_positions
+        self.service = IfQueryableExecuteStatesService(namespace)
+        self.version = None
+
+        if track_version:
+            self.version = WorldVersion(namespace)
+
+        self.lock = threading.Lock()
+        self.results = None
+        self.fetched_at = None
+        self.fetched_seq = None
+        self.refreshing = False
+
+    def get_id(self):
+        return self.query_id
+
+    def is_fresh(self):
+        if self.results is None:
+            return False
+
+        if self.version is not None and self.version.seq != self.fetched_seq:
+            return False
+
+        return rospy.get_time() - self.fetched_at < self.lease
+
+    def execute(self):
+        """ Return the cached results, refreshing them in the background if their lease has run out """
+
+        if self.results is None:
+            self.refresh()
+        elif not self.is_fresh():
+            self.refresh_async()
+
+        return self.results
+
+    def refresh(self):
+        """ Fetch the results from the World, blocking until they arrive """
+
+        # Read the version and time before the call, so that changes made during the call expire these results
+        seq = None
+        if self.version is not None:
+            seq = self.version.seq
+
+        fetched_at = rospy.get_time()
+        results = self.service.call_service(self.query_id, self.include_positions)
+
+        if results is None:
+            raise ValueError("RemoteQuery: entity {0} is not a query".format(self.query_id))
+
+        with self.lock:
+            self.results = results
+            self.fetched_at = fetched_at
+            self.fetched_seq = seq
+
+    def refresh_async(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        thread = Thread(target=self.background_refresh)
+        thread.daemon = True
+        thread.start()
+
+    def background_refresh(self):
+        try:
+            self.refresh()
+        except (rospy.ServiceException, ValueError) as exc:
+            rospy.logwarn("RemoteQuery: keeping stale results for {0}: {1}".format(self.query_id, exc))
+        finally:
+            with self.lock:
+                self.refreshing = False
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+import os
+import rospy
+from hri_api.util import SharedSnapshotReader, NamespacedSingleton
+
+
+class SharedWorld():
+    """ Reads the World snapshot that the World node writes to shared memory when the hri/shared_snapshot_path
+        parameter is set, so that processes on the same host can resolve entities without a service call.
+        SharedWorld('robot2') reads the snapshot of the World in namespace robot2.
+
+        The snapshot file is reopened when the World restarts and makes a new one. While there is no snapshot, e.g.
+        after the World has shut down, snapshot() returns None and callers fall back to the World's services.
+    """
+
+    __metaclass__ = NamespacedSingleton
+
+    def __init__(self, namespace=''):
+        self.namespace = namespace
+        self.path = rospy.get_param(rospy.names.ns_join(namespace, 'hri/shared_snapshot_path'), '')
+        self.reader = None
+        self.snapshot_cache = None
+
+    def is_available(self):
+        if self.reader is not None and not self.reader.is_current():
+            self.reader.close()
+            self.reader = None
+            self.snapshot_cache = None
+
+        if self.reader is None and self.path != '' and os.path.exists(self.path):
+            try:
+                self.reader = SharedSnapshotReader(self.path)
+            except (IOError, OSError) as exc:
+                rospy.logwarn("Couldn't open shared World snapshot: " + str(exc))
+            except ValueError as exc:
+                rospy.logwarn("Couldn't open shared World snapshot: " + str(exc))
+                self.path = ''
+
+        return self.reader is not None
+
+    def snapshot(self):
+        """ Return the latest snapshot, or None if there is no shared World snapshot on this host """
+
+        if not self.is_available():
+            return None
+
+        if self.snapshot_cache is None or self.snapshot_cache.version != self.reader.version():
+            try:
+                self.snapshot_cache = self.reader.read()
+            except IOError as exc:
+                rospy.logwarn(str(exc))
+
+        return self.snapshot_cache
+
+    def tf_frame(self, entity_id):
+        snapshot = self.snapshot()
+
+        if snapshot is None:
+            return None
+        return snapshot.tf_frame(entity_id)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 import rospy
 import abc
+import tf
 from hri_msgs.msg import TargetAction, TargetFeedback
 from threading import Thread
 from actionlib.simple_action_server import SimpleActionServer
+from hri_api.entities import MotionPredictor
+from hri_api.util import SharedTransformListener
 
 
 class ITargetActionServer():
@@ -17,6 +20,10 @@ class ITargetActionServer():
         self.success_distance = rospy.get_param('~success_distance', 0.2)
         self.end_effector_frame = rospy.get_param('~end_effector_frame', 'gaze')
         self.rate = rospy.Rate(rospy.get_param('~hz', 10))
+        self.perception_period = 1.0 / rospy.get_param('~perception_hz', 10)
+        self.predictor = MotionPredictor(max_age=rospy.get_param('~prediction_max_age', 1.0))
+        self.last_lookup = {}
+        self.tl = SharedTransformListener()
 
     def start(self):
         self.action_server.start()
@@ -32,6 +39,29 @@ class ITargetActionServer():
             Run your gaze algorithm to make an end effector on the robot target a particular entity.
         """
 
+    def target_position(self, target_frame, lookahead=0.0):
+        """ Return the position of target_frame in origin_frame, lookahead seconds from now, or None if it is unknown.
+            Transforms are looked up at most once per perception period; in between, the position is extrapolated from
+            the cached motion of the target so that execute() can run faster than perception.
+        """
+
+        now = rospy.get_time()
+        last_lookup = self.last_lookup.get(target_frame)
+
+        # Rate limited by when the lookups were made rather than by the stamps of their transforms, which lag behind
+        # when tf does, so that a lagging tf doesn't cause a lookup every step
+        if last_lookup is None or now - last_lookup >= self.perception_period:
+            self.last_lookup[target_frame] = now
+
+            try:
+                stamp = self.tl.getLatestCommonTime(self.origin_frame, target_frame)
+                (trans, rot) = self.tl.lookupTransform(self.origin_frame, target_frame, stamp)
+                self.predictor.update(stamp.to_sec(), [target_frame], [trans])
+            except (tf.Exception, tf.LookupException, tf.ConnectivityException, tf.ExtrapolationException):
+                rospy.logdebug("Couldn't transform from '" + self.origin_frame + "' to '" + target_frame + "'")
+
+        return self.predictor.predict(target_frame, now + lookahead)
+
     def send_feedback(self, distance_to_target):
         """ Call this method to send feedback about the distance to the target """
 
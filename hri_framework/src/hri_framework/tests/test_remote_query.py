@@ -0,0 +1,140 @@
+from unittest import TestCase
+import threading
+import time
+import rospy
+from hri_framework import RemoteQuery, WorldVersion
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeEvent(object):
+    def __init__(self, seq):
+        self.seq = seq
+
+
+class FakeVersion(object):
+    def __init__(self):
+        self.seq = 0
+
+
+class FakeService(object):
+    """ Stands in for the World's if_queryable_execute_states service. Each call returns the current results, or
+        None as the World does when the id isn't a query. A call can be held until release() is called.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+        self.gate = None
+
+    def hold(self):
+        self.gate = threading.Event()
+
+    def release(self):
+        self.gate.set()
+
+    def call_service(self, entity_id, include_positions=False):
+        if self.gate is not None:
+            self.gate.wait(5.0)
+
+        self.calls += 1
+        return self.results
+
+
+class TestRemoteQuery(TestCase):
+    def setUp(self):
+        self.get_time = rospy.get_time
+        self.now = 100.0
+        rospy.get_time = lambda: self.now
+
+        self.service = FakeService(['a'])
+        self.version = FakeVersion()
+        self.query = RemoteQuery('42', lease=1.0, track_version=False)
+        self.query.service = self.service
+        self.query.version = self.version
+
+    def tearDown(self):
+        rospy.get_time = self.get_time
+
+    def wait_for_refresh(self):
+        for i in range(500):
+            if not self.query.refreshing:
+                return
+            time.sleep(0.01)
+
+        self.fail("background refresh didn't finish")
+
+    def test_first_execute_blocks(self):
+        self.assertEqual(self.query.execute(), ['a'])
+        self.assertEqual(self.service.calls, 1)
+
+    def test_lease(self):
+        self.query.execute()
+        self.service.results = ['b']
+        self.now += 0.5
+        self.assertEqual(self.query.execute(), ['a'])
+        self.assertEqual(self.service.calls, 1)
+
+    def test_background_refresh(self):
+        self.query.execute()
+        self.service.results = ['b']
+        self.service.hold()
+        self.now += 1.5
+
+        # The stale results come back straight away while the new ones are fetched
+        self.assertEqual(self.query.execute(), ['a'])
+        self.assertEqual(self.query.execute(), ['a'])
+        self.service.release()
+        self.wait_for_refresh()
+
+        self.assertEqual(self.service.calls, 2)
+        self.assertEqual(self.query.execute(), ['b'])
+
+    def test_version_change(self):
+        self.query.execute()
+        self.service.results = ['b']
+        self.version.seq = 3
+        self.query.execute()
+        self.wait_for_refresh()
+
+        self.assertEqual(self.query.fetched_seq, 3)
+        self.assertEqual(self.query.execute(), ['b'])
+
+    def test_refresh_failure(self):
+        self.query.execute()
+        self.service.results = None
+        self.now += 1.5
+        self.query.execute()
+        self.wait_for_refresh()
+        self.assertEqual(self.query.execute(), ['a'])
+
+    def test_not_a_query(self):
+        self.service.results = None
+        self.assertRaises(ValueError, self.query.execute)
+
+
+class FakeSubscriber(object):
+    def __init__(self, topic, msg_type, callback, queue_size=None):
+        self.topic = topic
+
+
+class TestWorldVersion(TestCase):
+    def setUp(self):
+        self.subscriber = rospy.Subscriber
+        rospy.Subscriber = FakeSubscriber
+
+    def tearDown(self):
+        rospy.Subscriber = self.subscriber
+
+    def test_namespace(self):
+        # The World in namespace robot2 publishes its events on robot2/world_events
+        version = WorldVersion.__new__(WorldVersion)
+        version.__init__('robot2')
+        self.assertEqual(version.events_sub.topic, 'robot2/world_events')
+
+    def test_events(self):
+        version = WorldVersion.__new__(WorldVersion)
+        version.__init__()
+        version.event_callback(FakeEvent(4))
+        version.event_callback(FakeEvent(2))
+        self.assertEqual(version.seq, 4)
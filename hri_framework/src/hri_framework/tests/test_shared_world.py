@@ -0,0 +1,41 @@
+from unittest import TestCase
+import os
+import tempfile
+import rospy
+from hri_api.util import SharedSnapshotWriter
+from hri_framework import SharedWorld
+
+__author__ = 'Jamie Diprose'
+
+
+class TestSharedWorld(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'world')
+        rospy.set_param('robot2/hri/shared_snapshot_path', self.path)
+        self.shared_world = SharedWorld('robot2')
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rmdir(self.directory)
+
+    def test_namespace(self):
+        self.assertEqual(self.shared_world.path, self.path)
+        self.assertFalse(SharedWorld() is self.shared_world)
+
+    def test_world_restarted(self):
+        writer = SharedSnapshotWriter(self.path)
+        writer.write(1.0, 1, ['person'], [11], [0], ['person1_head'], [[0, 0, 0]])
+        self.assertEqual(self.shared_world.tf_frame(11), 'person1_head')
+
+        # A restarted World removes the old snapshot and makes a new file in its place
+        writer.close()
+        os.remove(self.path)
+        self.assertEqual(self.shared_world.snapshot(), None)
+
+        writer = SharedSnapshotWriter(self.path)
+        writer.write(2.0, 1, ['person'], [21], [0], ['person2_head'], [[0, 0, 0]])
+        self.assertEqual(self.shared_world.tf_frame(11), None)
+        self.assertEqual(self.shared_world.tf_frame(21), 'person2_head')
+        writer.close()
@@ -0,0 +1,65 @@
+from unittest import TestCase
+import rospy
+from hri_api.entities import MotionPredictor
+from hri_framework import ITargetActionServer
+
+__author__ = 'Jamie Diprose'
+
+
+class FakeStamp(object):
+    def __init__(self, secs):
+        self.secs = secs
+
+    def to_sec(self):
+        return self.secs
+
+
+class FakeListener(object):
+    def __init__(self, lag):
+        self.lag = lag
+        self.lookups = 0
+
+    def getLatestCommonTime(self, target_frame, source_frame):
+        return FakeStamp(rospy.get_time() - self.lag)
+
+    def lookupTransform(self, target_frame, source_frame, stamp):
+        self.lookups += 1
+        return [1.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]
+
+
+def make_server(lag):
+    """ A target action server with its targeting state, but without an action server """
+
+    server = ITargetActionServer.__new__(ITargetActionServer)
+    server.origin_frame = 'base_link'
+    server.perception_period = 0.1
+    server.predictor = MotionPredictor(max_age=1.0)
+    server.last_lookup = {}
+    server.tl = FakeListener(lag)
+    return server
+
+
+class TestTargetPosition(TestCase):
+    def setUp(self):
+        self.get_time = rospy.get_time
+        self.now = 100.0
+        rospy.get_time = lambda: self.now
+
+    def tearDown(self):
+        rospy.get_time = self.get_time
+
+    def steps(self, server, count, period):
+        for i in range(count):
+            server.target_position('person1_head')
+            self.now += period
+
+    def test_rate_limited(self):
+        server = make_server(0.0)
+        self.steps(server, 10, 0.03)
+        self.assertEqual(server.tl.lookups, 3)
+
+    def test_lagging_tf(self):
+        # Transforms older than the perception period mustn't cause a lookup every control step
+        server = make_server(0.5)
+        self.steps(server, 10, 0.03)
+        self.assertEqual(server.tl.lookups, 3)
@@ -3,19 +3,24 @@ import rospy
 import actionlib
 import abc
 from hri_msgs.srv import TextToSpeechSubsentenceDuration, TextToSpeechSubsentenceDurationResponse
+from hri_msgs.srv import TextToSpeechWordTimings, TextToSpeechWordTimingsResponse
+from hri_api.util import WordDurationModel, num_words
 from hri_msgs.msg import TextToSpeechFeedback, TextToSpeechResult, TextToSpeechAction
 
 
 class ITextToSpeechActionServer():
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self):
+    def __init__(self, cache_size=128):
         self.server = None
         self.feedback = None
         self.result = None
+        self.voice = ''
+        self.word_durations = WordDurationModel(self.word_duration, cache_size)
 
     def start(self):
         rospy.Service('tts_subsentence_duration', TextToSpeechSubsentenceDuration, self.__tts_subsentence_duration)
+        rospy.Service('tts_word_timings', TextToSpeechWordTimings, self.__tts_word_timings)
         self.server = actionlib.SimpleActionServer('text_to_speech', TextToSpeechAction, auto_start=False)
         self.server.register_goal_callback(self.__process_goal)
         self.server.register_preempt_callback(self.__cancel_goal)
@@ -50,6 +55,29 @@ class ITextToSpeechActionServer():
         duration = self.tts_subsentence_duration(sentence, req.start_word_index, req.end_word_index)
         return TextToSpeechSubsentenceDurationResponse(duration)
 
+    def __tts_word_timings(self, req):
+        word_starts, word_ends = self.tts_word_timings(req.sentence)
+        return TextToSpeechWordTimingsResponse(word_starts, word_ends)
+
+    def tts_word_timings(self, sentence):
+        """ Return two lists, the time from the start of the sentence at which each word starts and ends (in
+            seconds). Clients compute the duration of any part of the sentence from these, so a whole sentence takes
+            one call. By default they are built from tts_subsentence_duration; override this if your text to speech
+            synthesiser can give the timings of every word at once.
+        """
+
+        word_starts = []
+        word_ends = []
+        start = 0.0
+
+        for i in range(num_words(sentence)):
+            end = self.tts_subsentence_duration(sentence, 0, i + 1)
+            word_starts.append(start)
+            word_ends.append(end)
+            start = end
+
+        return word_starts, word_ends
+
     def send_feedback(self, current_word_index):
         """ Call this method when the current word being synthesised changes """
 
@@ -72,9 +100,18 @@ class ITextToSpeechActionServer():
         """ Synthesise the sentence, e.g. using your robots text to speech synthesiser. """
         return
 
-    @abc.abstractmethod
     def tts_subsentence_duration(self, sentence, start_word_index, end_word_index):
         """ Return the duration (how long it takes to speak, double) a subset of a sentence that will be synthesised.
-            The subset of the sentence is given via the parameters: start_word_index and end_word_index.
+            The subset of the sentence is given via the parameters: start_word_index and end_word_index (exclusive).
+            By default the word durations of each sentence are estimated once with word_duration and cached per
+            sentence and self.voice, so implement word_duration rather than this method.
         """
-        return
\ No newline at end of file
+
+        return self.word_durations.duration(sentence, start_word_index, end_word_index, self.voice)
+
+    def word_duration(self, word, voice):
+        """ Return how long it takes to speak a single word (in seconds), e.g. using your text to speech
+            synthesiser's phoneme timings.
+        """
+
+        raise NotImplementedError("{0} must implement word_duration or tts_subsentence_duration".format(self.__class__.__name__))
\ No newline at end of file